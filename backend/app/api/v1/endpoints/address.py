@@ -1,12 +1,18 @@
 """Address geocoding endpoint."""
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import httpx
+import logging
+import sqlite3
 from app.core.config import settings
+from app.core.governor import ProviderUnavailableError
+from app.core.http_client import http_client
+from app.services.geocode_cache import geocode_cache
 
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 class AddressRequest(BaseModel):
     address: str
@@ -44,27 +50,37 @@ async def geocode_address(request: AddressRequest):
         )
 
     try:
+        if settings.geocode_cache_enabled:
+            cached = await geocode_cache.get(request.address)
+            if cached is not None:
+                return GeocodeResponse(address=request.address, success=True, **cached)
+
         api_key = settings.google_geocoding_api_key or settings.google_maps_api_key
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
+        url = f"{settings.google_maps_base_url}/maps/api/geocode/json"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                params={"address": request.address, "key": api_key}
-            )
-            data = response.json()
+        response = await http_client.get(
+            url,
+            params={"address": request.address, "key": api_key}
+        )
+        data = response.json()
 
         if data["status"] == "OK" and len(data["results"]) > 0:
             result = data["results"][0]
             location = result["geometry"]["location"]
+            geocoded = {
+                "formatted_address": result["formatted_address"],
+                "latitude": location["lat"],
+                "longitude": location["lng"]
+            }
 
-            return GeocodeResponse(
-                address=request.address,
-                formatted_address=result["formatted_address"],
-                latitude=location["lat"],
-                longitude=location["lng"],
-                success=True
-            )
+            if settings.geocode_cache_enabled:
+                try:
+                    await geocode_cache.set(request.address, geocoded)
+                except (OSError, sqlite3.Error) as e:
+                    # The result is still good; it just is not kept on disk
+                    logger.warning("Geocode cache write failed: %s", e)
+
+            return GeocodeResponse(address=request.address, success=True, **geocoded)
         else:
             raise HTTPException(
                 status_code=404,
@@ -73,5 +89,21 @@ async def geocode_address(request: AddressRequest):
 
     except HTTPException:
         raise
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Geocoding failed: {str(e)}")
+
+
+@router.get("/cache-stats")
+async def geocode_cache_stats():
+    """
+    Get geocode cache hit/miss counters.
+
+    Returns:
+        Memory and disk cache statistics
+    """
+    return {
+        "enabled": settings.geocode_cache_enabled,
+        **geocode_cache.stats
+    }
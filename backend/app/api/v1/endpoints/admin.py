@@ -0,0 +1,57 @@
+"""Admin endpoints for request profiles."""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from app.core.config import settings
+from app.core.profiling import MODES, profile_store, token_matches
+
+
+router = APIRouter()
+
+
+async def require_profiling_access(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Allow access only when profiling is enabled with a token and the caller's token matches."""
+    if not settings.profiling_enabled or not settings.profiling_token:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not token_matches(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_profiling_access)])
+async def list_profiles():
+    """
+    List stored request profiles.
+
+    Profile a request by sending ``X-Profile: cprofile`` or
+    ``X-Profile: sample`` with ``X-Profile-Token``; its
+    report name comes back in ``X-Profile-Id``.
+
+    Returns:
+        Reports, newest first, and the retention limit
+    """
+    return {
+        "profiles": profile_store.list(),
+        "max_files": profile_store.max_files,
+        "modes": list(MODES)
+    }
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_profiling_access)])
+async def download_profile(name: str):
+    """
+    Download a profile report.
+
+    ``.pstats`` files load with ``pstats.Stats`` or snakeviz; ``.collapsed``
+    files are collapsed stacks for flame graph tools (e.g. speedscope).
+
+    Args:
+        name: Report name from the list or X-Profile-Id
+
+    Returns:
+        Report file
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if name.endswith(MODES["sample"]) else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
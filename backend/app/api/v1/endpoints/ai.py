@@ -1,7 +1,12 @@
 """AI-powered roof analysis endpoints."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
+from app.core.config import settings
+from app.core.disconnect import cancel_on_disconnect
+from app.core.sse import SSE_HEADERS, format_event
+from app.services.analysis_cache import analysis_cache
 from app.services.ai_service import ai_service
 
 
@@ -13,6 +18,7 @@ class AIAnalysisRequest(BaseModel):
     area_sq_ft: float
     pitch_degrees: float
     user_notes: Optional[str] = None
+    bypass_cache: bool = False  # force a fresh analysis (the result is still cached)
 
 
 class DamageDetectionRequest(BaseModel):
@@ -32,41 +38,75 @@ class AIAnalysisResponse(BaseModel):
 
 
 @router.post("/analyze", response_model=Dict[str, Any])
-async def analyze_roof(request: AIAnalysisRequest):
+async def analyze_roof(request: AIAnalysisRequest, http_request: Request):
     """
     Get AI-powered insights and recommendations for a roof estimate.
 
     Args:
         request: Address and roof measurements
+        http_request: Raw request, used to cancel the model call on disconnect
 
     Returns:
         AI-generated recommendations and insights
     """
-    result = await ai_service.analyze_roof_description(
+    result = await cancel_on_disconnect(http_request, ai_service.analyze_roof_description(
         address=request.address,
         area_sq_ft=request.area_sq_ft,
         pitch_degrees=request.pitch_degrees,
-        user_notes=request.user_notes
-    )
+        user_notes=request.user_notes,
+        bypass_cache=request.bypass_cache
+    ))
 
     return result
 
 
+async def _analysis_events(request: AIAnalysisRequest) -> AsyncIterator[str]:
+    """Format streamed analysis events as server-sent events."""
+    async for event in ai_service.stream_roof_analysis(
+        address=request.address,
+        area_sq_ft=request.area_sq_ft,
+        pitch_degrees=request.pitch_degrees,
+        user_notes=request.user_notes,
+        bypass_cache=request.bypass_cache
+    ):
+        yield format_event(event["event"], event["data"])
+
+
+@router.post("/analyze/stream")
+async def analyze_roof_stream(request: AIAnalysisRequest):
+    """
+    Stream AI insights as server-sent events while the model is still writing.
+
+    Events: "field" ({key, value}) for each scalar field, "item"
+    ({key, index, value}) for each recommendation, material or
+    consideration as soon as it is complete, then "done" with the same body
+    POST /analyze returns, or "error".
+
+    Args:
+        request: Address and roof measurements
+
+    Returns:
+        text/event-stream response
+    """
+    return StreamingResponse(_analysis_events(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/detect-damage")
-async def detect_damage(request: DamageDetectionRequest):
+async def detect_damage(request: DamageDetectionRequest, http_request: Request):
     """
     Analyze roof condition description for potential damage.
 
     Args:
         request: Roof condition description
+        http_request: Raw request, used to cancel the model call on disconnect
 
     Returns:
         Damage assessment
     """
-    result = await ai_service.detect_roof_damage(
+    result = await cancel_on_disconnect(http_request, ai_service.detect_roof_damage(
         image_description=request.image_description,
         area_sq_ft=request.area_sq_ft
-    )
+    ))
 
     return result
 
@@ -91,3 +131,18 @@ async def ai_status():
         },
         "message": "AI service ready" if ai_service.is_configured() else "Configure OpenAI API key to enable AI features"
     }
+
+
+@router.get("/cache-stats")
+async def analysis_cache_stats():
+    """
+    Get roof analysis cache hit/miss counters.
+
+    Returns:
+        Cache statistics and single-flight counters
+    """
+    return {
+        "enabled": settings.analysis_cache_enabled,
+        **analysis_cache.stats,
+        "single_flight": ai_service.analysis_inflight.stats
+    }
@@ -1,13 +1,18 @@
 """Address autocomplete endpoint using Google Places API."""
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
-import httpx
+from typing import Any, Dict, List
 from app.core.config import settings
+from app.core.http_client import http_client
+from app.core.singleflight import SingleFlight
+from app.services.autocomplete_cache import autocomplete_cache, normalize_query
 
 
 router = APIRouter()
 
+# Identical prefixes typed concurrently share one upstream call
+_inflight = SingleFlight()
+
 
 class AddressSuggestion(BaseModel):
     description: str
@@ -20,6 +25,32 @@ class AutocompleteResponse(BaseModel):
     error: str = None
 
 
+async def _fetch_predictions(input: str, types: str) -> Dict[str, Any]:
+    """
+    Call Google Places Autocomplete API.
+
+    Args:
+        input: Partial address string from user
+        types: Place types to search
+
+    Returns:
+        Raw JSON response from Google
+    """
+    # Build Google Places Autocomplete API URL
+    base_url = f"{settings.google_maps_base_url}/maps/api/place/autocomplete/json"
+
+    params = {
+        "input": input,
+        "types": types,
+        "key": settings.google_maps_api_key,
+        "components": "country:us"  # Restrict to US addresses
+    }
+
+    response = await http_client.get(base_url, params=params, timeout=10.0)
+    response.raise_for_status()
+    return response.json()
+
+
 @router.get("/suggestions", response_model=AutocompleteResponse)
 async def get_address_suggestions(
     input: str = Query(..., description="User's partial address input"),
@@ -49,43 +80,54 @@ async def get_address_suggestions(
         )
 
     try:
-        # Build Google Places Autocomplete API URL
-        base_url = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
-
-        params = {
-            "input": input,
-            "types": types,
-            "key": settings.google_maps_api_key,
-            "components": "country:us"  # Restrict to US addresses
-        }
-
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("status") == "REQUEST_DENIED":
+        if settings.autocomplete_cache_enabled:
+            cached = autocomplete_cache.lookup(types, input)
+            if cached is not None:
                 return AutocompleteResponse(
-                    suggestions=[],
-                    success=False,
-                    error="Google Places API not enabled. Enable it at: https://console.cloud.google.com/apis/library/places-backend.googleapis.com"
+                    suggestions=[AddressSuggestion(**p) for p in cached],
+                    success=True
                 )
 
-            suggestions = []
-            for prediction in data.get("predictions", []):
-                suggestions.append(AddressSuggestion(
-                    description=prediction["description"],
-                    place_id=prediction["place_id"]
-                ))
+        data = await _inflight.do((types, normalize_query(input)), lambda: _fetch_predictions(input, types))
 
+        if data.get("status") == "REQUEST_DENIED":
             return AutocompleteResponse(
-                suggestions=suggestions,
-                success=True
+                suggestions=[],
+                success=False,
+                error="Google Places API not enabled. Enable it at: https://console.cloud.google.com/apis/library/places-backend.googleapis.com"
             )
 
+        predictions = [
+            {"description": prediction["description"], "place_id": prediction["place_id"]}
+            for prediction in data.get("predictions", [])
+        ]
+
+        if settings.autocomplete_cache_enabled and data.get("status") in ("OK", "ZERO_RESULTS"):
+            autocomplete_cache.set(types, input, predictions)
+
+        return AutocompleteResponse(
+            suggestions=[AddressSuggestion(**p) for p in predictions],
+            success=True
+        )
+
     except Exception as e:
         return AutocompleteResponse(
             suggestions=[],
             success=False,
             error=f"Failed to fetch suggestions: {str(e)}"
         )
+
+
+@router.get("/cache-stats")
+async def autocomplete_cache_stats():
+    """
+    Get autocomplete cache and request coalescing counters.
+
+    Returns:
+        Cache hit/miss statistics and coalesced upstream calls
+    """
+    return {
+        "enabled": settings.autocomplete_cache_enabled,
+        **autocomplete_cache.stats,
+        "upstream": _inflight.stats
+    }
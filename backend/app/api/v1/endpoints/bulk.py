@@ -0,0 +1,385 @@
+"""Bulk portfolio estimation from CSV."""
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Iterable, List, Literal, Optional
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from app.api.v1.endpoints.pipeline import PipelineRequest, run_pipeline
+from app.core.config import settings
+from app.core.governor import caller_limits
+from app.core.rate_limit import TokenBucket
+
+
+router = APIRouter()
+
+# Columns of a result row, in CSV output order
+RESULT_COLUMNS = [
+    "row", "id", "address", "status", "error", "formatted_address", "latitude", "longitude",
+    "image_id", "detection_source", "detection_confidence", "area_sq_ft", "estimated_pitch",
+    "perimeter", "pitch_multiplier", "material_cost", "labor_cost", "repair_cost", "total",
+    "cost_per_sqft"
+]
+
+_RUN_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_TRUE = {"1", "true", "yes", "y", "t"}
+
+# Shared by all bulk runs so concurrent uploads share each provider's quota.
+# Applied by the outbound governor, so rows answered from a cache use none.
+provider_limits = {
+    "google": TokenBucket(settings.bulk_google_rate_per_second, settings.bulk_google_rate_per_second),
+    "openai": TokenBucket(settings.bulk_openai_rate_per_second, settings.bulk_openai_rate_per_second)
+}
+
+
+def read_csv_rows(text: str) -> List[Dict[str, str]]:
+    """
+    Parse an uploaded portfolio CSV.
+
+    Headers are matched case-insensitively. Each row needs an address or a
+    latitude and longitude; id, building_type, has_damage,
+    material_cost_per_sqft and labor_cost_per_sqft are optional.
+
+    Args:
+        text: CSV file contents
+
+    Returns:
+        Non-empty rows as dicts keyed by lowercased header
+
+    Raises:
+        ValueError: If the file has no usable location columns
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise ValueError("CSV file is empty")
+    headers = {name: name.strip().lower() for name in reader.fieldnames if name}
+    if "address" not in headers.values() and not {"latitude", "longitude"} <= set(headers.values()):
+        raise ValueError("CSV needs an address column or latitude and longitude columns")
+
+    rows = []
+    for raw in reader:
+        row = {headers[k]: (v or "").strip() for k, v in raw.items() if k in headers}
+        if any(row.values()):
+            rows.append(row)
+    return rows
+
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    """Parse a number from a CSV cell, treating blanks as missing."""
+    return float(value) if value else None
+
+
+def row_to_request(row: Dict[str, str], detector: str, building_type: str) -> PipelineRequest:
+    """
+    Build a pipeline request from a CSV row.
+
+    Args:
+        row: Parsed CSV row
+        detector: Roof detector for all rows
+        building_type: Default building type for rows without one
+
+    Returns:
+        Pipeline request without AI analysis
+
+    Raises:
+        ValueError: If a value cannot be parsed or the row has no location
+    """
+    return PipelineRequest(
+        address=row.get("address") or None,
+        latitude=_optional_float(row.get("latitude")),
+        longitude=_optional_float(row.get("longitude")),
+        detector=detector,
+        building_type=row.get("building_type") or building_type,
+        has_damage=row.get("has_damage", "").lower() in _TRUE,
+        material_cost_per_sqft=_optional_float(row.get("material_cost_per_sqft")),
+        labor_cost_per_sqft=_optional_float(row.get("labor_cost_per_sqft")),
+        include_analysis=False
+    )
+
+
+def make_run_id(content: bytes, detector: str, building_type: str) -> str:
+    """Derive a stable run id from the file contents and options."""
+    digest = hashlib.sha256(content)
+    digest.update(f"|{detector}|{building_type}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class BulkCheckpoint:
+    """
+    Append-only NDJSON log of finished rows for one bulk run.
+
+    Re-running with the same run id skips rows already estimated successfully.
+    """
+
+    def __init__(self, run_id: str):
+        """
+        Initialize the checkpoint for a run.
+
+        Args:
+            run_id: Run id (letters, digits, dash and underscore)
+        """
+        self.path = os.path.join(settings.cache_dir, "bulk", f"{run_id}.ndjson")
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Read the latest result recorded for each row."""
+        results: Dict[int, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return results
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted run
+                    continue
+                results[result["row"]] = result
+        return results
+
+    def append(self, result: Dict[str, Any]) -> None:
+        """Record a finished row."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+
+
+def _flatten(row_number: int, row: Dict[str, str], stages: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn pipeline stage results into one result row."""
+    geocode = stages.get("geocode", {})
+    detection = stages.get("detection", {})
+    measurement = stages.get("measurement", {})
+    cost = stages.get("cost", {})
+    error = stages.get("error")
+    return {
+        "row": row_number,
+        "id": row.get("id") or None,
+        "address": row.get("address") or None,
+        "status": "error" if error else "ok",
+        "error": f"{error['stage']}: {error['error']}" if error else None,
+        "formatted_address": geocode.get("formatted_address"),
+        "latitude": geocode.get("latitude"),
+        "longitude": geocode.get("longitude"),
+        "image_id": stages.get("satellite", {}).get("image_id"),
+        "detection_source": detection.get("source"),
+        "detection_confidence": detection.get("confidence"),
+        "area_sq_ft": measurement.get("area_sq_ft"),
+        "estimated_pitch": measurement.get("estimated_pitch"),
+        "perimeter": measurement.get("perimeter"),
+        "pitch_multiplier": cost.get("pitch_multiplier"),
+        "material_cost": cost.get("material_cost"),
+        "labor_cost": cost.get("labor_cost"),
+        "repair_cost": cost.get("repair_cost"),
+        "total": cost.get("total"),
+        "cost_per_sqft": cost.get("cost_per_sqft")
+    }
+
+
+async def estimate_row(row_number: int, row: Dict[str, str], detector: str, building_type: str) -> Dict[str, Any]:
+    """
+    Run the geocode/satellite/detect/measure/cost stages for one CSV row.
+
+    Args:
+        row_number: 1-based data row number
+        row: Parsed CSV row
+        detector: Roof detector to use
+        building_type: Default building type
+
+    Returns:
+        Flat result row (status "ok" or "error")
+    """
+    try:
+        request = row_to_request(row, detector, building_type)
+    except ValueError as e:
+        return _flatten(row_number, row, {"error": {"stage": "input", "error": str(e)}})
+
+    stages: Dict[str, Any] = {}
+    token = caller_limits.set(provider_limits)
+    try:
+        async for event in run_pipeline(request):
+            stages[event["stage"]] = event["data"]
+    finally:
+        caller_limits.reset(token)
+    return _flatten(row_number, row, stages)
+
+
+async def run_bulk(
+    rows: List[Dict[str, str]],
+    run_id: str,
+    concurrency: int,
+    detector: str = "local",
+    building_type: str = "residential",
+    resume: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Estimate every row with bounded concurrency, yielding results as they finish.
+
+    Rows finished successfully in an earlier run with the same id are
+    yielded first from the checkpoint and not estimated again.
+
+    Args:
+        rows: Parsed CSV rows
+        run_id: Checkpoint id
+        concurrency: Maximum rows in progress at once
+        detector: Roof detector to use
+        building_type: Default building type
+        resume: Reuse successful results from the checkpoint
+
+    Yields:
+        Result rows (see RESULT_COLUMNS), in completion order
+    """
+    checkpoint = BulkCheckpoint(run_id)
+    finished = await asyncio.to_thread(checkpoint.load) if resume else {}
+
+    pending = []
+    for row_number, row in enumerate(rows, start=1):
+        previous = finished.get(row_number)
+        if previous is not None and previous["status"] == "ok":
+            yield previous
+        else:
+            pending.append((row_number, row))
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(row_number: int, row: Dict[str, str]) -> Dict[str, Any]:
+        async with semaphore:
+            result = await estimate_row(row_number, row, detector, building_type)
+        try:
+            await asyncio.to_thread(checkpoint.append, result)
+        except OSError:
+            # The row is still returned; only resuming it is lost
+            pass
+        return result
+
+    tasks = [asyncio.ensure_future(bounded(row_number, row)) for row_number, row in pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Stop outstanding rows if the client goes away; finished rows stay checkpointed
+        for task in tasks:
+            task.cancel()
+
+
+def format_ndjson(results: Iterable[Dict[str, Any]]) -> str:
+    """Format result rows as NDJSON lines."""
+    return "".join(json.dumps(result) + "\n" for result in results)
+
+
+def format_csv(results: Iterable[Dict[str, Any]], header: bool = False) -> str:
+    """Format result rows as CSV lines, optionally preceded by the header."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    for result in results:
+        writer.writerow({k: "" if v is None else v for k, v in result.items()})
+    return buffer.getvalue()
+
+
+async def _stream(results: AsyncIterator[Dict[str, Any]], format: str) -> AsyncIterator[str]:
+    """Serialize result rows as they arrive."""
+    if format == "csv":
+        yield format_csv([], header=True)
+    async for result in results:
+        yield format_csv([result]) if format == "csv" else format_ndjson([result])
+
+
+def _media_type(format: str) -> str:
+    """Response media type for an output format."""
+    return "text/csv" if format == "csv" else "application/x-ndjson"
+
+
+@router.post("/estimate")
+async def bulk_estimate(
+    file: UploadFile = File(...),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    detector: Literal["auto", "local", "vision"] = Query("local"),
+    building_type: str = Query("residential"),
+    concurrency: Optional[int] = Query(None, ge=1),
+    run_id: Optional[str] = Query(None),
+    resume: bool = Query(True)
+):
+    """
+    Estimate a portfolio of properties from a CSV upload.
+
+    Each row runs the geocode, satellite, detection, measurement and cost
+    stages. Rows run concurrently within per-provider rate limits, and
+    results stream back as they finish. Every finished row is checkpointed,
+    so re-uploading the same file (or passing the same run_id) resumes
+    where an interrupted run stopped.
+
+    Args:
+        file: CSV with an address column (or latitude/longitude columns)
+        format: "ndjson" or "csv" output
+        detector: Roof detector for all rows
+        building_type: Default building type for rows without one
+        concurrency: Rows in progress at once (capped by the server setting)
+        run_id: Checkpoint id; derived from the file and options when omitted
+        resume: Skip rows already estimated successfully under this run id
+
+    Returns:
+        Streaming NDJSON or CSV of result rows, with the run id in X-Run-Id
+    """
+    content = await file.read()
+    try:
+        rows = read_csv_rows(content.decode("utf-8-sig"))
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+    if len(rows) > settings.bulk_max_rows:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_rows} rows per upload")
+
+    if run_id is None:
+        run_id = make_run_id(content, detector, building_type)
+    elif not _RUN_ID.match(run_id):
+        raise HTTPException(status_code=400, detail="run_id may only contain letters, digits, '-' and '_'")
+
+    results = run_bulk(
+        rows,
+        run_id,
+        concurrency=min(concurrency or settings.bulk_concurrency, settings.bulk_concurrency),
+        detector=detector,
+        building_type=building_type,
+        resume=resume
+    )
+    return StreamingResponse(_stream(results, format), media_type=_media_type(format), headers={"X-Run-Id": run_id})
+
+
+@router.get("/{run_id}")
+async def bulk_results(run_id: str, format: Literal["ndjson", "csv"] = Query("ndjson")):
+    """
+    Get the checkpointed results of a bulk run.
+
+    Args:
+        run_id: Run id returned in X-Run-Id
+        format: "ndjson" or "csv" output
+
+    Returns:
+        Latest result for every finished row, in row order
+    """
+    if not _RUN_ID.match(run_id):
+        raise HTTPException(status_code=404, detail="Bulk run not found")
+    checkpoint = BulkCheckpoint(run_id)
+    if not os.path.exists(checkpoint.path):
+        raise HTTPException(status_code=404, detail="Bulk run not found")
+
+    finished = await asyncio.to_thread(checkpoint.load)
+    results = [finished[row] for row in sorted(finished)]
+    body = format_csv(results, header=True) if format == "csv" else format_ndjson(results)
+    return StreamingResponse(iter([body]), media_type=_media_type(format))
+
+
+@router.get("/limits/stats")
+async def bulk_limit_stats():
+    """
+    Get the bulk provider rate limiter state.
+
+    Returns:
+        Token bucket statistics per provider
+    """
+    return {provider: bucket.stats for provider, bucket in provider_limits.items()}
@@ -0,0 +1,184 @@
+"""Background job endpoints for slow AI work."""
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Literal
+from app.api.v1.endpoints.ai import AIAnalysisRequest, DamageDetectionRequest
+from app.api.v1.endpoints.roof_detection import RoofDetectionRequest, run_detection
+from app.core.jobs import FINISHED, Job, QueueFullError, job_queue
+from app.core.sse import KEEPALIVE, SSE_HEADERS, format_event
+from app.services.ai_service import ai_service
+
+
+router = APIRouter()
+
+Priority = Literal["high", "normal", "low"]
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+async def _run_roof_detection(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler for roof detection."""
+    result = await run_detection(RoofDetectionRequest(**payload))
+    return result.model_dump()
+
+
+async def _run_ai_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler for AI roof analysis."""
+    return await ai_service.analyze_roof_description(**payload)
+
+
+async def _run_damage_detection(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler for damage detection."""
+    return await ai_service.detect_roof_damage(**payload)
+
+
+job_queue.register("roof_detection", _run_roof_detection)
+job_queue.register("ai_analysis", _run_ai_analysis)
+job_queue.register("damage_detection", _run_damage_detection)
+
+
+async def _submit(kind: str, payload: Dict[str, Any], priority: str) -> Dict[str, Any]:
+    """Queue a job, mapping a full queue to 503."""
+    try:
+        job = await job_queue.submit(kind, payload, priority)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+
+@router.post("/roof-detection", status_code=202)
+async def submit_roof_detection(request: RoofDetectionRequest, priority: Priority = Query("normal")):
+    """
+    Queue a roof detection.
+
+    Args:
+        request: Same body as POST /roof/detect
+        priority: Scheduling priority
+
+    Returns:
+        Queued job; poll GET /jobs/{job_id} or subscribe to /jobs/{job_id}/events
+    """
+    return await _submit("roof_detection", request.model_dump(), priority)
+
+
+@router.post("/ai-analysis", status_code=202)
+async def submit_ai_analysis(request: AIAnalysisRequest, priority: Priority = Query("normal")):
+    """
+    Queue an AI roof analysis.
+
+    Args:
+        request: Same body as POST /ai/analyze
+        priority: Scheduling priority
+
+    Returns:
+        Queued job
+    """
+    return await _submit("ai_analysis", request.model_dump(), priority)
+
+
+@router.post("/damage-detection", status_code=202)
+async def submit_damage_detection(request: DamageDetectionRequest, priority: Priority = Query("normal")):
+    """
+    Queue a damage assessment.
+
+    Args:
+        request: Same body as POST /ai/detect-damage
+        priority: Scheduling priority
+
+    Returns:
+        Queued job
+    """
+    return await _submit("damage_detection", request.model_dump(), priority)
+
+
+@router.get("/stats")
+async def job_stats():
+    """
+    Get job counts by status.
+
+    Returns:
+        Queue statistics
+    """
+    return job_queue.stats
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status and, once finished, the result of a job.
+
+    Args:
+        job_id: Id returned on submission
+
+    Returns:
+        Job state
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job.
+
+    Args:
+        job_id: Id returned on submission
+
+    Returns:
+        Job state after cancellation
+    """
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+async def _job_events(job: Job, http_request: Request) -> AsyncIterator[str]:
+    """
+    Yield a server-sent event for every job state change until it finishes.
+
+    The job is held directly rather than looked up by id, so the stream
+    still ends with the final state if the queue prunes the job meanwhile.
+    Each event is built from a snapshot, so a job finishing while the
+    previous event is being sent still gets its final event.
+    """
+    while True:
+        # Snapshot first: the job may change while the event is being sent
+        state = job.to_dict()
+        yield format_event(state["status"], state)
+        if state["status"] in FINISHED:
+            return
+        while job.status == state["status"]:
+            if await http_request.is_disconnected():
+                return
+            if not await job.wait_for_change(SSE_KEEPALIVE_SECONDS):
+                yield KEEPALIVE
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, http_request: Request):
+    """
+    Subscribe to a job's state changes as server-sent events.
+
+    One event is sent per state (queued, running, then succeeded, failed or
+    cancelled); the stream closes after the final state.
+
+    Args:
+        job_id: Id returned on submission
+        http_request: Incoming request, used to stop on disconnect
+
+    Returns:
+        text/event-stream response
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_events(job, http_request),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -1,25 +1,75 @@
 """Roof measurement and cost calculation endpoints."""
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, Iterator, List, Literal, Optional
+import asyncio
+import json
+import numpy as np
+from app.services.geo_scale import feet_per_pixel
+from app.services.roof_model import Facet, roof_model_service
 from app.services.roof_service import roof_service
+from app.services.satellite_cache import satellite_cache
 
 
 router = APIRouter()
 
+# /satellite/image always fetches at Static Maps scale 1
+SATELLITE_MAP_SCALE = 1
+
 
 class Point(BaseModel):
     x: float
     y: float
 
 
-class MeasurementRequest(BaseModel):
+class ScaleReference(BaseModel):
+    """
+    Where the feet-per-pixel scale comes from, in order of precedence:
+    an explicit scale_factor, a cached satellite image, or latitude and zoom.
+    Without any of them the scale defaults to 1.0.
+    """
+    scale_factor: Optional[float] = None  # feet per pixel
+    image_id: Optional[str] = None  # id returned by /satellite/image
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    zoom: int = Field(20, ge=0, le=22)
+    map_scale: Literal[1, 2, 4] = 1  # Static Maps scale parameter; ignored with image_id
+
+
+class MeasurementRequest(ScaleReference):
     points: List[Point]
-    scale_factor: float = 1.0  # feet per pixel
     building_type: str = "residential"
     user_notes: Optional[str] = None
 
 
+class PolygonInput(ScaleReference):
+    points: List[Point]
+    building_type: str = "residential"
+
+
+class BatchMeasurementRequest(BaseModel):
+    polygons: List[PolygonInput]
+
+
+class FacetInput(BaseModel):
+    points: List[Point]
+    holes: List[List[Point]] = []  # chimneys, skylights
+    pitch_degrees: Optional[float] = None  # estimated from total area when omitted
+
+    @model_validator(mode="after")
+    def check_pitch(self):
+        """Reject pitches the slope correction cannot handle."""
+        if self.pitch_degrees is not None and not 0 <= self.pitch_degrees < 90:
+            raise ValueError("pitch_degrees must be at least 0 and below 90")
+        return self
+
+
+class RoofModelRequest(ScaleReference):
+    facets: List[FacetInput]
+    building_type: str = "residential"
+    snap_tolerance: Optional[float] = None  # pixels; server default when omitted
+
+
 class CostEstimateRequest(BaseModel):
     area_sq_ft: float
     pitch_degrees: float
@@ -28,12 +78,73 @@ class CostEstimateRequest(BaseModel):
     labor_cost_per_sqft: Optional[float] = None
 
 
+class BatchCostEstimateRequest(BaseModel):
+    """Columnar inputs; optional columns must match area_sq_ft in length."""
+    area_sq_ft: List[float]
+    pitch_degrees: List[float]
+    has_damage: Optional[List[bool]] = None
+    material_cost_per_sqft: Optional[List[Optional[float]]] = None
+    labor_cost_per_sqft: Optional[List[Optional[float]]] = None
+
+    @model_validator(mode="after")
+    def check_columns(self):
+        """Require equal-length columns and positive areas."""
+        rows = len(self.area_sq_ft)
+        for name in ("pitch_degrees", "has_damage", "material_cost_per_sqft", "labor_cost_per_sqft"):
+            column = getattr(self, name)
+            if column is not None and len(column) != rows:
+                raise ValueError(f"{name} has {len(column)} rows, expected {rows}")
+        if any(area <= 0 for area in self.area_sq_ft):
+            raise ValueError("area_sq_ft values must be positive")
+        return self
+
+
 class MeasurementResponse(BaseModel):
     area_sq_ft: float
     estimated_pitch: float
     pitch_multiplier: float
     perimeter: float
     point_count: int
+    scale_factor: Optional[float] = None  # feet per pixel used
+
+
+class BatchMeasurementResponse(BaseModel):
+    results: List[MeasurementResponse]
+    count: int
+
+
+class FacetMeasurement(BaseModel):
+    index: int
+    plan_area_sq_ft: float
+    area_sq_ft: float
+    pitch_degrees: float
+    pitch_multiplier: float
+
+
+class SharedEdgeMeasurement(BaseModel):
+    facets: List[int]
+    type: str  # ridge, hip or valley
+    plan_length_ft: float
+    length_ft: float
+
+
+class FacetOverlap(BaseModel):
+    facets: List[int]
+    area_sq_ft: float
+
+
+class RoofModelResponse(BaseModel):
+    facets: List[FacetMeasurement]
+    edges: List[SharedEdgeMeasurement]
+    overlaps: List[FacetOverlap]
+    total_plan_area_sq_ft: float
+    total_area_sq_ft: float
+    average_pitch_degrees: float
+    ridge_length_ft: float
+    hip_length_ft: float
+    valley_length_ft: float
+    perimeter_ft: float
+    scale_factor: float
 
 
 class CostEstimateResponse(BaseModel):
@@ -48,21 +159,79 @@ class CostEstimateResponse(BaseModel):
     cost_per_sqft: float
 
 
+async def resolve_scale_factor(reference: ScaleReference) -> float:
+    """
+    Get the feet-per-pixel scale for a measurement.
+
+    Args:
+        reference: Explicit scale, satellite image id, or map latitude and zoom
+
+    Returns:
+        Feet per pixel
+
+    Raises:
+        HTTPException: If the image id is not in the satellite cache
+    """
+    if reference.scale_factor is not None:
+        return reference.scale_factor
+    if reference.image_id:
+        params = await satellite_cache.get_params(reference.image_id)
+        if params is None:
+            raise HTTPException(status_code=404, detail="Satellite image not found in cache")
+        return feet_per_pixel(params.latitude, params.zoom, SATELLITE_MAP_SCALE)
+    if reference.latitude is not None:
+        return feet_per_pixel(reference.latitude, reference.zoom, reference.map_scale)
+    return 1.0
+
+
+async def resolve_scale_factors(references: List[ScaleReference]) -> np.ndarray:
+    """
+    Vectorized resolve_scale_factor for a batch of polygons.
+
+    Args:
+        references: Scale references, one per polygon
+
+    Returns:
+        Feet per pixel for each polygon
+    """
+    image_ids = sorted({r.image_id for r in references if r.scale_factor is None and r.image_id})
+    found = await asyncio.gather(*(satellite_cache.get_params(image_id) for image_id in image_ids))
+    params = dict(zip(image_ids, found))
+    if any(p is None for p in found):
+        raise HTTPException(status_code=404, detail="Satellite image not found in cache")
+
+    latitudes = np.full(len(references), np.nan)
+    zooms = np.array([r.zoom for r in references], dtype=np.float64)
+    map_scales = np.array([r.map_scale for r in references], dtype=np.float64)
+    for i, reference in enumerate(references):
+        if reference.scale_factor is None and reference.image_id:
+            latitudes[i], zooms[i] = params[reference.image_id].latitude, params[reference.image_id].zoom
+            map_scales[i] = SATELLITE_MAP_SCALE
+        elif reference.latitude is not None:
+            latitudes[i] = reference.latitude
+
+    explicit = np.array([np.nan if r.scale_factor is None else r.scale_factor for r in references], dtype=np.float64)
+    derived = feet_per_pixel(np.nan_to_num(latitudes), zooms, map_scales)
+    return np.where(~np.isnan(explicit), explicit, np.where(~np.isnan(latitudes), derived, 1.0))
+
+
 @router.post("/calculate", response_model=MeasurementResponse)
 async def calculate_measurement(request: MeasurementRequest):
     """
     Calculate roof measurements from polygon points.
 
     Args:
-        request: Polygon points and scale factor
+        request: Polygon points and a scale factor, satellite image id, or
+            map latitude and zoom
 
     Returns:
         Roof measurements including area and estimated pitch
     """
+    scale_factor = await resolve_scale_factor(request)
     points_dict = [{"x": p.x, "y": p.y} for p in request.points]
 
     # Calculate area
-    area_sq_ft = roof_service.calculate_polygon_area(points_dict, request.scale_factor)
+    area_sq_ft = roof_service.calculate_polygon_area(points_dict, scale_factor)
 
     # Estimate pitch
     pitch_degrees = roof_service.estimate_roof_pitch(area_sq_ft, request.building_type)
@@ -76,17 +245,57 @@ async def calculate_measurement(request: MeasurementRequest):
         p1 = request.points[i]
         p2 = request.points[(i + 1) % len(request.points)]
         distance = ((p2.x - p1.x) ** 2 + (p2.y - p1.y) ** 2) ** 0.5
-        perimeter += distance * request.scale_factor
+        perimeter += distance * scale_factor
 
     return MeasurementResponse(
         area_sq_ft=area_sq_ft,
         estimated_pitch=pitch_degrees,
         pitch_multiplier=pitch_multiplier,
         perimeter=round(perimeter, 2),
-        point_count=len(request.points)
+        point_count=len(request.points),
+        scale_factor=scale_factor
     )
 
 
+@router.post("/calculate-batch", response_model=BatchMeasurementResponse)
+async def calculate_measurements_batch(request: BatchMeasurementRequest):
+    """
+    Calculate roof measurements for many polygons in one request.
+
+    Area, perimeter, pitch and pitch multiplier are computed with
+    vectorized NumPy operations across all polygons at once.
+
+    Args:
+        request: List of polygons, each with points, scale factor and building type
+
+    Returns:
+        Measurements for each polygon, in request order
+    """
+    polygons = [np.array([(p.x, p.y) for p in polygon.points], dtype=np.float64) for polygon in request.polygons]
+    scale_factors = await resolve_scale_factors(request.polygons)
+    is_commercial = np.array([polygon.building_type == "commercial" for polygon in request.polygons], dtype=bool)
+
+    areas, perimeters = roof_service.calculate_polygon_metrics_batch(polygons, scale_factors)
+    pitches = roof_service.estimate_roof_pitch_batch(areas, is_commercial)
+    multipliers = roof_service.calculate_pitch_multiplier_batch(pitches)
+
+    results = [
+        MeasurementResponse(
+            area_sq_ft=area,
+            estimated_pitch=pitch,
+            pitch_multiplier=multiplier,
+            perimeter=perimeter,
+            point_count=len(polygon),
+            scale_factor=scale
+        )
+        for area, pitch, multiplier, perimeter, polygon, scale in zip(
+            areas.tolist(), pitches.tolist(), multipliers.tolist(), perimeters.tolist(), polygons,
+            scale_factors.tolist()
+        )
+    ]
+    return BatchMeasurementResponse(results=results, count=len(results))
+
+
 @router.post("/estimate-cost", response_model=CostEstimateResponse)
 async def estimate_cost(request: CostEstimateRequest):
     """
@@ -109,6 +318,90 @@ async def estimate_cost(request: CostEstimateRequest):
     return CostEstimateResponse(**estimate)
 
 
+@router.post("/calculate-facets", response_model=RoofModelResponse)
+async def calculate_facets(request: RoofModelRequest):
+    """
+    Measure a roof drawn as several facets, each with its own pitch.
+
+    Areas are slope-corrected per facet. Edges shared by two facets are
+    classified as ridges, hips or valleys, and overlapping facets are reported.
+
+    Args:
+        request: Facets with optional holes and pitches, and a scale reference
+
+    Returns:
+        Per-facet measurements, shared edges, overlaps and roof totals
+    """
+    facets = [
+        Facet(
+            exterior=[(p.x, p.y) for p in facet.points],
+            holes=[[(p.x, p.y) for p in hole] for hole in facet.holes],
+            pitch_degrees=facet.pitch_degrees
+        )
+        for facet in request.facets
+    ]
+    scale_factor = await resolve_scale_factor(request)
+    result = roof_model_service.analyze(
+        facets,
+        scale_factor=scale_factor,
+        building_type=request.building_type,
+        snap_tolerance=request.snap_tolerance
+    )
+    return {**result, "scale_factor": scale_factor}
+
+
+def _optional_column(values: Optional[List[Optional[float]]]) -> Optional[np.ndarray]:
+    """Convert a column with missing values to floats with NaN for None."""
+    if values is None:
+        return None
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _iter_ndjson(columns: Dict[str, List[Any]], rows: int, chunk_rows: int = 1000) -> Iterator[str]:
+    """Yield one JSON object per row, batched into chunks."""
+    names = list(columns)
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        yield "".join(
+            json.dumps({name: columns[name][i] for name in names}) + "\n"
+            for i in range(start, stop)
+        )
+
+
+@router.post("/estimate-cost-batch")
+async def estimate_cost_batch(
+    request: BatchCostEstimateRequest,
+    format: Literal["columnar", "ndjson"] = Query("columnar", description="Response layout")
+):
+    """
+    Calculate cost estimates for many roofs at once.
+
+    Results match /estimate-cost row for row.
+
+    Args:
+        request: Columnar areas, pitches, damage flags and optional per-row pricing
+        format: "columnar" for one JSON object of arrays, "ndjson" for a
+            streamed JSON object per row
+
+    Returns:
+        Cost breakdown for every row
+    """
+    estimate = roof_service.calculate_total_estimate_batch(
+        area_sq_ft=np.array(request.area_sq_ft, dtype=np.float64),
+        pitch_degrees=np.array(request.pitch_degrees, dtype=np.float64),
+        has_damage=None if request.has_damage is None else np.array(request.has_damage, dtype=bool),
+        material_cost_per_sqft=_optional_column(request.material_cost_per_sqft),
+        labor_cost_per_sqft=_optional_column(request.labor_cost_per_sqft)
+    )
+    columns = {name: values.tolist() for name, values in estimate.items()}
+    rows = len(request.area_sq_ft)
+
+    if format == "ndjson":
+        return StreamingResponse(_iter_ndjson(columns, rows), media_type="application/x-ndjson")
+
+    return {"count": rows, "columns": columns}
+
+
 @router.get("/pricing-defaults")
 async def get_pricing_defaults():
     """
@@ -0,0 +1,217 @@
+"""One-shot estimate pipeline: geocode, satellite, detect, measure, price and analyze."""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+import asyncio
+import base64
+from app.api.v1.endpoints.address import AddressRequest, geocode_address
+from app.api.v1.endpoints.measurement import MeasurementRequest, Point, calculate_measurement
+from app.api.v1.endpoints.roof_detection import RoofDetectionRequest, run_detection
+from app.api.v1.endpoints.satellite import SatelliteImageError, SatelliteImageParams, load_satellite_image
+from app.core.config import settings
+from app.core.sse import SSE_HEADERS, format_event
+from app.services.ai_service import ai_service
+from app.services.roof_service import roof_service
+
+
+router = APIRouter()
+
+
+class PipelineRequest(BaseModel):
+    address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)  # skip geocoding when both coordinates are given
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    zoom: int = Field(20, ge=0, le=22)
+    image_width: int = 800
+    image_height: int = 600
+    detector: Literal["auto", "local", "vision"] = "auto"
+    building_type: str = "residential"
+    has_damage: bool = False
+    material_cost_per_sqft: Optional[float] = None
+    labor_cost_per_sqft: Optional[float] = None
+    include_analysis: bool = True
+    user_notes: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_location(self):
+        """Require an address or both coordinates."""
+        if not self.address and (self.latitude is None or self.longitude is None):
+            raise ValueError("Either address or latitude and longitude are required")
+        return self
+
+
+class PipelineError(Exception):
+    """Raised when a stage fails and later stages cannot run."""
+
+    def __init__(self, stage: str, message: str):
+        """
+        Initialize the error.
+
+        Args:
+            stage: Name of the failed stage
+            message: Error description
+        """
+        super().__init__(message)
+        self.stage = stage
+
+
+def _event(stage: str, data: Any) -> Dict[str, Any]:
+    """Build a stage result event."""
+    return {"stage": stage, "data": data}
+
+
+async def _geocode(request: PipelineRequest) -> Dict[str, Any]:
+    """Resolve the request's coordinates, geocoding the address if needed."""
+    if request.latitude is not None and request.longitude is not None:
+        return {
+            "address": request.address,
+            "formatted_address": request.address,
+            "latitude": request.latitude,
+            "longitude": request.longitude,
+            "success": True
+        }
+    try:
+        result = await geocode_address(AddressRequest(address=request.address))
+    except HTTPException as e:
+        raise PipelineError("geocode", e.detail)
+    if not result.success:
+        raise PipelineError("geocode", result.error)
+    return result.model_dump()
+
+
+async def _calculate_cost(request: PipelineRequest, measurement: Dict[str, Any]) -> Dict[str, Any]:
+    """Price the measured roof."""
+    return roof_service.calculate_total_estimate(
+        area_sq_ft=measurement["area_sq_ft"],
+        pitch_degrees=measurement["estimated_pitch"],
+        has_damage=request.has_damage,
+        material_cost_per_sqft=request.material_cost_per_sqft,
+        labor_cost_per_sqft=request.labor_cost_per_sqft
+    )
+
+
+async def run_pipeline(request: PipelineRequest) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the estimate stages server-side, yielding each stage's result as it completes.
+
+    Stages that only depend on the measured area (cost and AI analysis) run
+    concurrently.
+
+    Args:
+        request: Location, imagery, detection and pricing options
+
+    Yields:
+        {"stage": name, "data": result} for geocode, satellite, detection,
+        measurement, cost and analysis, then {"stage": "error", ...} if a
+        stage fails
+    """
+    stage = "geocode"
+    try:
+        location = await _geocode(request)
+        yield _event("geocode", location)
+
+        stage = "satellite"
+        satellite_request = SatelliteImageParams(
+            latitude=location["latitude"],
+            longitude=location["longitude"],
+            zoom=request.zoom,
+            width=request.image_width,
+            height=request.image_height
+        )
+        if not settings.has_google_maps_key:
+            raise PipelineError("satellite", "Google Maps API key not configured")
+        try:
+            image, data = await load_satellite_image(satellite_request)
+        except SatelliteImageError as e:
+            raise PipelineError("satellite", str(e))
+        image_id = image.digest if settings.satellite_cache_enabled else None
+        yield _event("satellite", {"image_id": image_id, "content_type": image.content_type, "size": image.size})
+
+        stage = "detection"
+        detection_request = RoofDetectionRequest(
+            latitude=location["latitude"],
+            longitude=location["longitude"],
+            image_width=request.image_width,
+            image_height=request.image_height,
+            detector=request.detector,
+            **(
+                {"image_id": image_id} if image_id is not None
+                else {"image_base64": base64.b64encode(data).decode("utf-8")}
+            )
+        )
+        detection = await run_detection(detection_request)
+        yield _event("detection", detection.model_dump())
+        if not detection.success:
+            raise PipelineError("detection", detection.error or "Could not detect roof outline")
+
+        stage = "measurement"
+        measurement = await calculate_measurement(MeasurementRequest(
+            points=[Point(x=p.x, y=p.y) for p in detection.points],
+            latitude=location["latitude"],
+            zoom=request.zoom,
+            building_type=request.building_type
+        ))
+        measurement = measurement.model_dump()
+        yield _event("measurement", measurement)
+
+        # Cost and AI analysis both only need the measured area
+        stage = "cost"
+        stages = {asyncio.ensure_future(_calculate_cost(request, measurement)): "cost"}
+        if request.include_analysis:
+            analysis = ai_service.analyze_roof_description(
+                address=location["formatted_address"] or f"{location['latitude']}, {location['longitude']}",
+                area_sq_ft=measurement["area_sq_ft"],
+                pitch_degrees=measurement["estimated_pitch"],
+                user_notes=request.user_notes
+            )
+            stages[asyncio.ensure_future(analysis)] = "analysis"
+        try:
+            pending = set(stages)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = stages[task]
+                    yield _event(stages[task], task.result())
+        finally:
+            for task in stages:
+                task.cancel()
+
+    except PipelineError as e:
+        yield _event("error", {"stage": e.stage, "error": str(e)})
+    except Exception as e:
+        yield _event("error", {"stage": stage, "error": f"{stage.capitalize()} failed: {str(e)}"})
+
+
+async def _pipeline_events(request: PipelineRequest) -> AsyncIterator[str]:
+    """Format pipeline stage results as server-sent events."""
+    async for event in run_pipeline(request):
+        yield format_event(event["stage"], event["data"])
+    yield format_event("done", {})
+
+
+@router.post("/estimate")
+async def estimate_pipeline(request: PipelineRequest, stream: bool = Query(True)):
+    """
+    Produce a complete estimate for an address in one request.
+
+    Runs geocode, satellite imagery, roof detection, measurement, cost
+    estimate and AI analysis server-side. Cost and analysis run concurrently
+    once the area is known.
+
+    Args:
+        request: Address (or coordinates) and estimate options
+        stream: Send each stage as a server-sent event as soon as it
+            completes; otherwise return all results as one JSON object
+
+    Returns:
+        text/event-stream of stage events, or {stage: result}
+    """
+    if stream:
+        return StreamingResponse(_pipeline_events(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    results: Dict[str, Any] = {}
+    async for event in run_pipeline(request):
+        results[event["stage"]] = event["data"]
+    results["success"] = "error" not in results
+    return results
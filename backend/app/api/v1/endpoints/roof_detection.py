@@ -1,21 +1,41 @@
 """AI-powered roof detection endpoint using OpenAI Vision."""
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, model_validator
+from typing import List, Dict, Literal, Optional, Tuple
+import asyncio
 import json
-from openai import OpenAI
 from app.core.config import settings
+from app.core.disconnect import cancel_on_disconnect
+from app.core.governor import ProviderUnavailableError
+from app.core.metrics import timed
+from app.core.tracing import span
+from app.services.ai_service import ai_service
+from app.services.detection_cache import detection_cache, image_fingerprint
+from app.services.image_preprocessing import decode_data_url, passthrough_image, preprocess_for_vision
+from app.services.roof_detector import local_roof_detector
+from app.services.satellite_cache import satellite_cache
 
 
 router = APIRouter()
 
 
 class RoofDetectionRequest(BaseModel):
-    image_base64: str
+    image_base64: Optional[str] = None
+    image_id: Optional[str] = None  # id returned by /satellite/image
     latitude: float
     longitude: float
     image_width: int = 800
     image_height: int = 600
+    # auto: local detector first, Vision API only when local confidence is low
+    detector: Literal["auto", "local", "vision"] = "auto"
+    bypass_cache: bool = False  # force a fresh detection (the result is still cached)
+
+    @model_validator(mode="after")
+    def check_image_source(self):
+        """Require either an inline image or a server-side image id."""
+        if not self.image_base64 and not self.image_id:
+            raise ValueError("Either image_base64 or image_id is required")
+        return self
 
 
 class Point(BaseModel):
@@ -28,22 +48,165 @@ class RoofDetectionResponse(BaseModel):
     points: List[Point] = []
     confidence: float = 0.0
     roof_type: str = "unknown"
-    error: str = None
-    message: str = None
+    error: Optional[str] = None
+    message: Optional[str] = None
+    source: Optional[str] = None  # "local" or "vision"
 
 
-@router.post("/detect", response_model=RoofDetectionResponse)
-async def detect_roof(request: RoofDetectionRequest):
+async def resolve_image_bytes(request: RoofDetectionRequest) -> Optional[bytes]:
     """
-    Use OpenAI Vision API to automatically detect roof outline from satellite image.
+    Get the raw bytes of the image to analyze.
 
     Args:
-        request: Satellite image (base64) and coordinates
+        request: Detection request with inline image or image id
 
     Returns:
-        Detected roof polygon points that can be drawn on canvas
+        Image bytes, or None if the image id is not cached
+    """
+    if not request.image_id:
+        with span("base64_decode"):
+            return decode_data_url(request.image_base64)
+
+    image = await satellite_cache.get_by_digest(request.image_id)
+    if image is None:
+        return None
+    with span("satellite_cache_read"), satellite_cache.open(image) as image_bytes:
+        return bytes(image_bytes)
+
+
+def _local_response(result: Dict) -> RoofDetectionResponse:
+    """Build a response from a local detector result."""
+    points = [Point(x=x, y=y) for x, y in result["points"]]
+    message = f"Detected {result['roof_type']} with {len(points)} corners"
+    if result["confidence"] < settings.local_detector_min_confidence:
+        message += " (low confidence, please verify)"
+    return RoofDetectionResponse(
+        success=True,
+        points=points,
+        confidence=result["confidence"],
+        roof_type=result["roof_type"],
+        message=message,
+        source="local"
+    )
+
+
+def detection_scope(request: RoofDetectionRequest) -> Tuple:
+    """
+    Cache scope of a detection: the view's location, dimensions and detector.
+
+    Including the rounded coordinates keeps perceptual matches to
+    re-encodings of the same view, never a similar-looking neighbouring roof.
+
+    Args:
+        request: Detection request
+
+    Returns:
+        Hashable scope for the detection cache
+    """
+    precision = settings.satellite_cache_precision
+    return (
+        round(request.latitude, precision),
+        round(request.longitude, precision),
+        request.image_width,
+        request.image_height,
+        request.detector
+    )
+
+
+@timed
+async def run_detection(request: RoofDetectionRequest) -> RoofDetectionResponse:
+    """
+    Detect the roof outline, trying the local detector before the Vision API.
+
+    Args:
+        request: Satellite image (base64 or cached image id) and coordinates
+
+    Returns:
+        Detected roof polygon points, or an error response
+    """
+    use_local = settings.local_detector_enabled and request.detector != "vision"
+    use_vision = request.detector != "local"
+
+    if not use_local and not ai_service.is_configured():
+        return RoofDetectionResponse(
+            success=False,
+            error="OpenAI API key not configured",
+            message="Configure OpenAI API key to enable AI roof detection"
+        )
+
+    try:
+        image_bytes = await resolve_image_bytes(request)
+        if image_bytes is None:
+            return RoofDetectionResponse(
+                success=False,
+                error="Image not found",
+                message="Satellite image is no longer cached. Please reload the satellite image."
+            )
+
+        fingerprint = None
+        scope = detection_scope(request)
+        if settings.detection_cache_enabled:
+            with span("image_fingerprint"):
+                fingerprint = await asyncio.to_thread(image_fingerprint, image_bytes)
+            if not request.bypass_cache:
+                cached = detection_cache.get(fingerprint, scope)
+                if cached is not None:
+                    return RoofDetectionResponse(**cached)
+
+        result = await _detect(request, image_bytes, use_local, use_vision)
+
+        # Don't keep a local fallback served only because OpenAI is unavailable
+        degraded = use_vision and ai_service.is_configured() and not ai_service.is_available()
+        if fingerprint is not None and result.success and not degraded:
+            detection_cache.set(fingerprint, scope, result.model_dump())
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return RoofDetectionResponse(
+            success=False,
+            error=f"AI detection failed: {str(e)}",
+            message="Please draw roof outline manually"
+        )
+
+
+async def _detect(
+    request: RoofDetectionRequest,
+    image_bytes: bytes,
+    use_local: bool,
+    use_vision: bool
+) -> RoofDetectionResponse:
+    """
+    Run the local detector and, if needed, the Vision API.
+
+    While OpenAI's circuit is open the local outline is used even when its
+    confidence is below the threshold.
+
+    Args:
+        request: Detection request with coordinates and image dimensions
+        image_bytes: Raw satellite image bytes
+        use_local: Whether to try the local detector
+        use_vision: Whether the Vision API may be called
+
+    Returns:
+        Detected roof polygon points, or an error response
     """
-    if not settings.has_openai_key:
+    if use_local:
+        local = await local_roof_detector.detect(image_bytes, request.image_width, request.image_height)
+        confident = local["confidence"] >= settings.local_detector_min_confidence
+        vision_ready = ai_service.is_configured() and ai_service.is_available()
+        if len(local["points"]) >= 3 and (not use_vision or confident or not vision_ready):
+            return _local_response(local)
+
+    if not use_vision:
+        return RoofDetectionResponse(
+            success=False,
+            error="Could not detect roof outline",
+            message="Local detection could not identify a clear roof structure. Please draw manually."
+        )
+
+    if not ai_service.is_configured():
         return RoofDetectionResponse(
             success=False,
             error="OpenAI API key not configured",
@@ -51,12 +214,37 @@ async def detect_roof(request: RoofDetectionRequest):
         )
 
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
+        return await _detect_with_vision(request, image_bytes)
+    except ProviderUnavailableError:
+        # Serve the low-confidence local outline rather than nothing while OpenAI is down
+        if use_local and len(local["points"]) >= 3:
+            return _local_response(local)
+        raise
+
+
+async def _detect_with_vision(request: RoofDetectionRequest, image_bytes: bytes) -> RoofDetectionResponse:
+    """
+    Use OpenAI Vision API to detect the roof outline.
+
+    Args:
+        request: Detection request with coordinates and image dimensions
+        image_bytes: Raw satellite image bytes
+
+    Returns:
+        Detected roof polygon points
+    """
+    # Shrink the image before the Vision call; points are mapped back afterwards
+    if settings.vision_preprocess_enabled:
+        prepared = await asyncio.to_thread(
+            preprocess_for_vision, image_bytes, request.image_width, request.image_height
+        )
+    else:
+        prepared = passthrough_image(image_bytes, request.image_width, request.image_height)
 
-        # Prepare prompt for Vision API
-        prompt = f"""Analyze this satellite/aerial image of a property and detect the main roof structure.
+    # Prepare prompt for Vision API
+    prompt = f"""Analyze this satellite/aerial image of a property and detect the main roof structure.
 
-Image dimensions: {request.image_width}x{request.image_height} pixels
+Image dimensions: {prepared.width}x{prepared.height} pixels
 Location: {request.latitude}, {request.longitude}
 
 Your task:
@@ -83,52 +271,82 @@ Guidelines:
 - roof_type can be: "rectangular", "L-shaped", "complex", "hip", "gable"
 - confidence: 0-1 score of detection certainty"""
 
-        # Call OpenAI Vision API
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": request.image_base64,
-                                "detail": "high"
-                            }
+    # Call OpenAI Vision API
+    response = await ai_service.create_chat_completion(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": prepared.data_url,
+                            "detail": settings.vision_detail
                         }
-                    ]
-                }
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=500
-        )
+                    }
+                ]
+            }
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=500
+    )
 
-        # Parse response
+    # Parse response
+    with span("json_parse"):
         result = json.loads(response.choices[0].message.content)
 
-        # Convert to Point objects
-        points = [Point(**p) for p in result.get("points", [])]
-
-        if len(points) < 3:
-            return RoofDetectionResponse(
-                success=False,
-                error="Could not detect roof outline",
-                message="AI could not identify a clear roof structure. Please draw manually."
-            )
-
-        return RoofDetectionResponse(
-            success=True,
-            points=points,
-            confidence=result.get("confidence", 0.0),
-            roof_type=result.get("roof_type", "unknown"),
-            message=f"Detected {result.get('roof_type', 'roof')} with {len(points)} corners"
-        )
+    # Convert to Point objects in the client's image coordinates
+    points = []
+    for p in result.get("points", []):
+        x, y = prepared.map_point(p["x"], p["y"])
+        points.append(Point(x=x, y=y))
 
-    except Exception as e:
+    if len(points) < 3:
         return RoofDetectionResponse(
             success=False,
-            error=f"AI detection failed: {str(e)}",
-            message="Please draw roof outline manually"
+            error="Could not detect roof outline",
+            message="AI could not identify a clear roof structure. Please draw manually."
         )
+
+    return RoofDetectionResponse(
+        success=True,
+        points=points,
+        confidence=result.get("confidence", 0.0),
+        roof_type=result.get("roof_type", "unknown"),
+        message=f"Detected {result.get('roof_type', 'roof')} with {len(points)} corners",
+        source="vision"
+    )
+
+
+@router.post("/detect", response_model=RoofDetectionResponse)
+async def detect_roof(request: RoofDetectionRequest, http_request: Request):
+    """
+    Automatically detect roof outline from satellite image.
+
+    A fast local detector runs first; the OpenAI Vision API is only called
+    when its confidence is low (or when requested explicitly).
+
+    Args:
+        request: Satellite image (base64 or cached image id) and coordinates
+        http_request: Raw request, used to cancel the model call on disconnect
+
+    Returns:
+        Detected roof polygon points that can be drawn on canvas
+    """
+    return await cancel_on_disconnect(http_request, run_detection(request))
+
+
+@router.get("/cache-stats")
+async def detection_cache_stats():
+    """
+    Get detection result cache hit/miss counters.
+
+    Returns:
+        Exact and perceptual hit statistics
+    """
+    return {
+        "enabled": settings.detection_cache_enabled,
+        **detection_cache.stats
+    }
@@ -1,15 +1,26 @@
 """Satellite imagery endpoint."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Iterator, Optional, Tuple
 import base64
+import hashlib
 import httpx
 from app.core.config import settings
+from app.core.governor import ProviderUnavailableError
+from app.core.http_client import http_client
+from app.core.metrics import timed
+from app.core.tracing import span
+from app.services.geo_scale import feet_per_pixel
+from app.services.satellite_cache import CachedImage, satellite_cache
 
 
 router = APIRouter()
 
+STREAM_CHUNK_SIZE = 64 * 1024
 
-class SatelliteRequest(BaseModel):
+
+class SatelliteImageParams(BaseModel):
     latitude: float
     longitude: float
     zoom: int = 20
@@ -17,13 +28,140 @@ class SatelliteRequest(BaseModel):
     height: int = 600
 
 
+class SatelliteRequest(SatelliteImageParams):
+    include_base64: bool = True
+
+
 class SatelliteResponse(BaseModel):
     image_url: str
-    image_base64: str = None
+    image_base64: Optional[str] = None
+    image_id: Optional[str] = None
+    feet_per_pixel: Optional[float] = None
     success: bool
     error: str = None
 
 
+class SatelliteImageError(Exception):
+    """Raised when the satellite image cannot be obtained from the provider."""
+
+
+def build_static_map_url(request: SatelliteImageParams) -> str:
+    """
+    Build the Google Maps Static API URL for a request.
+
+    Args:
+        request: Latitude, longitude, and image dimensions
+
+    Returns:
+        Static map image URL
+    """
+    # Build Google Maps Static API URL
+    api_key = settings.google_maps_api_key
+    base_url = f"{settings.google_maps_base_url}/maps/api/staticmap"
+
+    params = {
+        "center": f"{request.latitude},{request.longitude}",
+        "zoom": request.zoom,
+        "size": f"{request.width}x{request.height}",
+        "maptype": "satellite",
+        "key": api_key
+    }
+
+    return f"{base_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
+
+
+@timed
+async def load_satellite_image(request: SatelliteImageParams) -> Tuple[CachedImage, Optional[bytes]]:
+    """
+    Get a satellite image from the cache, fetching and caching it on a miss.
+
+    Args:
+        request: Latitude, longitude, and image dimensions
+
+    Returns:
+        Image metadata and, when freshly downloaded, its bytes (None when the
+        bytes should be read from the cache)
+
+    Raises:
+        SatelliteImageError: If the provider rejects or fails the request
+    """
+    cache_key = satellite_cache.make_key(
+        request.latitude, request.longitude, request.zoom, request.width, request.height
+    )
+    if settings.satellite_cache_enabled:
+        cached = await satellite_cache.get(cache_key)
+        if cached is not None:
+            return cached, None
+
+    # Fetch the image
+    try:
+        response = await http_client.get(build_static_map_url(request), timeout=30.0)
+
+        if response.status_code == 403:
+            # API key issue - return helpful error
+            raise SatelliteImageError(
+                "Google Maps Static API is not enabled. Please enable it in Google Cloud Console: https://console.cloud.google.com/apis/library/static-maps-backend.googleapis.com"
+            )
+
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise SatelliteImageError(
+            f"Google Maps API error: {e.response.status_code}. Check API key and billing settings."
+        )
+
+    if not response.content:
+        raise SatelliteImageError("Google Maps returned an empty image")
+
+    content_type = response.headers.get("content-type", "image/png")
+    if settings.satellite_cache_enabled:
+        image = await satellite_cache.put(cache_key, response.content, content_type)
+    else:
+        image = CachedImage(hashlib.sha256(response.content).hexdigest(), content_type, len(response.content))
+    return image, response.content
+
+
+def _iter_cached_image(image: CachedImage) -> Iterator[bytes]:
+    """Yield a cached image in chunks from its memory map."""
+    with satellite_cache.open(image) as image_bytes:
+        for offset in range(0, len(image_bytes), STREAM_CHUNK_SIZE):
+            yield image_bytes[offset:offset + STREAM_CHUNK_SIZE]
+
+
+def _etag_matches(http_request: Request, etag: str) -> bool:
+    """Check an If-None-Match header against an entity tag."""
+    header = http_request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _image_response(http_request: Request, image: CachedImage, data: Optional[bytes], cache_control: str) -> Response:
+    """
+    Serve raw image bytes with validators, answering 304 when the client copy is current.
+
+    Args:
+        http_request: Incoming request carrying conditional headers
+        image: Image metadata
+        data: Image bytes if already in memory, otherwise streamed from the cache
+        cache_control: Cache-Control header value
+
+    Returns:
+        304, in-memory or streaming response
+    """
+    etag = f'"{image.digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if _etag_matches(http_request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if data is not None:
+        return Response(content=data, media_type=image.content_type, headers=headers)
+
+    headers["Content-Length"] = str(image.size)
+    return StreamingResponse(_iter_cached_image(image), media_type=image.content_type, headers=headers)
+
+
 @router.post("/image", response_model=SatelliteResponse)
 async def fetch_satellite_image(request: SatelliteRequest):
     """
@@ -33,7 +171,8 @@ async def fetch_satellite_image(request: SatelliteRequest):
         request: Latitude, longitude, and image dimensions
 
     Returns:
-        Satellite image URL or base64 encoded image
+        Satellite image URL, image id for the binary endpoints, ground
+        scale, and optionally the base64 encoded image
     """
     if not settings.has_google_maps_key:
         return SatelliteResponse(
@@ -43,48 +182,32 @@ async def fetch_satellite_image(request: SatelliteRequest):
         )
 
     try:
-        # Build Google Maps Static API URL
-        api_key = settings.google_maps_api_key
-        base_url = "https://maps.googleapis.com/maps/api/staticmap"
-
-        params = {
-            "center": f"{request.latitude},{request.longitude}",
-            "zoom": request.zoom,
-            "size": f"{request.width}x{request.height}",
-            "maptype": "satellite",
-            "key": api_key
-        }
-
-        image_url = f"{base_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
-
-        # Fetch the image
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(image_url)
-
-            if response.status_code == 403:
-                # API key issue - return helpful error
-                return SatelliteResponse(
-                    image_url="",
-                    success=False,
-                    error="Google Maps Static API is not enabled. Please enable it in Google Cloud Console: https://console.cloud.google.com/apis/library/static-maps-backend.googleapis.com"
-                )
-
-            response.raise_for_status()
+        image, data = await load_satellite_image(request)
 
+        image_base64 = None
+        if request.include_base64:
             # Encode as base64 for embedding
-            image_base64 = base64.b64encode(response.content).decode('utf-8')
+            with span("base64_encode"):
+                if data is not None:
+                    image_base64 = base64.b64encode(data).decode('utf-8')
+                else:
+                    with satellite_cache.open(image) as image_bytes:
+                        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
 
         return SatelliteResponse(
-            image_url=image_url,
+            image_url=build_static_map_url(request),
             image_base64=image_base64,
+            # Without the cache nothing can resolve the id later
+            image_id=image.digest if settings.satellite_cache_enabled else None,
+            feet_per_pixel=feet_per_pixel(request.latitude, request.zoom),
             success=True
         )
 
-    except httpx.HTTPStatusError as e:
+    except SatelliteImageError as e:
         return SatelliteResponse(
             image_url="",
             success=False,
-            error=f"Google Maps API error: {e.response.status_code}. Check API key and billing settings."
+            error=str(e)
         )
     except Exception as e:
         return SatelliteResponse(
@@ -92,3 +215,67 @@ async def fetch_satellite_image(request: SatelliteRequest):
             success=False,
             error=f"Failed to fetch satellite image: {str(e)}"
         )
+
+
+@router.get("/raw")
+async def fetch_satellite_image_raw(http_request: Request, request: SatelliteImageParams = Depends()):
+    """
+    Fetch satellite imagery as a raw image body instead of base64 JSON.
+
+    Supports conditional GET via If-None-Match.
+
+    Args:
+        http_request: Incoming request carrying conditional headers
+        request: Latitude, longitude, and image dimensions as query parameters
+
+    Returns:
+        Image bytes (image/png or image/jpeg) with ETag and Cache-Control
+    """
+    if not settings.has_google_maps_key:
+        raise HTTPException(status_code=503, detail="Google Maps API key not configured")
+
+    try:
+        image, data = await load_satellite_image(request)
+    except SatelliteImageError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to fetch satellite image: {str(e)}")
+
+    return _image_response(http_request, image, data, "private, max-age=86400")
+
+
+@router.get("/image/{image_id}")
+async def get_satellite_image(image_id: str, http_request: Request):
+    """
+    Serve a previously fetched satellite image by its id.
+
+    Images are content-addressed, so responses are immutable.
+
+    Args:
+        image_id: Image id returned by POST /image
+        http_request: Incoming request carrying conditional headers
+
+    Returns:
+        Image bytes with ETag and Cache-Control
+    """
+    image = await satellite_cache.get_by_digest(image_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found in cache")
+
+    return _image_response(http_request, image, None, "private, max-age=31536000, immutable")
+
+
+@router.get("/cache-stats")
+async def satellite_cache_stats():
+    """
+    Get satellite image cache hit/miss counters.
+
+    Returns:
+        Disk cache statistics
+    """
+    return {
+        "enabled": settings.satellite_cache_enabled,
+        **satellite_cache.stats
+    }
@@ -0,0 +1,94 @@
+"""
+Estimate a portfolio CSV from the command line.
+
+Usage:
+    python -m app.cli.bulk_estimate properties.csv -o estimates.ndjson
+
+Runs the same stages, rate limits and checkpoints as POST /api/v1/bulk/estimate.
+Re-running an interrupted command resumes from the checkpoint.
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import os
+import sys
+from app.api.v1.endpoints.bulk import format_csv, format_ndjson, make_run_id, read_csv_rows, run_bulk
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.services.ai_service import ai_service
+from app.services.roof_detector import local_roof_detector
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Estimate every property in a CSV file.")
+    parser.add_argument("input", help="CSV with an address column (or latitude/longitude columns)")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Output format (default: from the output extension, else ndjson)")
+    parser.add_argument("--concurrency", type=int, default=settings.bulk_concurrency, help="Rows in progress at once")
+    parser.add_argument("--detector", choices=["auto", "local", "vision"], default="local", help="Roof detector")
+    parser.add_argument("--building-type", default="residential", help="Default building type")
+    parser.add_argument("--run-id", help="Checkpoint id (default: derived from the file and options)")
+    parser.add_argument("--no-resume", action="store_true", help="Re-estimate rows already in the checkpoint")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    """
+    Run a bulk estimate and write the results.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Process exit code (1 if any row failed)
+    """
+    with open(args.input, "rb") as f:
+        content = f.read()
+    rows = read_csv_rows(content.decode("utf-8-sig"))
+    run_id = args.run_id or make_run_id(content, args.detector, args.building_type)
+    format = args.format or ("csv" if args.output and args.output.endswith(".csv") else "ndjson")
+    print(f"Run {run_id}: {len(rows)} rows", file=sys.stderr)
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    await http_client.start()
+    done = failed = 0
+    try:
+        if format == "csv":
+            output.write(format_csv([], header=True))
+        results = run_bulk(
+            rows,
+            run_id,
+            concurrency=args.concurrency,
+            detector=args.detector,
+            building_type=args.building_type,
+            resume=not args.no_resume
+        )
+        async for result in results:
+            output.write(format_csv([result]) if format == "csv" else format_ndjson([result]))
+            output.flush()
+            done += 1
+            if result["status"] != "ok":
+                failed += 1
+            print(f"\r{done}/{len(rows)} rows, {failed} failed", end="", file=sys.stderr)
+    finally:
+        print(file=sys.stderr)
+        if output is not sys.stdout:
+            output.close()
+        await http_client.close()
+        await ai_service.close()
+        local_roof_detector.shutdown()
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    args = parse_args(argv)
+    if not os.path.exists(args.input):
+        print(f"Input file not found: {args.input}", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
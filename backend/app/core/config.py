@@ -1,6 +1,6 @@
 """Application configuration using Pydantic settings."""
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -14,8 +14,26 @@ class Settings(BaseSettings):
     # API Keys
     google_maps_api_key: str = ""
     google_geocoding_api_key: str = ""
+    google_maps_base_url: str = "https://maps.googleapis.com"  # override to point at a stand-in server
     openai_api_key: str = ""
+    openai_base_url: Optional[str] = None  # default: the OpenAI API
     openai_model: str = "gpt-4o-mini"
+    openai_max_concurrency: int = 8
+    openai_timeout: float = 60.0
+    openai_max_retries: int = 2
+
+    # Vision Image Preprocessing
+    vision_preprocess_enabled: bool = True
+    vision_detail: str = "high"
+    vision_max_side: int = 512
+    vision_crop_fraction: float = 0.8
+    vision_jpeg_quality: int = 85
+    vision_normalize_contrast: bool = False
+
+    # Local Roof Detector
+    local_detector_enabled: bool = True
+    local_detector_workers: int = 2
+    local_detector_min_confidence: float = 0.6
 
     # CORS
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
@@ -26,6 +44,75 @@ class Settings(BaseSettings):
     steep_roof_multiplier: float = 1.25
     damage_repair_multiplier: float = 1.15
 
+    # Multi-facet Roof Model
+    roof_model_snap_tolerance: float = 2.0  # pixels between edges that count as shared
+
+    # Upstream HTTP Client
+    http2_enabled: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 60.0
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_prewarm: bool = True
+    upstream_coalescing_enabled: bool = True
+
+    # Outbound Rate Limits and Circuit Breakers
+    outbound_governor_enabled: bool = True
+    google_rate_per_second: float = 50.0  # per endpoint; 0 disables the limit
+    openai_rate_per_second: float = 5.0  # per model
+    circuit_failure_threshold: int = 5  # consecutive failures that open a provider's circuit
+    circuit_reset_seconds: float = 30.0  # how long an open circuit fails fast before probing
+
+    # Background Jobs
+    job_workers: int = 4
+    job_max_pending: int = 1000
+    job_ttl_seconds: float = 3600.0
+    job_persist: bool = False  # keep job state in SQLite under cache_dir across restarts
+
+    # Bulk Estimation
+    bulk_concurrency: int = 4
+    bulk_max_rows: int = 10000
+    bulk_google_rate_per_second: float = 10.0  # 0 disables the limit
+    bulk_openai_rate_per_second: float = 2.0
+
+    # Metrics
+    metrics_enabled: bool = True  # record request metrics and serve /api/metrics
+
+    # Tracing
+    tracing_enabled: bool = True  # per-request spans in a Server-Timing header
+    trace_file: Optional[str] = None  # also append each request's spans to this JSON-lines file
+
+    # Profiling (a request is profiled when it sends X-Profile: cprofile | sample)
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None  # required X-Profile-Token value; profiling stays off without it
+    profile_dir: Optional[str] = None  # default: <cache_dir>/profiles
+    profile_max_files: int = 50
+    profile_sample_interval: float = 0.005  # seconds between stack samples
+
+    # Caching
+    cache_dir: str = ".cache"
+    geocode_cache_enabled: bool = True
+    geocode_cache_max_entries: int = 10000
+    geocode_cache_memory_ttl_seconds: float = 86400.0
+    geocode_cache_ttl_seconds: float = 2592000.0
+    geocode_cache_disk_max_entries: int = 500000
+    autocomplete_cache_enabled: bool = True
+    autocomplete_cache_max_entries: int = 5000
+    autocomplete_cache_ttl_seconds: float = 3600.0
+    satellite_cache_enabled: bool = True
+    satellite_cache_max_bytes: int = 512 * 1024 * 1024
+    satellite_cache_precision: int = 5
+    detection_cache_enabled: bool = True
+    detection_cache_max_entries: int = 2000
+    detection_cache_ttl_seconds: float = 604800.0
+    detection_cache_max_distance: int = 4
+    analysis_cache_enabled: bool = True
+    analysis_cache_max_entries: int = 2000
+    analysis_cache_ttl_seconds: float = 86400.0
+    analysis_cache_area_bucket: float = 50.0
+    analysis_cache_pitch_bucket: float = 2.5
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
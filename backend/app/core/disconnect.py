@@ -0,0 +1,39 @@
+"""Helpers for abandoning work when the HTTP client goes away."""
+from typing import Awaitable, TypeVar
+import asyncio
+from fastapi import HTTPException, Request
+
+
+T = TypeVar("T")
+
+# Non-standard status used by nginx for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Await a long-running call, cancelling it if the client disconnects first.
+
+    Args:
+        request: Incoming request to watch for disconnects
+        awaitable: Coroutine or future doing the actual work
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        Result of the awaitable
+
+    Raises:
+        HTTPException: 499 if the client disconnected before completion
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,301 @@
+"""Outbound call governor: per-provider rate limits, adaptive backoff and circuit breaking."""
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import math
+import time
+import httpx
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.rate_limit import TokenBucket
+from app.core.tracing import span
+
+
+T = TypeVar("T")
+
+# Upstream status codes that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = (403, 429)
+
+# Google reports quota exhaustion in a 200 JSON body
+_GOOGLE_QUOTA_STATUSES = (b'"OVER_QUERY_LIMIT"', b'"OVER_DAILY_LIMIT"')
+
+# Extra per-provider limits for calls made in the current context, on top of
+# the governor's own (e.g. the quota shared by bulk runs)
+caller_limits: ContextVar[Dict[str, TokenBucket]] = ContextVar("caller_limits", default={})
+
+upstream_duration = metrics.histogram(
+    "upstream_request_duration_seconds", "Outbound provider call latency", ("provider", "endpoint")
+)
+upstream_requests = metrics.counter(
+    "upstream_requests_total",
+    "Outbound provider calls by outcome (ok, client_error, throttled, error, rejected)",
+    ("provider", "endpoint", "outcome")
+)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        """
+        Initialize the error.
+
+        Args:
+            provider: Provider name (e.g. "google", "openai")
+            retry_after: Seconds until the provider is tried again
+        """
+        super().__init__(f"{provider} is temporarily unavailable; retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Response headers for the 503 answering this error (Retry-After in whole seconds, at least 1)."""
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail fast for ``reset_seconds``. Then a single probe call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize a closed circuit.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Seconds an open circuit waits before probing
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Decide whether a call may go upstream now.
+
+        Returns:
+            False if the call should fail fast
+        """
+        if self.state == "open" and self.retry_after <= 0:
+            self.state = "half_open"
+        if self.state == "closed" or (self.state == "half_open" and not self._probing):
+            self._probing = self.state == "half_open"
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a healthy response."""
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold or after a failed probe."""
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give up a probe slot without an outcome (e.g. the caller was cancelled)."""
+        self._probing = False
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Circuit state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after, 1) if self.state == "open" else 0.0
+        }
+
+
+def _retry_after(headers: Optional[httpx.Headers]) -> Optional[float]:
+    """Read a Retry-After header given in seconds."""
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _classify_response(response: httpx.Response) -> str:
+    """Classify an upstream HTTP response as "ok", "client_error", "throttled" or "error"."""
+    if response.status_code in THROTTLE_STATUSES:
+        return "throttled"
+    if response.status_code >= 500:
+        return "error"
+    if response.status_code >= 400:
+        return "client_error"
+    if response.headers.get("content-type", "").startswith("application/json") and any(
+        status in response.content for status in _GOOGLE_QUOTA_STATUSES
+    ):
+        return "throttled"
+    return "ok"
+
+
+def _classify_exception(error: Exception) -> Tuple[str, Optional[float]]:
+    """Classify a failed call and read any Retry-After the provider sent."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    retry_after = _retry_after(getattr(response, "headers", None))
+    if status in THROTTLE_STATUSES:
+        return "throttled", retry_after
+    if status is not None and status < 500:
+        # The request was bad, not the provider
+        return "client_error", None
+    return "error", None
+
+
+class OutboundGovernor:
+    """
+    Gate every outbound provider call.
+
+    Each (provider, endpoint) pair gets its own token bucket at the
+    provider's configured rate; 403/429 responses halve that bucket's rate
+    (honouring Retry-After) and successes restore it gradually. Each provider
+    also has a circuit breaker, so while it is failing callers get
+    ``ProviderUnavailableError`` immediately instead of waiting on timeouts.
+    """
+
+    def __init__(self):
+        """Initialize with no buckets or breakers; they are created on first use."""
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def _provider_rate(provider: str) -> float:
+        """Configured calls per second for each endpoint of a provider (0 is unlimited)."""
+        return {
+            "google": settings.google_rate_per_second,
+            "openai": settings.openai_rate_per_second
+        }.get(provider, 0.0)
+
+    def bucket(self, provider: str, endpoint: str) -> TokenBucket:
+        """Get the token bucket for a provider endpoint."""
+        key = (provider, endpoint)
+        if key not in self._buckets:
+            rate = self._provider_rate(provider)
+            self._buckets[key] = TokenBucket(rate, rate)
+        return self._buckets[key]
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """Get the circuit breaker for a provider."""
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+        return self._breakers[provider]
+
+    def is_available(self, provider: str) -> bool:
+        """Whether calls to a provider would currently go upstream."""
+        if not settings.outbound_governor_enabled:
+            return True
+        breaker = self.breaker(provider)
+        return breaker.state == "closed" or breaker.retry_after <= 0
+
+    async def call(self, provider: str, endpoint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an outbound call under the provider's rate limit and circuit breaker.
+
+        ``httpx.Response`` results are inspected for throttling and server
+        errors; exceptions are classified by their HTTP status, and
+        exceptions without one (timeouts, connection errors) count as
+        failures. Every call's latency and outcome is recorded in metrics,
+        also when the governor is disabled. Limits set in ``caller_limits``
+        apply in either case.
+
+        Args:
+            provider: Provider name (e.g. "google", "openai")
+            endpoint: Endpoint within the provider (e.g. URL path or model)
+            fn: Zero-argument coroutine factory making the call
+
+        Returns:
+            The call's result
+
+        Raises:
+            ProviderUnavailableError: If the provider's circuit is open
+        """
+        enabled = settings.outbound_governor_enabled
+        breaker = self.breaker(provider)
+        if enabled and not breaker.allow():
+            upstream_requests.inc(provider=provider, endpoint=endpoint, outcome="rejected")
+            raise ProviderUnavailableError(provider, breaker.retry_after)
+        bucket = self.bucket(provider, endpoint)
+
+        outcome: Optional[str] = None
+        retry_after: Optional[float] = None
+        started = 0.0
+        try:
+            if enabled:
+                await bucket.acquire()
+            caller_limit = caller_limits.get().get(provider)
+            if caller_limit is not None:
+                await caller_limit.acquire()
+            started = time.perf_counter()
+            with span(f"{provider}.{endpoint.strip('/').replace('/', '.')}"):
+                result = await fn()
+            if isinstance(result, httpx.Response):
+                outcome = _classify_response(result)
+                retry_after = _retry_after(result.headers)
+            else:
+                outcome = "ok"
+            return result
+        except Exception as e:
+            outcome, retry_after = _classify_exception(e)
+            raise
+        finally:
+            if outcome is not None:
+                upstream_duration.observe(time.perf_counter() - started, provider=provider, endpoint=endpoint)
+                upstream_requests.inc(provider=provider, endpoint=endpoint, outcome=outcome)
+            if enabled:
+                if outcome in ("ok", "client_error"):
+                    bucket.recover()
+                    breaker.record_success()
+                elif outcome == "throttled":
+                    bucket.backoff(retry_after)
+                    breaker.record_failure()
+                elif outcome == "error":
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Circuit state per provider and rate limiter state per endpoint."""
+        return {
+            "enabled": settings.outbound_governor_enabled,
+            "providers": {
+                provider: {
+                    "circuit": breaker.stats,
+                    "endpoints": {
+                        endpoint: bucket.stats
+                        for (bucket_provider, endpoint), bucket in self._buckets.items()
+                        if bucket_provider == provider
+                    }
+                }
+                for provider, breaker in self._breakers.items()
+            }
+        }
+
+
+outbound_governor = OutboundGovernor()
@@ -0,0 +1,120 @@
+"""Shared upstream HTTP client used for all outbound Google Maps calls."""
+from typing import Any, Dict, Optional
+import hashlib
+import httpx
+from app.core.config import settings
+from app.core.governor import outbound_governor
+from app.core.singleflight import SingleFlight
+
+
+# Provider names used for rate limits and circuit breakers, by host
+PROVIDERS = {httpx.URL(settings.google_maps_base_url).host: "google"}
+
+
+def _http2_available() -> bool:
+    """Check if the optional h2 package required for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class UpstreamHTTPClient:
+    """
+    Process-wide pooled ``httpx.AsyncClient``.
+
+    The client is opened by the application lifespan hook and shared by every
+    endpoint so connections (and their TLS sessions) to upstream providers are
+    kept alive and reused instead of being re-established per request.
+    Identical GET requests in flight at the same time share one upstream call,
+    and every call goes through the outbound governor.
+    """
+
+    def __init__(self):
+        """Initialize without opening any connections."""
+        self._client: Optional[httpx.AsyncClient] = None
+        self.inflight = SingleFlight()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled client from settings."""
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            http2=settings.http2_enabled and _http2_available(),
+            limits=limits,
+            timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Get the shared client, creating it lazily if the lifespan hook has not run.
+
+        Returns:
+            Pooled async HTTP client
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a GET request, coalescing it with an identical one already in flight.
+
+        Coalesced callers receive the same (fully read) response object. The
+        upstream call is rate limited per host and path, and fails fast with
+        ``ProviderUnavailableError`` while the provider's circuit is open.
+
+        Args:
+            url: Request URL, possibly with a query string
+            params: Extra query parameters
+            **kwargs: Arguments forwarded to ``httpx.AsyncClient.get`` (e.g. timeout)
+
+        Returns:
+            Upstream response
+
+        Raises:
+            ProviderUnavailableError: If the provider's circuit is open
+        """
+        request_url = httpx.URL(url)
+        if params:
+            request_url = request_url.copy_merge_params(params)
+        provider = PROVIDERS.get(request_url.host, request_url.host)
+
+        def fetch():
+            return outbound_governor.call(provider, request_url.path, lambda: self.client.get(request_url, **kwargs))
+
+        if not settings.upstream_coalescing_enabled:
+            return await fetch()
+
+        # Label by endpoint and a digest so API keys and addresses stay out of metrics
+        digest = hashlib.sha256(str(request_url).encode("utf-8")).hexdigest()[:12]
+        label = f"GET {request_url.host}{request_url.path}#{digest}"
+        return await self.inflight.do(
+            ("GET", str(request_url)),
+            fetch,
+            label=label
+        )
+
+    async def start(self) -> None:
+        """Open the connection pool and optionally pre-warm upstream connections."""
+        client = self.client
+        if settings.http_prewarm and settings.has_google_maps_key:
+            try:
+                # Any response completes DNS, TCP and TLS setup for the pool
+                await client.head(settings.google_maps_base_url, timeout=settings.http_connect_timeout)
+            except httpx.HTTPError:
+                pass
+
+    async def close(self) -> None:
+        """Close the pool and release all connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = UpstreamHTTPClient()
@@ -0,0 +1,387 @@
+"""In-process background job queue with priorities and optional SQLite persistence."""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# Lower numbers run first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are waiting to run."""
+
+
+class Job:
+    """State of one background job."""
+
+    def __init__(
+        self,
+        job_id: str,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: str = "normal",
+        status: str = "queued",
+        created_at: Optional[float] = None
+    ):
+        """
+        Initialize a job record.
+
+        Args:
+            job_id: Unique job id
+            kind: Registered handler name
+            payload: JSON-serializable handler arguments
+            priority: "high", "normal" or "low"
+            status: queued, running, succeeded, failed or cancelled
+            created_at: Submission timestamp (defaults to now)
+        """
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.status in FINISHED
+
+    def notify(self) -> None:
+        """Wake everyone waiting for a state change."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """
+        Wait until the job state changes.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the state changed, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public representation (without the payload)."""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers processing jobs by priority.
+
+    Job state lives in memory. With a database path, every state change is
+    also written to SQLite; on start, finished jobs are restored and jobs
+    that were queued or running are queued again.
+    """
+
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: float, db_path: Optional[str] = None):
+        """
+        Initialize an idle queue; workers start with start().
+
+        Args:
+            workers: Number of concurrent workers
+            max_pending: Maximum queued jobs before submissions are rejected
+            ttl_seconds: How long finished jobs are kept
+            db_path: SQLite file for persistence, or None for memory only
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine that runs jobs of a kind.
+
+        Args:
+            kind: Job kind name
+            handler: Coroutine taking the payload and returning a JSON-serializable dict
+        """
+        self._handlers[kind] = handler
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, priority TEXT NOT NULL, "
+                "status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _write(self, row: Tuple) -> None:
+        """Upsert a job row."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            conn.commit()
+
+    def _delete(self, job_ids: List[str]) -> None:
+        """Delete job rows."""
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+            conn.commit()
+
+    def _load(self) -> List[Tuple]:
+        """Read all job rows that have not expired."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT id, kind, priority, status, payload, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE finished_at IS NULL OR finished_at >= ? ORDER BY created_at",
+                (time.time() - self.ttl_seconds,)
+            ).fetchall()
+
+    async def _persist(self, job: Job) -> None:
+        """Write the job's current state to SQLite if persistence is enabled."""
+        if self.db_path is None:
+            return
+        row = (
+            job.id, job.kind, job.priority, job.status, json.dumps(job.payload),
+            json.dumps(job.result) if job.result is not None else None, job.error,
+            job.created_at, job.started_at, job.finished_at
+        )
+        await asyncio.to_thread(self._write, row)
+
+    def _enqueue(self, job: Job) -> None:
+        """Put a job on the priority queue."""
+        self._queue.put_nowait((PRIORITIES.get(job.priority, PRIORITIES["normal"]), next(self._sequence), job.id))
+
+    async def start(self) -> None:
+        """Restore persisted jobs and start the workers."""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+
+        if self.db_path is not None:
+            for row in await asyncio.to_thread(self._load):
+                job_id, kind, priority, status, payload, result, error, created_at, started_at, finished_at = row
+                job = Job(job_id, kind, json.loads(payload), priority, status, created_at)
+                if status in FINISHED:
+                    job.started_at, job.finished_at = started_at, finished_at
+                    job.result = json.loads(result) if result else None
+                    job.error = error
+                elif kind not in self._handlers:
+                    # Queued by a build that had this kind; nothing can run it now
+                    job.status = "failed"
+                    job.error = f"Unknown job kind: {kind}"
+                    job.finished_at = time.time()
+                    await self._persist(job)
+                else:
+                    # Interrupted by a restart: run it again
+                    job.status = "queued"
+                    self._enqueue(job)
+                self._jobs[job_id] = job
+
+        self._workers = [asyncio.create_task(self._work()) for _ in range(max(1, self.workers))]
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs are requeued on the next start if persisted."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: str = "normal") -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable handler arguments
+            priority: "high", "normal" or "low"
+
+        Returns:
+            The queued job
+
+        Raises:
+            ValueError: If the kind or priority is unknown
+            QueueFullError: If max_pending jobs are already waiting
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self._queue is None:
+            await self.start()
+        if self._queue.qsize() >= self.max_pending:
+            raise QueueFullError("Too many jobs queued, try again later")
+
+        await self._prune()
+        job = Job(uuid.uuid4().hex, kind, payload, priority)
+        self._jobs[job.id] = job
+        await self._persist(job)
+        self._enqueue(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            The job (unchanged if it had already finished), or None if unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.is_finished:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            # The worker records the cancellation when the task unwinds
+            task.cancel()
+            return job
+        await self._finish(job, "cancelled", error="Cancelled before it started")
+        return job
+
+    async def _finish(self, job: Job, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        """Record a final state and wake subscribers."""
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        await self._persist(job)
+        job.notify()
+
+    async def _work(self) -> None:
+        """Worker loop: take the most urgent job and run its handler."""
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+            try:
+                await self._run(job)
+            except Exception as e:
+                # Persisting the job failed or its result could not be
+                # serialized; fail the job rather than lose the worker
+                await self._fail(job, e)
+
+    async def _run(self, job: Job) -> None:
+        """Run one queued job's handler and record the outcome."""
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+
+        job.status = "running"
+        job.started_at = time.time()
+        await self._persist(job)
+        job.notify()
+
+        task = asyncio.create_task(handler(job.payload))
+        self._running[job.id] = task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # The worker itself is stopping
+            task.cancel()
+            raise
+        finally:
+            self._running.pop(job.id, None)
+
+        if task.cancelled():
+            await self._finish(job, "cancelled", error="Cancelled while running")
+        elif task.exception() is not None:
+            await self._finish(job, "failed", error=str(task.exception()))
+        else:
+            await self._finish(job, "succeeded", result=task.result())
+
+    async def _fail(self, job: Job, error: Exception) -> None:
+        """Mark a job failed after an error outside its handler, persisting if possible."""
+        job.status = "failed"
+        job.result = None
+        job.error = str(error) or type(error).__name__
+        job.finished_at = time.time()
+        try:
+            await self._persist(job)
+        except Exception:
+            # The in-memory state is still correct; it is only lost on restart
+            pass
+        job.notify()
+
+    async def _prune(self) -> None:
+        """Forget finished jobs older than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if expired and self.db_path is not None:
+            await asyncio.to_thread(self._delete, expired)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status and worker pool size."""
+        counts = {status: 0 for status in ("queued", "running") + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": len(self._workers),
+            "persistent": self.db_path is not None,
+            **counts
+        }
+
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_pending=settings.job_max_pending,
+    ttl_seconds=settings.job_ttl_seconds,
+    db_path=os.path.join(settings.cache_dir, "jobs.sqlite3") if settings.job_persist else None
+)
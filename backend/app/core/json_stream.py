@@ -0,0 +1,125 @@
+"""Incremental parser for a JSON object arriving in fragments."""
+from typing import Any, Dict, List, Optional
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Emit parts of a top-level JSON object as soon as they are complete.
+
+    Feed text fragments (e.g. model tokens) in order. The parser reports
+    each element of a top-level array as soon as that element closes, and
+    each top-level field once its whole value has arrived. Nested values are
+    parsed with ``json.loads`` once their extent is known, so the scanner
+    only tracks strings, escapes and bracket depth.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        self._buffer = ""
+        self._position = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self._after_colon = False
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consume a fragment and return the events it completed.
+
+        Args:
+            text: Next piece of the JSON document
+
+        Returns:
+            Events, in order: {"type": "item", "key", "index", "value"} for
+            each completed top-level array element, and
+            {"type": "field", "key", "value"} for each completed top-level field
+        """
+        self._buffer += text
+        events: List[Dict[str, Any]] = []
+        buffer = self._buffer
+        while self._position < len(buffer) and not self.done:
+            self._scan(buffer[self._position], self._position, events)
+            self._position += 1
+        return events
+
+    def _in_top_level_array(self) -> bool:
+        """Whether the scanner is directly inside an array valued top-level field."""
+        return self._stack == ["{", "["]
+
+    def _scan(self, char: str, index: int, events: List[Dict[str, Any]]) -> None:
+        """Advance the state machine by one character."""
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._key_start is not None:
+                    self._key = json.loads(self._buffer[self._key_start:index + 1])
+                    self._key_start = None
+            return
+
+        if char.isspace():
+            return
+
+        depth = len(self._stack)
+        if depth == 1:
+            if char == ":":
+                self._after_colon = True
+                return
+            if char in ",}":
+                self._emit_field(index, events)
+                if char == "}":
+                    self._stack.pop()
+                    self.done = True
+                return
+            if not self._after_colon:
+                if char == '"':
+                    self._in_string = True
+                    self._key_start = index
+                return
+            if self._value_start is None:
+                self._value_start = index
+                if char == "[":
+                    self._item_index = 0
+        elif self._in_top_level_array():
+            if char in ",]":
+                self._emit_item(index, events)
+                if char == "]":
+                    self._stack.pop()
+                return
+            if self._item_start is None:
+                self._item_start = index
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._stack.append(char)
+        elif char in "}]" and self._stack:
+            self._stack.pop()
+
+    def _emit_item(self, end: int, events: List[Dict[str, Any]]) -> None:
+        """Report the array element ending before index end."""
+        if self._item_start is None:
+            return
+        value = json.loads(self._buffer[self._item_start:end])
+        events.append({"type": "item", "key": self._key, "index": self._item_index, "value": value})
+        self._item_index += 1
+        self._item_start = None
+
+    def _emit_field(self, end: int, events: List[Dict[str, Any]]) -> None:
+        """Report the top-level field whose value ends before index end."""
+        if self._key is not None and self._value_start is not None:
+            value = json.loads(self._buffer[self._value_start:end])
+            events.append({"type": "field", "key": self._key, "value": value})
+        self._key = None
+        self._value_start = None
+        self._after_colon = False
@@ -0,0 +1,425 @@
+"""In-process metrics with Prometheus text exposition."""
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import asyncio
+import functools
+import math
+import threading
+import time
+from app.core.tracing import span
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Seconds; covers fast in-process work through slow vision calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set as {a="1",b="2"}."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for a named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize an empty metric family.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        """Order label values by the declared label names."""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield (name suffix, formatted labels, value) for every sample."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        """Initialize with no samples."""
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Add to the count.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield one sample per label set."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        """Initialize with no samples."""
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add to the value."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Subtract from the value."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the value."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield one sample per label set."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Initialize with no observations.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            labelnames: Names of the labels every sample carries
+            buckets: Upper bounds of the buckets, ascending (+Inf is implied)
+        """
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield cumulative bucket, sum and count samples per label set."""
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                yield "_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics.
+
+    Metrics are created on first use and looked up by name afterwards, so
+    modules can declare the metrics they record at import time. Collectors
+    add samples computed at scrape time (e.g. from existing cache counters).
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterator[Metric]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Return the metric called name, creating it on first use."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def register_collector(self, collector: Callable[[], Iterator[Metric]]) -> None:
+        """
+        Add a callback that builds extra metrics at scrape time.
+
+        Args:
+            collector: Zero-argument callable yielding populated metrics
+        """
+        self._collectors.append(collector)
+
+    def register_cache(self, cache: str, stats: Callable[[], Dict[str, int]]) -> None:
+        """
+        Export a cache's hit/miss counters.
+
+        Every ``*hits`` field of the stats dict counts as a hit and
+        ``misses`` as a miss; ``size`` (or ``memory_size``) is reported as
+        the entry count.
+
+        Args:
+            cache: Cache name used as the ``cache`` label
+            stats: Callable returning the cache's stats dict
+        """
+        def collect() -> Iterator[Metric]:
+            values = stats()
+            lookups = Counter("cache_lookups_total", "Cache lookups by result", ("cache", "result"))
+            lookups.inc(sum(v for k, v in values.items() if k.endswith("hits")), cache=cache, result="hit")
+            lookups.inc(values.get("misses", 0), cache=cache, result="miss")
+            yield lookups
+            size = values.get("size", values.get("memory_size"))
+            if size is not None:
+                entries = Gauge("cache_entries", "Entries held in memory per cache", ("cache",))
+                entries.set(size, cache=cache)
+                yield entries
+
+        self.register_collector(collect)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text (version 0.0.4)
+        """
+        families: Dict[str, List[Metric]] = {}
+        with self._lock:
+            for metric in self._metrics.values():
+                families.setdefault(metric.name, []).append(metric)
+        for collector in self._collectors:
+            for metric in collector():
+                families.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name in sorted(families):
+            metrics = families[name]
+            lines.append(f"# HELP {name} {metrics[0].help}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                for suffix, labels, value in metric.samples():
+                    lines.append(f"{name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+function_duration = metrics.histogram(
+    "function_duration_seconds", "Duration of instrumented service functions", ("function",)
+)
+function_errors = metrics.counter(
+    "function_errors_total", "Exceptions raised by instrumented service functions", ("function", "error")
+)
+
+
+def timed(fn: Optional[F] = None, *, name: Optional[str] = None) -> Any:
+    """
+    Record a function's duration and exceptions.
+
+    Each call is also a span of the current request's trace.
+
+    Works on plain and async functions, with or without arguments::
+
+        @timed
+        def calculate_polygon_area(...): ...
+
+        @timed(name="vision")
+        async def detect(...): ...
+
+    Args:
+        fn: Function to wrap (when used without parentheses)
+        name: ``function`` label value (default: the function's qualified name)
+
+    Returns:
+        The wrapped function, or a decorator when called with arguments
+    """
+    def decorate(fn: F) -> F:
+        label = name or fn.__qualname__
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    with span(label):
+                        return await fn(*args, **kwargs)
+                except Exception as e:
+                    function_errors.inc(function=label, error=type(e).__name__)
+                    raise
+                finally:
+                    function_duration.observe(time.perf_counter() - started, function=label)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                with span(label):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                function_errors.inc(function=label, error=type(e).__name__)
+                raise
+            finally:
+                function_duration.observe(time.perf_counter() - started, function=label)
+        return wrapper  # type: ignore[return-value]
+
+    return decorate(fn) if fn is not None else decorate
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request latency and in-flight requests.
+
+    Requests are labelled by route template (e.g. ``/api/v1/jobs/{job_id}``)
+    rather than raw path, so ids do not create new series. Latency runs
+    until the response body has been sent, which includes streamed bodies.
+    The route is only known once the router has picked it, so the in-flight
+    gauge is labelled by method.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], registry: MetricsRegistry = metrics):
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Inner ASGI application
+            registry: Registry to record into
+        """
+        self.app = app
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+        )
+
+    @staticmethod
+    def _route(scope: Dict[str, Any]) -> str:
+        """Template of the route that handled the request, including its router prefix."""
+        template = getattr(scope.get("route"), "path_format", None)
+        if template is None:
+            return "unmatched"
+        # Routes of included routers carry only their own part of the path
+        route_segments = [segment for segment in template.split("/") if segment]
+        path_segments = scope["path"].rstrip("/").split("/")
+        prefix = path_segments[:max(1, len(path_segments) - len(route_segments))]
+        return "/".join(prefix + route_segments) or "/"
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Serve the request, recording its metrics."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route(scope)
+            self.in_flight.dec(method=method)
+            self.duration.observe(time.perf_counter() - started, method=method, route=route)
+            self.requests.inc(method=method, route=route, status=status)
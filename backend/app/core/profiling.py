@@ -0,0 +1,288 @@
+"""Opt-in per-request profiling with a bounded on-disk report store."""
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+
+PROFILE_HEADER = "x-profile"
+TOKEN_HEADER = "x-profile-token"
+
+# Report file extension per profiler mode
+MODES = {"cprofile": ".pstats", "sample": ".collapsed"}
+
+_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]+")
+
+# Leaf frames of threads that are idle, left out of sampled stacks
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker")
+}
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """
+    Check a caller's profiling token.
+
+    Args:
+        token: Value of the X-Profile-Token header
+
+    Returns:
+        True if a token is configured and matches; without a configured
+        token nobody may profile
+    """
+    if not settings.profiling_token:
+        return False
+    return token is not None and hmac.compare_digest(token.encode("utf-8"), settings.profiling_token.encode("utf-8"))
+
+
+def is_report(name: str) -> bool:
+    """Whether a file name is a profile report (other files in the directory are left alone)."""
+    return os.path.splitext(name)[1] in MODES.values()
+
+
+def _write_text(path: str, text: str) -> None:
+    """Write a text report."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class StackSampler:
+    """
+    Sampling profiler for all Python threads of the process.
+
+    A background thread records every other thread's stack at a fixed
+    interval; the result is in collapsed-stack format (``a;b;c count``),
+    ready for flame graph tools. Threads sitting idle are skipped.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _collapse(frame: Any, thread_name: str) -> Optional[str]:
+        """Format a stack root-first, or return None for an idle thread."""
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+            return None
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            frame = frame.f_back
+        names.append(thread_name)
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._collapse(frame, names.get(ident, "thread"))
+                if stack is not None:
+                    self.samples[stack] += 1
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """
+        Stop sampling.
+
+        Returns:
+            Collapsed stacks, one ``stack count`` line each
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """
+    Directory of profile reports, pruned to the newest ``max_files``.
+
+    Only ``.pstats`` and ``.collapsed`` files are listed, served or pruned,
+    so the directory may be shared with other data.
+    """
+
+    def __init__(self, root: str, max_files: int):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory for reports (created on first write)
+            max_files: Reports kept; the oldest are deleted beyond this
+        """
+        self.root = root
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def new_name(self, mode: str, method: str, path: str) -> str:
+        """Build a unique, sortable report file name for a request."""
+        slug = _UNSAFE.sub("_", path.strip("/"))[:60] or "root"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{method.lower()}-{slug}-{uuid.uuid4().hex[:8]}{MODES[mode]}"
+
+    def path(self, name: str) -> Optional[str]:
+        """
+        Resolve a report name to its file.
+
+        Args:
+            name: Report file name
+
+        Returns:
+            File path, or None if the name is invalid or the report is gone
+        """
+        if not _NAME.match(name) or not is_report(name):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.isfile(path) else None
+
+    def save(self, name: str, write: Callable[[str], None]) -> None:
+        """
+        Store a report and prune old ones.
+
+        Args:
+            name: Report file name
+            write: Callable writing the report to the given path
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            write(os.path.join(self.root, name))
+            reports = sorted(
+                (entry for entry in os.scandir(self.root) if entry.is_file() and is_report(entry.name)),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            for entry in reports[:max(0, len(reports) - self.max_files)]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        List stored reports, newest first.
+
+        Returns:
+            Name, mode, size and creation time of each report
+        """
+        if not os.path.isdir(self.root):
+            return []
+        modes = {extension: mode for mode, extension in MODES.items()}
+        reports = []
+        for entry in os.scandir(self.root):
+            extension = os.path.splitext(entry.name)[1]
+            if entry.is_file() and extension in modes:
+                stat = entry.stat()
+                reports.append({
+                    "name": entry.name,
+                    "mode": modes[extension],
+                    "size": stat.st_size,
+                    "created_at": stat.st_mtime
+                })
+        return sorted(reports, key=lambda report: report["created_at"], reverse=True)
+
+
+profile_store = ProfileStore(
+    root=settings.profile_dir or os.path.join(settings.cache_dir, "profiles"),
+    max_files=settings.profile_max_files
+)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it.
+
+    A request is profiled when it sends ``X-Profile: cprofile`` (deterministic,
+    pstats output) or ``X-Profile: sample`` (sampling, collapsed stacks) with
+    a matching ``X-Profile-Token``; nothing is profiled until a token is
+    configured. Only one request is profiled at a time; others are served normally with
+    ``X-Profile-Status: busy``. The report name is returned in ``X-Profile-Id``.
+
+    cProfile sees only the event loop thread, and everything running on it
+    while the request is in flight; the sampler also covers worker threads
+    (``asyncio.to_thread``) but not the local detector's process pool.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], store: ProfileStore = profile_store):
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Inner ASGI application
+            store: Where reports are saved
+        """
+        self.app = app
+        self.store = store
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Serve the request, profiling it if requested."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        mode = headers.get(PROFILE_HEADER, "").strip().lower()
+        if mode not in MODES or not token_matches(headers.get(TOKEN_HEADER)):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile-status", b"busy")]))
+            return
+
+        name = self.store.new_name(mode, scope["method"], scope["path"])
+        send = self._with_headers(send, [(b"x-profile-status", b"recorded"), (b"x-profile-id", name.encode("latin-1"))])
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                    await asyncio.to_thread(self.store.save, name, profiler.dump_stats)
+            else:
+                sampler = StackSampler(settings.profile_sample_interval)
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    report = sampler.stop()
+                    await asyncio.to_thread(self.store.save, name, lambda path: _write_text(path, report))
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def _with_headers(send: Callable, extra: List) -> Callable:
+        """Wrap send to add headers to the response start message."""
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+        return send_wrapper
@@ -0,0 +1,99 @@
+"""Token bucket rate limiting for outbound calls."""
+from typing import Dict, Optional
+import asyncio
+import time
+
+
+# Adaptive backoff: halve the rate on throttling, never below this share of
+# the configured rate, and win back this share per successful call
+MIN_RATE_FRACTION = 0.05
+RECOVERY_FRACTION = 0.05
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` tokens per second, up to ``burst`` saved up.
+
+    Callers are served in arrival order; a caller that finds the bucket empty
+    sleeps until enough tokens have accumulated. When the upstream signals
+    throttling, ``backoff`` cuts the rate multiplicatively and ``recover``
+    restores it additively as calls succeed.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second (0 or less disables limiting)
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.max_rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Wait until tokens are available and take them.
+
+        Args:
+            tokens: Number of tokens to take
+        """
+        if self.rate <= 0:
+            self.acquired += 1
+            return
+        async with self._lock:
+            started = time.monotonic()
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+            self.acquired += 1
+            self.waited_seconds += time.monotonic() - started
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        """
+        Halve the rate after the upstream throttled a call.
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait; no tokens are
+                handed out until then
+        """
+        if self.max_rate <= 0:
+            return
+        self._refill()
+        self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+        if retry_after:
+            self._tokens = min(self._tokens, -retry_after * self.rate)
+
+    def recover(self) -> None:
+        """Step the rate back towards the configured rate after a successful call."""
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Configured rate, current tokens and wait totals."""
+        if self.rate > 0:
+            self._refill()
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 3)
+        }
@@ -0,0 +1,100 @@
+"""Coalescing of identical concurrent async calls."""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncio
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    in flight await the same result (or exception). The shared task is
+    shielded so one waiter being cancelled does not cancel it for the others;
+    when the last waiter goes away the task is cancelled, so an abandoned
+    upstream call does not keep running.
+    The number of callers currently waiting on each key is tracked for metrics.
+    """
+
+    def __init__(self, max_reported_keys: int = 20):
+        """
+        Initialize with no calls in flight.
+
+        Args:
+            max_reported_keys: Most-waited-on keys listed in stats
+        """
+        self.max_reported_keys = max_reported_keys
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._labels: Dict[Hashable, str] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.peak_waiters = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], label: Optional[str] = None) -> T:
+        """
+        Run fn once per key at a time and share its outcome.
+
+        Args:
+            key: Identity of the call; equal keys are coalesced
+            fn: Zero-argument coroutine factory doing the actual work
+            label: Name reported for the key in stats (defaults to str(key));
+                use it to keep secrets or large payloads out of metrics
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._labels[key] = label if label is not None else str(key)
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        waiters = self._waiters.get(key, 0) + 1
+        self._waiters[key] = waiters
+        self.peak_waiters = max(self.peak_waiters, waiters)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters[key] - 1
+            if remaining:
+                self._waiters[key] = remaining
+            else:
+                del self._waiters[key]
+                if not task.done() and self._inflight.get(key) is task:
+                    # Nobody is waiting any more: abandon the call
+                    del self._inflight[key]
+                    task.cancel()
+                if key not in self._inflight:
+                    self._labels.pop(key, None)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished task so the next call for its key starts fresh."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            if key not in self._waiters:
+                self._labels.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away
+            task.exception()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Call, coalesced-call and in-flight counters plus per-key waiter counts."""
+        busiest = sorted(self._waiters.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "waiting": sum(self._waiters.values()),
+            "peak_waiters": self.peak_waiters,
+            "waiters_by_key": {
+                self._labels.get(key, str(key)): count for key, count in busiest[:self.max_reported_keys]
+            }
+        }
@@ -0,0 +1,24 @@
+"""Server-sent event formatting."""
+from typing import Any
+import json
+
+
+# Comment line that keeps idle connections (and proxies) from timing out
+KEEPALIVE = ": keep-alive\n\n"
+
+# Headers that stop proxies from buffering an event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event: str, data: Any) -> str:
+    """
+    Format one server-sent event with a JSON payload.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        Event text including the terminating blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
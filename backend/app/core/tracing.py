@@ -0,0 +1,245 @@
+"""Lightweight per-request span tracing with Server-Timing and JSON-lines export."""
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+# Most distinct span names reported in one Server-Timing header
+MAX_SERVER_TIMING_ENTRIES = 30
+
+# Most spans recorded per request; later ones are only counted
+MAX_SPANS_PER_TRACE = 1000
+
+
+class Span:
+    """One timed operation within a request trace."""
+
+    __slots__ = ("name", "parent", "start", "duration")
+
+    def __init__(self, name: str, parent: Optional[int], start: float):
+        """
+        Initialize an open span.
+
+        Args:
+            name: Operation name
+            parent: Index of the enclosing span in the trace, if any
+            start: perf_counter() at the start
+        """
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.duration: Optional[float] = None
+
+
+class Trace:
+    """
+    Spans recorded while serving one request.
+
+    At most ``MAX_SPANS_PER_TRACE`` spans are kept, and recording stops
+    altogether once ``recording`` is cleared; spans not kept are counted in
+    ``dropped``.
+    """
+
+    def __init__(self):
+        """Start a trace now."""
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self.recording = True
+        self.dropped = 0
+
+    def accepts_span(self) -> bool:
+        """Whether a new span should be recorded, counting it as dropped if not."""
+        if self.recording and len(self.spans) < MAX_SPANS_PER_TRACE:
+            return True
+        self.dropped += 1
+        return False
+
+    def server_timing(self, total: float) -> str:
+        """
+        Format finished spans as a Server-Timing header value.
+
+        Spans sharing a name are merged (durations summed, count in desc).
+
+        Args:
+            total: Request duration so far in seconds
+
+        Returns:
+            Header value, e.g. ``geocode;dur=12.5, total;dur=40.1``
+        """
+        merged: Dict[str, List[float]] = {}
+        for span in list(self.spans):
+            if span.duration is not None:
+                entry = merged.setdefault(span.name, [0.0, 0])
+                entry[0] += span.duration
+                entry[1] += 1
+        entries = []
+        for name, (duration, count) in list(merged.items())[:MAX_SERVER_TIMING_ENTRIES]:
+            entry = f"{_TOKEN_UNSAFE.sub('_', name)};dur={duration * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="x{count}"'
+            entries.append(entry)
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the spans with times relative to the start of the request."""
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": self.started_at,
+            "dropped_spans": self.dropped,
+            "spans": [
+                {
+                    "id": index,
+                    "parent": span.parent,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.start) * 1000, 3),
+                    "duration_ms": None if span.duration is None else round(span.duration * 1000, 3)
+                }
+                for index, span in enumerate(list(self.spans))
+            ]
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+
+
+class span:
+    """
+    Time a block as a span of the current request's trace.
+
+    Usable as ``with span("base64_encode"):`` in sync and async code. Outside
+    a traced request, or once its trace stopped recording, it does nothing.
+    """
+
+    __slots__ = ("name", "_trace", "_span", "_token")
+
+    def __init__(self, name: str):
+        """
+        Name the span.
+
+        Args:
+            name: Operation name shown in Server-Timing and the trace file
+        """
+        self.name = name
+        self._trace: Optional[Trace] = None
+
+    def __enter__(self) -> "span":
+        """Open the span."""
+        self._trace = _current_trace.get()
+        if self._trace is not None and not self._trace.accepts_span():
+            self._trace = None
+        if self._trace is not None:
+            self._span = Span(self.name, _current_span.get(), time.perf_counter())
+            self._trace.spans.append(self._span)
+            self._token = _current_span.set(len(self._trace.spans) - 1)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the span."""
+        if self._trace is not None:
+            self._span.duration = time.perf_counter() - self._span.start
+            _current_span.reset(self._token)
+
+
+class TraceExporter:
+    """Append finished traces to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: Trace file path (created on first write)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append one trace record."""
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces each request.
+
+    Spans finished before the response headers go out are reported in a
+    ``Server-Timing`` header (streamed responses therefore only show the
+    work done before streaming started). When ``trace_file`` is set, the
+    complete trace is also appended to that JSON-lines file once the
+    response has been sent. Without a trace file nothing reads spans after
+    the headers, so recording stops there (long bulk runs and SSE streams
+    would otherwise grow the trace without bound).
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: Inner ASGI application
+        """
+        self.app = app
+        self.exporter = TraceExporter(settings.trace_file) if settings.trace_file else None
+        # Let the frontend's dev tools read the header cross-origin
+        self.timing_allow_origin = ", ".join(settings.cors_origins_list).encode("latin-1")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Serve the request inside a new trace."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = trace.server_timing(time.perf_counter() - trace.start)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                if self.timing_allow_origin:
+                    headers.append((b"timing-allow-origin", self.timing_allow_origin))
+                message = {**message, "headers": headers}
+                if self.exporter is None:
+                    trace.recording = False
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if self.exporter is not None:
+                record = trace.to_dict()
+                record.update({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - trace.start) * 1000, 3)
+                })
+                try:
+                    await asyncio.to_thread(self.exporter.write, record)
+                except OSError:
+                    # Tracing must never fail a request
+                    pass
@@ -1,8 +1,30 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.api.v1.endpoints import address, measurement, ai, satellite, roof_detection, autocomplete
+from app.core.governor import outbound_governor
+from app.core.http_client import http_client
+from app.core.jobs import job_queue
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
+from app.services.ai_service import ai_service
+from app.services.roof_detector import local_roof_detector
+from app.api.v1.endpoints import address, measurement, ai, satellite, roof_detection, autocomplete, jobs, pipeline, bulk, admin
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream resources on startup and release them on shutdown."""
+    await http_client.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await http_client.close()
+    await ai_service.close()
+    local_roof_detector.shutdown()
 
 
 # Create FastAPI app
@@ -11,7 +33,8 @@ app = FastAPI(
     version=settings.app_version,
     description="AI-powered roofing estimation platform",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -23,6 +46,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and in-flight requests for /api/metrics
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Stage breakdown (geocode, satellite download, vision call, parsing) per request
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
+# Opt-in profiling of individual requests
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(address.router, prefix="/api/v1/address", tags=["Address"])
 app.include_router(autocomplete.router, prefix="/api/v1/autocomplete", tags=["Autocomplete"])
@@ -30,6 +65,10 @@ app.include_router(measurement.router, prefix="/api/v1/measurement", tags=["Meas
 app.include_router(ai.router, prefix="/api/v1/ai", tags=["AI"])
 app.include_router(satellite.router, prefix="/api/v1/satellite", tags=["Satellite"])
 app.include_router(roof_detection.router, prefix="/api/v1/roof", tags=["Roof Detection"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+app.include_router(pipeline.router, prefix="/api/v1/pipeline", tags=["Pipeline"])
+app.include_router(bulk.router, prefix="/api/v1/bulk", tags=["Bulk"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -57,6 +96,25 @@ async def health_check():
     }
 
 
+@app.get("/api/upstream-stats")
+async def upstream_stats():
+    """Request coalescing, rate limiter and circuit breaker state for outbound provider calls."""
+    return {
+        "enabled": settings.upstream_coalescing_enabled,
+        "google_maps": http_client.inflight.stats,
+        "openai": ai_service.inflight.stats,
+        "governor": outbound_governor.stats
+    }
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, upstream, OpenAI token, cache and service function metrics in Prometheus text format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/api/config")
 async def get_config():
     """Get public configuration."""
@@ -1,38 +1,169 @@
 """AI service for roof analysis and cost estimation using OpenAI."""
-from typing import Optional, Dict
+from typing import Optional, Dict, Any, AsyncIterator, List
+import asyncio
+import hashlib
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.governor import outbound_governor
+from app.core.json_stream import IncrementalJSONParser
+from app.core.metrics import metrics, timed
+from app.core.singleflight import SingleFlight
+from app.core.tracing import span
+from app.services.analysis_cache import analysis_cache
+
+
+openai_tokens = metrics.counter("openai_tokens_total", "OpenAI tokens used by model and kind", ("model", "kind"))
+openai_call_tokens = metrics.histogram(
+    "openai_tokens_per_call",
+    "Total OpenAI tokens per chat completion",
+    ("model",),
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+)
+
+
+def record_usage(model: Optional[str], usage: Any) -> None:
+    """Record token usage reported on a chat completion (or its last stream chunk)."""
+    if usage is None:
+        return
+    model = str(model)
+    openai_tokens.inc(usage.prompt_tokens or 0, model=model, kind="prompt")
+    openai_tokens.inc(usage.completion_tokens or 0, model=model, kind="completion")
+    openai_call_tokens.observe(usage.total_tokens or 0, model=model)
 
 
 class AIService:
     """Service for AI-powered roof analysis."""
 
     def __init__(self):
-        """Initialize AI service with OpenAI client."""
+        """Initialize AI service with a shared async OpenAI client."""
         self.client = None
+        self._semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+        self.inflight = SingleFlight()
+        self.analysis_inflight = SingleFlight()
         if settings.has_openai_key:
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            self.client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                timeout=settings.openai_timeout,
+                max_retries=settings.openai_max_retries
+            )
 
     def is_configured(self) -> bool:
         """Check if AI service is properly configured."""
         return self.client is not None
 
+    def is_available(self) -> bool:
+        """Check if OpenAI calls would go upstream now (its circuit is not open)."""
+        return outbound_governor.is_available("openai")
+
+    async def create_chat_completion(self, timeout: Optional[float] = None, **kwargs: Any):
+        """
+        Run a chat completion on the shared client with bounded concurrency.
+
+        Identical non-streaming requests in flight at the same time share one
+        upstream call. Calls are rate limited per model and fail fast while
+        OpenAI's circuit is open.
+
+        Args:
+            timeout: Per-call timeout in seconds (default from settings)
+            **kwargs: Arguments forwarded to ``chat.completions.create``
+
+        Returns:
+            OpenAI chat completion response
+
+        Raises:
+            ProviderUnavailableError: If OpenAI's circuit is open
+        """
+        timeout = timeout or settings.openai_timeout
+        if kwargs.get("stream") or not settings.upstream_coalescing_enabled:
+            return await self._create_chat_completion(timeout, kwargs)
+
+        digest = hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return await self.inflight.do(
+            digest,
+            lambda: self._create_chat_completion(timeout, kwargs),
+            label=f"chat {kwargs.get('model')}#{digest[:12]}"
+        )
+
+    async def _create_chat_completion(self, timeout: float, kwargs: Dict[str, Any]):
+        """Run one chat completion under the concurrency limit and timeout."""
+        async with self._semaphore:
+            try:
+                response = await outbound_governor.call(
+                    "openai",
+                    str(kwargs.get("model")),
+                    lambda: asyncio.wait_for(self.client.chat.completions.create(**kwargs), timeout=timeout)
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"OpenAI request timed out after {timeout:g}s")
+        record_usage(kwargs.get("model"), getattr(response, "usage", None))
+        return response
+
+    async def stream_chat_completion(self, timeout: Optional[float] = None, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream a chat completion's text, holding a concurrency slot until it ends.
+
+        Token usage is requested on the final chunk and recorded in metrics.
+
+        Args:
+            timeout: Maximum seconds to wait for the stream to open and for each chunk
+            **kwargs: Arguments forwarded to ``chat.completions.create``
+
+        Yields:
+            Content fragments as the model produces them
+        """
+        timeout = timeout or settings.openai_timeout
+        async with self._semaphore:
+            try:
+                stream = await outbound_governor.call(
+                    "openai",
+                    str(kwargs.get("model")),
+                    lambda: asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            stream=True, stream_options={"include_usage": True}, **kwargs
+                        ),
+                        timeout=timeout
+                    )
+                )
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                    except StopAsyncIteration:
+                        return
+                    record_usage(kwargs.get("model"), getattr(chunk, "usage", None))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"OpenAI request timed out after {timeout:g}s")
+
+    async def close(self) -> None:
+        """Close the underlying OpenAI HTTP connections."""
+        if self.client is not None:
+            await self.client.close()
+
+    @timed
     async def analyze_roof_description(
         self,
         address: str,
         area_sq_ft: float,
         pitch_degrees: float,
-        user_notes: Optional[str] = None
+        user_notes: Optional[str] = None,
+        bypass_cache: bool = False
     ) -> Dict[str, any]:
         """
         Use AI to provide additional insights about the roof estimate.
 
+        Successful analyses are cached by address and bucketed area/pitch,
+        and identical concurrent requests share one model call.
+
         Args:
             address: Property address
             area_sq_ft: Calculated roof area
             pitch_degrees: Estimated pitch
             user_notes: Optional user-provided notes or observations
+            bypass_cache: Skip the cache lookup (the fresh result is still cached)
 
         Returns:
             AI-generated insights and recommendations
@@ -45,8 +176,32 @@ class AIService:
                 "confidence": 0.0
             }
 
-        try:
-            prompt = f"""You are a roofing expert AI assistant for Elev8ted Roofs. Analyze this roof estimate and provide insights:
+        if not settings.analysis_cache_enabled:
+            return await self._analyze_roof_description(address, area_sq_ft, pitch_degrees, user_notes)
+
+        key = analysis_cache.make_key(address, area_sq_ft, pitch_degrees, user_notes)
+        if not bypass_cache:
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        async def analyze_and_cache() -> Dict[str, any]:
+            result = await self._analyze_roof_description(address, area_sq_ft, pitch_degrees, user_notes)
+            if result.get("success"):
+                analysis_cache.set(key, result)
+            return result
+
+        return await self.analysis_inflight.do(key, analyze_and_cache)
+
+    @staticmethod
+    def _analysis_messages(
+        address: str,
+        area_sq_ft: float,
+        pitch_degrees: float,
+        user_notes: Optional[str]
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for a roof analysis."""
+        prompt = f"""You are a roofing expert AI assistant for Elev8ted Roofs. Analyze this roof estimate and provide insights:
 
 Address: {address}
 Roof Area: {area_sq_ft:.2f} sq ft
@@ -63,18 +218,30 @@ Provide a JSON response with:
 
 Keep recommendations practical and specific to the roof size and pitch."""
 
-            response = self.client.chat.completions.create(
+        return [
+            {"role": "system", "content": "You are an expert roofing consultant providing detailed, accurate estimates."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def _analyze_roof_description(
+        self,
+        address: str,
+        area_sq_ft: float,
+        pitch_degrees: float,
+        user_notes: Optional[str]
+    ) -> Dict[str, any]:
+        """Run the roof analysis prompt against the model."""
+        try:
+            response = await self.create_chat_completion(
                 model=settings.openai_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert roofing consultant providing detailed, accurate estimates."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._analysis_messages(address, area_sq_ft, pitch_degrees, user_notes),
                 response_format={"type": "json_object"},
                 temperature=0.7,
                 max_tokens=800
             )
 
-            ai_response = json.loads(response.choices[0].message.content)
+            with span("json_parse"):
+                ai_response = json.loads(response.choices[0].message.content)
 
             return {
                 "success": True,
@@ -89,6 +256,91 @@ Keep recommendations practical and specific to the roof size and pitch."""
                 "confidence": 0.0
             }
 
+    async def stream_roof_analysis(
+        self,
+        address: str,
+        area_sq_ft: float,
+        pitch_degrees: float,
+        user_notes: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze_roof_description.
+
+        Scalar fields are reported as soon as their value is complete, and
+        list fields (recommendations, materials, considerations) one element
+        at a time. Cached analyses are replayed the same way.
+
+        Args:
+            address: Property address
+            area_sq_ft: Calculated roof area
+            pitch_degrees: Estimated pitch
+            user_notes: Optional user-provided notes or observations
+            bypass_cache: Skip the cache lookup (the fresh result is still cached)
+
+        Yields:
+            Events {"event": "field" | "item" | "done" | "error", "data": ...};
+            "done" carries the same dict analyze_roof_description returns
+        """
+        if not self.is_configured():
+            yield {"event": "error", "data": {
+                "success": False,
+                "error": "OpenAI API key not configured",
+                "recommendations": ["Configure OpenAI API key to enable AI insights"],
+                "confidence": 0.0
+            }}
+            return
+
+        key = analysis_cache.make_key(address, area_sq_ft, pitch_degrees, user_notes)
+        if settings.analysis_cache_enabled and not bypass_cache:
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                for name, value in cached.items():
+                    if name == "success":
+                        continue
+                    if isinstance(value, list):
+                        for index, item in enumerate(value):
+                            yield {"event": "item", "data": {"key": name, "index": index, "value": item}}
+                    else:
+                        yield {"event": "field", "data": {"key": name, "value": value}}
+                yield {"event": "done", "data": {**cached, "cached": True}}
+                return
+
+        parser = IncrementalJSONParser()
+        text = []
+        try:
+            async for fragment in self.stream_chat_completion(
+                model=settings.openai_model,
+                messages=self._analysis_messages(address, area_sq_ft, pitch_degrees, user_notes),
+                response_format={"type": "json_object"},
+                temperature=0.7,
+                max_tokens=800
+            ):
+                text.append(fragment)
+                for event in parser.feed(fragment):
+                    if event["type"] == "item":
+                        yield {"event": "item", "data": {
+                            "key": event["key"], "index": event["index"], "value": event["value"]
+                        }}
+                    elif not isinstance(event["value"], list):
+                        # List fields were already sent element by element
+                        yield {"event": "field", "data": {"key": event["key"], "value": event["value"]}}
+
+            result = {"success": True, **json.loads("".join(text))}
+        except Exception as e:
+            yield {"event": "error", "data": {
+                "success": False,
+                "error": f"AI analysis failed: {str(e)}",
+                "recommendations": ["Manual review recommended"],
+                "confidence": 0.0
+            }}
+            return
+
+        if settings.analysis_cache_enabled:
+            analysis_cache.set(key, result)
+        yield {"event": "done", "data": result}
+
+    @timed
     async def detect_roof_damage(
         self,
         image_description: str,
@@ -126,7 +378,7 @@ Provide JSON with:
 5. "estimated_repair_cost_multiplier": 1.0 to 2.0 (how much repairs add to base cost)
 6. "confidence": 0-1 confidence score"""
 
-            response = self.client.chat.completions.create(
+            response = await self.create_chat_completion(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system", "content": "You are a roof damage assessment expert."},
@@ -137,7 +389,8 @@ Provide JSON with:
                 max_tokens=500
             )
 
-            return json.loads(response.choices[0].message.content)
+            with span("json_parse"):
+                return json.loads(response.choices[0].message.content)
 
         except Exception as e:
             return {
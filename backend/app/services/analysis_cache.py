@@ -0,0 +1,115 @@
+"""Cache of AI roof analyses keyed on address and bucketed measurements."""
+from typing import Dict, Hashable, Optional, Tuple
+import hashlib
+import re
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.geocode_cache import normalize_address
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def bucket(value: float, size: float) -> float:
+    """
+    Snap a value to the nearest multiple of a bucket size.
+
+    Args:
+        value: Measured value
+        size: Bucket width (0 disables bucketing)
+
+    Returns:
+        Bucket center
+    """
+    if size <= 0:
+        return value
+    return round(round(value / size) * size, 6)
+
+
+def notes_digest(user_notes: Optional[str]) -> str:
+    """
+    Hash user notes, ignoring case and whitespace differences.
+
+    Args:
+        user_notes: Free-form notes, possibly empty
+
+    Returns:
+        Short hex digest ("" when there are no notes)
+    """
+    text = _WHITESPACE.sub(" ", (user_notes or "").strip().lower())
+    if not text:
+        return ""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """
+    In-memory TTL cache of successful roof analyses.
+
+    Requests whose address normalizes the same and whose area and pitch fall
+    in the same buckets share an entry, since the model's answer would not
+    meaningfully differ.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, area_bucket: float, pitch_bucket: float):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum cached analyses
+            ttl_seconds: Lifetime of a cached analysis
+            area_bucket: Area bucket width in square feet
+            pitch_bucket: Pitch bucket width in degrees
+        """
+        self.area_bucket = area_bucket
+        self.pitch_bucket = pitch_bucket
+        self.results = TTLCache(max_entries, ttl_seconds)
+
+    def make_key(
+        self,
+        address: str,
+        area_sq_ft: float,
+        pitch_degrees: float,
+        user_notes: Optional[str] = None
+    ) -> Tuple[Hashable, ...]:
+        """
+        Build the cache key for an analysis request.
+
+        Args:
+            address: Property address
+            area_sq_ft: Roof area
+            pitch_degrees: Roof pitch
+            user_notes: Optional user notes
+
+        Returns:
+            Hashable key
+        """
+        return (
+            normalize_address(address),
+            bucket(area_sq_ft, self.area_bucket),
+            bucket(pitch_degrees, self.pitch_bucket),
+            notes_digest(user_notes)
+        )
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Return a cached analysis, or None on a miss."""
+        return self.results.get(key)
+
+    def set(self, key: Hashable, result: Dict) -> None:
+        """Store a successful analysis."""
+        self.results.set(key, result)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        return self.results.stats
+
+
+analysis_cache = AnalysisCache(
+    max_entries=settings.analysis_cache_max_entries,
+    ttl_seconds=settings.analysis_cache_ttl_seconds,
+    area_bucket=settings.analysis_cache_area_bucket,
+    pitch_bucket=settings.analysis_cache_pitch_bucket
+)
+metrics.register_cache("analysis", lambda: analysis_cache.stats)
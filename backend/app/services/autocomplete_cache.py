@@ -0,0 +1,175 @@
+"""Prefix-aware cache for address autocomplete predictions."""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import re
+import time
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+# Google Places Autocomplete returns at most this many predictions
+GOOGLE_MAX_PREDICTIONS = 5
+
+_WHITESPACE = re.compile(r"\s+")
+_DESCRIPTION_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase a query and collapse its whitespace."""
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+
+def prediction_matches(description: str, query: str) -> bool:
+    """
+    Check whether a cached prediction still matches a longer query.
+
+    Each query token must be a prefix of the description token at the same
+    position, so "123 main st s" matches "123 Main Street South, Austin, TX".
+
+    Args:
+        description: Prediction description from Google
+        query: Normalized query
+
+    Returns:
+        True if the prediction is consistent with the query
+    """
+    words = [w for w in _DESCRIPTION_SEPARATORS.split(description.lower()) if w]
+    tokens = query.split(" ")
+    if len(tokens) > len(words):
+        return False
+    return all(word.startswith(token) for token, word in zip(tokens, words))
+
+
+class _TrieNode:
+    """Node of the prefix trie; entry is (expires_at, predictions)."""
+
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.entry: Optional[Tuple[float, List[Dict[str, str]]]] = None
+
+
+class AutocompleteCache:
+    """
+    Trie of cached autocomplete answers, one trie per place-type scope.
+
+    An exact hit returns the cached predictions. Otherwise, if a shorter
+    prefix of the query was answered with fewer than the provider's maximum
+    number of predictions, that answer was exhaustive and the predictions
+    for the longer query can be filtered from it locally.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum cached queries before LRU eviction
+            ttl_seconds: Lifetime of a cached answer
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._roots: Dict[str, _TrieNode] = {}
+        self._lru: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def lookup(self, scope: str, query: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Answer a query from the cache if possible.
+
+        Args:
+            scope: Place types the query was made with
+            query: Raw user input
+
+        Returns:
+            List of {description, place_id} dicts, or None on a miss
+        """
+        query = normalize_query(query)
+        node = self._roots.get(scope)
+        now = time.monotonic()
+        exhaustive: Optional[List[Dict[str, str]]] = None
+
+        depth = 0
+        while node is not None:
+            if node.entry is not None and node.entry[0] >= now:
+                predictions = node.entry[1]
+                if depth == len(query):
+                    self._lru.move_to_end((scope, query))
+                    self.hits += 1
+                    return predictions
+                if len(predictions) < GOOGLE_MAX_PREDICTIONS:
+                    exhaustive = predictions
+            if depth == len(query):
+                break
+            node = node.children.get(query[depth])
+            depth += 1
+
+        if exhaustive is not None:
+            filtered = [p for p in exhaustive if prediction_matches(p["description"], query)]
+            # An empty local answer may just mean the provider matches more loosely
+            if filtered:
+                self.prefix_hits += 1
+                return filtered
+
+        self.misses += 1
+        return None
+
+    def set(self, scope: str, query: str, predictions: List[Dict[str, str]]) -> None:
+        """
+        Cache the provider's answer for a query.
+
+        Args:
+            scope: Place types the query was made with
+            query: Raw user input
+            predictions: List of {description, place_id} dicts
+        """
+        query = normalize_query(query)
+        node = self._roots.setdefault(scope, _TrieNode())
+        for char in query:
+            node = node.children.setdefault(char, _TrieNode())
+        node.entry = (time.monotonic() + self.ttl_seconds, predictions)
+
+        self._lru[(scope, query)] = None
+        self._lru.move_to_end((scope, query))
+        while len(self._lru) > self.max_entries:
+            (old_scope, old_query), _ = self._lru.popitem(last=False)
+            self._remove(old_scope, old_query)
+
+    def _remove(self, scope: str, query: str) -> None:
+        """Drop an entry and prune trie nodes left without entries or children."""
+        node = self._roots.get(scope)
+        path = []
+        for char in query:
+            if node is None:
+                return
+            path.append((node, char))
+            node = node.children.get(char)
+        if node is None:
+            return
+
+        node.entry = None
+        for parent, char in reversed(path):
+            child = parent.children[char]
+            if child.entry is not None or child.children:
+                break
+            del parent.children[char]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Exact hit, prefix hit and miss counters plus current size."""
+        return {
+            "size": len(self._lru),
+            "hits": self.hits,
+            "prefix_hits": self.prefix_hits,
+            "misses": self.misses
+        }
+
+
+autocomplete_cache = AutocompleteCache(
+    max_entries=settings.autocomplete_cache_max_entries,
+    ttl_seconds=settings.autocomplete_cache_ttl_seconds
+)
+metrics.register_cache("autocomplete", lambda: autocomplete_cache.stats)
@@ -0,0 +1,144 @@
+"""Roof detection result cache keyed by image fingerprint."""
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+import hashlib
+import io
+import numpy as np
+from PIL import Image
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ImageFingerprint(NamedTuple):
+    """Exact and perceptual identity of an image."""
+    sha256: str
+    dhash: int
+
+
+def difference_hash(image_bytes: bytes, hash_size: int = 8) -> int:
+    """
+    Compute a 64-bit difference hash (dHash) of an image.
+
+    Re-encoding, recompression or mild resizing leave the hash unchanged or
+    within a few bits.
+
+    Args:
+        image_bytes: Raw image bytes
+        hash_size: Hash grid size; the hash has hash_size**2 bits
+
+    Returns:
+        Hash as an integer
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def image_fingerprint(image_bytes: bytes) -> ImageFingerprint:
+    """
+    Fingerprint an image for cache lookups.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        SHA-256 digest and difference hash
+    """
+    return ImageFingerprint(hashlib.sha256(image_bytes).hexdigest(), difference_hash(image_bytes))
+
+
+class DetectionCache:
+    """
+    Cache of successful detection results.
+
+    Lookups first try the exact image digest, then fall back to any live
+    entry in the same scope whose perceptual hash is within a small Hamming
+    distance, which catches the same image re-encoded by a client. Scopes
+    must include the view's location: different roofs can be only a few
+    bits apart.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_distance: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum cached results
+            ttl_seconds: Lifetime of a cached result
+            max_distance: Maximum Hamming distance for a perceptual match
+        """
+        self.max_distance = max_distance
+        self.results = TTLCache(max_entries, ttl_seconds)
+        self._perceptual: Dict[Hashable, List[Tuple[int, Hashable]]] = {}
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: ImageFingerprint, scope: Hashable) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            fingerprint: Fingerprint of the image
+            scope: Parameters the result depends on (location, dimensions, detector)
+
+        Returns:
+            Cached response dict, or None on a miss
+        """
+        result = self.results.get((fingerprint.sha256, scope))
+        if result is not None:
+            self.hits += 1
+            return result
+
+        live = []
+        match = None
+        for dhash, key in self._perceptual.get(scope, []):
+            if key not in self.results:
+                continue
+            live.append((dhash, key))
+            if match is None and bin(dhash ^ fingerprint.dhash).count("1") <= self.max_distance:
+                match = key
+        self._perceptual[scope] = live
+
+        result = self.results.get(match) if match is not None else None
+        if result is None:
+            self.misses += 1
+            return None
+        self.perceptual_hits += 1
+        return result
+
+    def set(self, fingerprint: ImageFingerprint, scope: Hashable, result: Dict) -> None:
+        """
+        Store a detection result.
+
+        Args:
+            fingerprint: Fingerprint of the image
+            scope: Parameters the result depends on (location, dimensions, detector)
+            result: Response dict
+        """
+        key = (fingerprint.sha256, scope)
+        if key not in self.results:
+            entries = self._perceptual.setdefault(scope, [])
+            entries.append((fingerprint.dhash, key))
+            if len(entries) > self.results.max_entries:
+                del entries[0]
+        self.results.set(key, result)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Exact hit, perceptual hit and miss counters plus current size."""
+        return {
+            "size": len(self.results),
+            "hits": self.hits,
+            "perceptual_hits": self.perceptual_hits,
+            "misses": self.misses
+        }
+
+
+detection_cache = DetectionCache(
+    max_entries=settings.detection_cache_max_entries,
+    ttl_seconds=settings.detection_cache_ttl_seconds,
+    max_distance=settings.detection_cache_max_distance
+)
+metrics.register_cache("detection", lambda: detection_cache.stats)
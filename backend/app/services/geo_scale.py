@@ -0,0 +1,49 @@
+"""Ground resolution of Web Mercator map tiles."""
+from typing import Union
+import numpy as np
+
+
+# Ground meters per pixel at the equator at zoom 0 (256px world, WGS84 radius)
+METERS_PER_PIXEL_Z0 = 2 * np.pi * 6378137.0 / 256
+FEET_PER_METER = 3.280839895
+
+# cos(latitude) sampled every 0.01 degrees; linear interpolation between
+# samples is accurate to about 1e-8, far below imagery error
+_COS_LAT_STEP = 0.01
+_COS_LAT_TABLE = np.cos(np.radians(np.arange(-90.0, 90.0 + _COS_LAT_STEP / 2, _COS_LAT_STEP)))
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def cos_latitude(latitude: ArrayLike) -> ArrayLike:
+    """
+    Look up cos(latitude) from the precomputed table.
+
+    Args:
+        latitude: Latitude in degrees (scalar or array), clamped to [-90, 90]
+
+    Returns:
+        Cosine of the latitude
+    """
+    position = (np.clip(latitude, -90.0, 90.0) + 90.0) / _COS_LAT_STEP
+    index = np.minimum(np.floor(position).astype(np.int64), len(_COS_LAT_TABLE) - 2)
+    fraction = position - index
+    value = _COS_LAT_TABLE[index] * (1.0 - fraction) + _COS_LAT_TABLE[index + 1] * fraction
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def feet_per_pixel(latitude: ArrayLike, zoom: ArrayLike, scale: ArrayLike = 1) -> ArrayLike:
+    """
+    Ground distance covered by one image pixel in a Web Mercator map image.
+
+    Args:
+        latitude: Latitude of the image center in degrees
+        zoom: Map zoom level
+        scale: Static Maps scale parameter (2 for high-DPI images)
+
+    Returns:
+        Feet per pixel (scalar or array, matching the inputs)
+    """
+    meters = METERS_PER_PIXEL_Z0 * cos_latitude(latitude) / (np.exp2(zoom) * scale)
+    value = meters * FEET_PER_METER
+    return float(value) if np.ndim(value) == 0 else value
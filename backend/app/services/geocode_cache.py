@@ -0,0 +1,190 @@
+"""Geocode result cache backed by memory and an on-disk SQLite store."""
+from typing import Dict, Optional
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+# USPS-style abbreviations so "123 North Main Street" and "123 n main st" share a key
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "av": "ave", "road": "rd", "drive": "dr",
+    "boulevard": "blvd", "lane": "ln", "court": "ct", "place": "pl",
+    "terrace": "ter", "circle": "cir", "highway": "hwy", "parkway": "pkwy",
+    "square": "sq", "trail": "trl", "expressway": "expy", "freeway": "fwy",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+    "apartment": "unit", "apt": "unit", "suite": "unit", "ste": "unit",
+    "building": "bldg", "floor": "fl", "room": "rm"
+}
+
+# Writes between deletions of expired and excess rows on disk
+PRUNE_INTERVAL = 100
+
+_PUNCTUATION = re.compile(r"[.,;]")
+_UNIT_HASH = re.compile(r"#\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address for use as a cache key.
+
+    Args:
+        address: Free-form address as typed by the user
+
+    Returns:
+        Lowercased address with punctuation and whitespace collapsed and
+        street suffixes, directionals and unit designators abbreviated
+    """
+    text = _PUNCTUATION.sub(" ", address.lower())
+    text = _UNIT_HASH.sub(" unit ", text)
+    tokens = [ADDRESS_ABBREVIATIONS.get(token, token) for token in _WHITESPACE.split(text.strip())]
+
+    # "unit unit 5" can arise from inputs such as "Apt #5"
+    collapsed = []
+    for token in tokens:
+        if token == "unit" and collapsed and collapsed[-1] == "unit":
+            continue
+        collapsed.append(token)
+    return " ".join(collapsed)
+
+
+class GeocodeCache:
+    """Two-level geocode cache: in-memory LRU with TTL in front of SQLite."""
+
+    def __init__(
+        self,
+        db_path: str,
+        memory_entries: int,
+        memory_ttl_seconds: float,
+        disk_ttl_seconds: float,
+        disk_entries: int
+    ):
+        """
+        Initialize the cache; the SQLite file is opened on first use.
+
+        Args:
+            db_path: Path of the SQLite database file
+            memory_entries: Maximum entries held in memory
+            memory_ttl_seconds: Lifetime of in-memory entries
+            disk_ttl_seconds: Lifetime of on-disk entries
+            disk_entries: Maximum entries kept on disk
+        """
+        self.db_path = db_path
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.disk_entries = disk_entries
+        self.memory = TTLCache(memory_entries, memory_ttl_seconds)
+        self.disk_hits = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "key TEXT PRIMARY KEY, formatted_address TEXT NOT NULL, "
+                "latitude REAL NOT NULL, longitude REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS geocode_created_at ON geocode (created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _read(self, key: str) -> Optional[Dict]:
+        """Read a non-expired row from disk."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT formatted_address, latitude, longitude FROM geocode "
+                "WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.disk_ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"formatted_address": row[0], "latitude": row[1], "longitude": row[2]}
+
+    def _write(self, key: str, value: Dict) -> None:
+        """Upsert a row on disk, pruning the table every PRUNE_INTERVAL writes."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)",
+                (key, value["formatted_address"], value["latitude"], value["longitude"], time.time())
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % PRUNE_INTERVAL == 0:
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Delete expired rows, then the oldest rows beyond disk_entries."""
+        conn.execute("DELETE FROM geocode WHERE created_at < ?", (time.time() - self.disk_ttl_seconds,))
+        conn.execute(
+            "DELETE FROM geocode WHERE key IN "
+            "(SELECT key FROM geocode ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_entries,)
+        )
+        conn.commit()
+
+    async def get(self, address: str) -> Optional[Dict]:
+        """
+        Look up a cached geocode result.
+
+        Args:
+            address: Address as submitted by the client
+
+        Returns:
+            Dict with formatted_address, latitude and longitude, or None on a miss
+        """
+        key = normalize_address(address)
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        value = await asyncio.to_thread(self._read, key)
+        if value is not None:
+            self.disk_hits += 1
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, address: str, value: Dict) -> None:
+        """
+        Store a successful geocode result in memory and on disk.
+
+        Args:
+            address: Address as submitted by the client
+            value: Dict with formatted_address, latitude and longitude
+        """
+        key = normalize_address(address)
+        self.memory.set(key, value)
+        await asyncio.to_thread(self._write, key, value)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters for both cache levels."""
+        memory = self.memory.stats
+        return {
+            "memory_size": memory["size"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": memory["misses"] - self.disk_hits
+        }
+
+
+geocode_cache = GeocodeCache(
+    db_path=os.path.join(settings.cache_dir, "geocode.sqlite3"),
+    memory_entries=settings.geocode_cache_max_entries,
+    memory_ttl_seconds=settings.geocode_cache_memory_ttl_seconds,
+    disk_ttl_seconds=settings.geocode_cache_ttl_seconds,
+    disk_entries=settings.geocode_cache_disk_max_entries
+)
+metrics.register_cache("geocode", lambda: geocode_cache.stats)
@@ -0,0 +1,169 @@
+"""Image preparation for vision model calls."""
+from typing import NamedTuple, Tuple
+import base64
+import binascii
+import io
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.core.metrics import timed
+
+
+class PreparedImage(NamedTuple):
+    """
+    Image as sent to the vision model, plus the mapping back to the client's pixel space.
+
+    A point (x, y) in the prepared image maps to
+    (offset_x + x * scale_x, offset_y + y * scale_y) in the client's space.
+    """
+    data_url: str
+    width: int
+    height: int
+    offset_x: float
+    offset_y: float
+    scale_x: float
+    scale_y: float
+    target_width: int
+    target_height: int
+
+    def map_point(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        Map a point from prepared-image pixels to the client's image pixels.
+
+        Args:
+            x: X coordinate returned by the model
+            y: Y coordinate returned by the model
+
+        Returns:
+            (x, y) clamped to the client's image bounds
+        """
+        mapped_x = self.offset_x + x * self.scale_x
+        mapped_y = self.offset_y + y * self.scale_y
+        return (
+            round(min(max(mapped_x, 0.0), self.target_width), 1),
+            round(min(max(mapped_y, 0.0), self.target_height), 1)
+        )
+
+
+def decode_data_url(image: str) -> bytes:
+    """
+    Decode a base64 image, with or without a ``data:`` URL prefix.
+
+    Args:
+        image: Base64 string or data URL
+
+    Returns:
+        Raw image bytes
+
+    Raises:
+        ValueError: If the payload is not valid base64
+    """
+    if image.startswith("data:"):
+        image = image.split(",", 1)[-1]
+    try:
+        return base64.b64decode(image, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 image: {e}")
+
+
+def _sniff_content_type(image_bytes: bytes) -> str:
+    """Guess the MIME type from the file signature."""
+    if image_bytes.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if image_bytes.startswith(b"RIFF") and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
+def passthrough_image(image_bytes: bytes, target_width: int, target_height: int) -> PreparedImage:
+    """
+    Send the original image unchanged; model coordinates are used as-is.
+
+    Args:
+        image_bytes: Raw image bytes
+        target_width: Width of the client's coordinate space
+        target_height: Height of the client's coordinate space
+
+    Returns:
+        Prepared image with an identity mapping
+    """
+    data_url = f"data:{_sniff_content_type(image_bytes)};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+    return PreparedImage(data_url, target_width, target_height, 0.0, 0.0, 1.0, 1.0, target_width, target_height)
+
+
+def normalize_contrast(pixels: np.ndarray, low_percentile: float = 2.0, high_percentile: float = 98.0) -> np.ndarray:
+    """
+    Stretch each channel so its percentile range covers 0-255.
+
+    Args:
+        pixels: HxWx3 uint8 array
+        low_percentile: Percentile mapped to 0
+        high_percentile: Percentile mapped to 255
+
+    Returns:
+        Contrast-normalized uint8 array
+    """
+    flat = pixels.reshape(-1, pixels.shape[-1]).astype(np.float32)
+    low, high = np.percentile(flat, [low_percentile, high_percentile], axis=0)
+    span = np.maximum(high - low, 1.0)
+    stretched = (pixels.astype(np.float32) - low) * (255.0 / span)
+    return np.clip(stretched, 0, 255).astype(np.uint8)
+
+
+@timed
+def preprocess_for_vision(image_bytes: bytes, target_width: int, target_height: int) -> PreparedImage:
+    """
+    Center-crop, downscale and recompress an image to cut vision tokens.
+
+    Satellite images are centered on the geocoded point, so the crop is
+    taken around the image center.
+
+    Args:
+        image_bytes: Raw image bytes (PNG, JPEG, ...)
+        target_width: Width of the client's coordinate space
+        target_height: Height of the client's coordinate space
+
+    Returns:
+        Prepared JPEG image and its mapping back to the client's space
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    original_width, original_height = image.size
+
+    # Center crop around the geocoded point
+    fraction = min(max(settings.vision_crop_fraction, 0.1), 1.0)
+    crop_width = max(1, round(original_width * fraction))
+    crop_height = max(1, round(original_height * fraction))
+    left = (original_width - crop_width) // 2
+    top = (original_height - crop_height) // 2
+    image = image.crop((left, top, left + crop_width, top + crop_height))
+
+    # Downscale so the longest side fits the limit
+    longest = max(crop_width, crop_height)
+    if longest > settings.vision_max_side:
+        ratio = settings.vision_max_side / longest
+        image = image.resize(
+            (max(1, round(crop_width * ratio)), max(1, round(crop_height * ratio))),
+            Image.LANCZOS
+        )
+
+    if settings.vision_normalize_contrast:
+        image = Image.fromarray(normalize_contrast(np.asarray(image)))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=settings.vision_jpeg_quality, optimize=True)
+    data_url = f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+    # Prepared pixels -> original pixels -> client's coordinate space
+    to_target_x = target_width / original_width
+    to_target_y = target_height / original_height
+    return PreparedImage(
+        data_url=data_url,
+        width=image.width,
+        height=image.height,
+        offset_x=left * to_target_x,
+        offset_y=top * to_target_y,
+        scale_x=crop_width / image.width * to_target_x,
+        scale_y=crop_height / image.height * to_target_y,
+        target_width=target_width,
+        target_height=target_height
+    )
@@ -0,0 +1,288 @@
+"""Local roof outline detector using classical computer vision."""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import io
+import numpy as np
+from PIL import Image
+import shapely
+from shapely.geometry import MultiPoint, Polygon
+from shapely.geometry.polygon import orient
+from app.core.config import settings
+from app.core.metrics import timed
+
+
+# Longest side of the downscaled working image
+WORK_SIZE = 256
+# Half-size of the central window the roof color is sampled from
+SEED_RADIUS = 12
+# Pixels on each side of an edge that the box blur and Sobel kernel mark as
+# edge; the region is grown back over this band after segmentation
+EDGE_BAND = 2
+
+
+def _shift_or(mask: np.ndarray) -> np.ndarray:
+    """Binary dilation with a 3x3 cross."""
+    out = mask.copy()
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    out[:, 1:] |= mask[:, :-1]
+    out[:, :-1] |= mask[:, 1:]
+    return out
+
+
+def _shift_or_square(mask: np.ndarray) -> np.ndarray:
+    """Binary dilation with a 3x3 square."""
+    out = mask.copy()
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    rows = out.copy()
+    out[:, 1:] |= rows[:, :-1]
+    out[:, :-1] |= rows[:, 1:]
+    return out
+
+
+def _shift_and(mask: np.ndarray) -> np.ndarray:
+    """Binary erosion with a 3x3 cross (pixels outside the image count as set)."""
+    out = mask.copy()
+    out[1:, :] &= mask[:-1, :]
+    out[:-1, :] &= mask[1:, :]
+    out[:, 1:] &= mask[:, :-1]
+    out[:, :-1] &= mask[:, 1:]
+    return out
+
+
+def _grow(seed: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    """Flood-fill from seed pixels through allowed pixels."""
+    region = seed & allowed
+    while True:
+        grown = _shift_or(region) & allowed
+        if np.array_equal(grown, region):
+            return region
+        region = grown
+
+
+def _box_blur(values: np.ndarray) -> np.ndarray:
+    """3x3 mean filter over the first two axes."""
+    padded = np.pad(values, [(1, 1), (1, 1)] + [(0, 0)] * (values.ndim - 2), mode="edge")
+    height, width = values.shape[:2]
+    total = np.zeros_like(values, dtype=np.float32)
+    for dy in range(3):
+        for dx in range(3):
+            total += padded[dy:dy + height, dx:dx + width]
+    return total / 9.0
+
+
+def _local_mean(values: np.ndarray, mask: np.ndarray, passes: int) -> np.ndarray:
+    """Mean of the masked pixels around each pixel, over (2 * passes + 1)-wide windows."""
+    weight = mask.astype(np.float32)
+    total = values * weight[..., None]
+    for _ in range(passes):
+        total = _box_blur(total)
+        weight = _box_blur(weight)
+    return total / np.maximum(weight, 1e-6)[..., None]
+
+
+def _gradient_magnitude(gray: np.ndarray) -> np.ndarray:
+    """Sobel gradient magnitude."""
+    p = np.pad(gray, 1, mode="edge")
+    gx = (p[:-2, 2:] + 2 * p[1:-1, 2:] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[1:-1, :-2] + p[2:, :-2])
+    gy = (p[2:, :-2] + 2 * p[2:, 1:-1] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[:-2, 1:-1] + p[:-2, 2:])
+    return np.hypot(gx, gy)
+
+
+def _segment(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Segment the roof region containing the image center.
+
+    Args:
+        pixels: HxWx3 float32 RGB array
+
+    Returns:
+        Boolean region mask and gradient magnitude
+    """
+    height, width = pixels.shape[:2]
+    smooth = _box_blur(pixels)
+    gradient = _gradient_magnitude(smooth.mean(axis=2))
+
+    # The median over a central window ignores skylights or vents at the exact center
+    cy, cx = height // 2, width // 2
+    window = (slice(cy - SEED_RADIUS, cy + SEED_RADIUS + 1), slice(cx - SEED_RADIUS, cx + SEED_RADIUS + 1))
+    patch = smooth[window].reshape(-1, 3)
+    seed_color = np.median(patch, axis=0)
+    patch_distance = np.linalg.norm(patch - seed_color, axis=1)
+    spread = float(np.median(patch_distance))
+
+    # Pixels similar in color to the roof and not on a strong edge
+    distance = np.linalg.norm(smooth - seed_color, axis=2)
+    edge_threshold = max(float(np.percentile(gradient, 85)), 1.0)
+    allowed = (distance < max(18.0, 3.0 * spread)) & (gradient < edge_threshold)
+
+    seed = np.zeros_like(allowed)
+    seed[window] = True
+    region = _grow(seed, allowed)
+
+    # The edge test also rejected the roof's own rim: grow back over edge
+    # pixels whose own color is closer to the roof than to what lies beyond
+    on_edge = gradient >= edge_threshold
+    beyond = ~region & ~on_edge
+    background = _local_mean(pixels, beyond, EDGE_BAND + 1)
+    roof_like = np.linalg.norm(pixels - seed_color, axis=2) < np.linalg.norm(pixels - background, axis=2)
+    for _ in range(EDGE_BAND + 1):
+        region |= _shift_or_square(region) & on_edge & roof_like
+
+    # Close small gaps, then fill holes (skylights, vents, shadows)
+    region = _shift_and(_shift_and(_shift_or(_shift_or(region))))
+    border = np.zeros_like(region)
+    border[0, :] = border[-1, :] = border[:, 0] = border[:, -1] = True
+    outside = _grow(border, ~region)
+    return ~outside, gradient
+
+
+def _outline(region: np.ndarray) -> Optional[Polygon]:
+    """
+    Trace a simplified polygon around a region mask.
+
+    The polygon follows the outer edges of the boundary pixels (pixel
+    (x, y) covers [x, x+1) x [y, y+1)), not their centers, so it encloses
+    the whole region.
+    """
+    boundary = region & ~_shift_and(region)
+    ys, xs = np.nonzero(boundary)
+    if len(xs) < 3:
+        return None
+
+    corners = np.concatenate([np.column_stack([xs + dx, ys + dy]) for dx in (0, 1) for dy in (0, 1)])
+    hull = shapely.concave_hull(MultiPoint(np.unique(corners, axis=0).astype(float)), ratio=0.2)
+    if not isinstance(hull, Polygon) or hull.area <= 0:
+        return None
+
+    tolerance = max(1.0, 0.04 * np.sqrt(hull.area))
+    polygon = hull.simplify(tolerance, preserve_topology=True)
+    if not isinstance(polygon, Polygon) or polygon.is_empty:
+        return None
+    return polygon
+
+
+def _score(region: np.ndarray, polygon: Polygon, gradient: np.ndarray) -> float:
+    """Heuristic 0-1 confidence that the polygon is a single roof."""
+    height, width = region.shape
+    area_fraction = polygon.area / float(width * height)
+    if area_fraction < 0.01 or area_fraction > 0.8:
+        return 0.0
+    size_score = 1.0 if 0.03 <= area_fraction <= 0.5 else 0.5
+
+    solidity = polygon.area / max(polygon.convex_hull.area, 1e-9)
+    solidity_score = float(np.clip((solidity - 0.6) / 0.35, 0.0, 1.0))
+
+    # Roof edges should sit on strong image gradients
+    boundary = _shift_or(region) & ~region
+    edge_ratio = gradient[boundary].mean() / max(float(gradient.mean()), 1e-6)
+    edge_score = float(np.clip((edge_ratio - 1.0) / 2.0, 0.0, 1.0))
+
+    vertex_count = len(polygon.exterior.coords) - 1
+    vertex_score = 1.0 if 4 <= vertex_count <= 10 else 0.7
+
+    # Leaking into the image border usually means ground or road was included
+    touches_border = region[0, :].any() or region[-1, :].any() or region[:, 0].any() or region[:, -1].any()
+    border_score = 0.4 if touches_border else 1.0
+
+    score = (0.3 * size_score + 0.35 * solidity_score + 0.35 * edge_score) * vertex_score * border_score
+    return round(float(np.clip(score, 0.0, 1.0)), 2)
+
+
+def _roof_type(polygon: Polygon) -> str:
+    """Classify the outline shape."""
+    vertex_count = len(polygon.exterior.coords) - 1
+    solidity = polygon.area / max(polygon.convex_hull.area, 1e-9)
+    if vertex_count == 4 and solidity > 0.95:
+        return "rectangular"
+    if vertex_count == 6 and solidity < 0.95:
+        return "L-shaped"
+    return "complex"
+
+
+def detect_roof_outline(image_bytes: bytes, target_width: int, target_height: int) -> Dict:
+    """
+    Detect the outline of the roof at the center of a satellite image.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        image_bytes: Raw image bytes
+        target_width: Width of the client's coordinate space
+        target_height: Height of the client's coordinate space
+
+    Returns:
+        Dict with points (list of (x, y) in client coordinates, clockwise on
+        screen), confidence and roof_type
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    ratio = WORK_SIZE / max(image.size)
+    if ratio < 1:
+        image = image.resize((max(1, round(image.width * ratio)), max(1, round(image.height * ratio))), Image.BILINEAR)
+    pixels = np.asarray(image, dtype=np.float32)
+
+    if min(pixels.shape[:2]) <= 2 * SEED_RADIUS + 2:
+        return {"points": [], "confidence": 0.0, "roof_type": "unknown"}
+
+    region, gradient = _segment(pixels)
+    polygon = _outline(region)
+    if polygon is None:
+        return {"points": [], "confidence": 0.0, "roof_type": "unknown"}
+
+    # Counter-clockwise in y-up coordinates is clockwise on screen (y down)
+    polygon = orient(polygon, sign=1.0)
+    scale_x = target_width / pixels.shape[1]
+    scale_y = target_height / pixels.shape[0]
+    points: List[Tuple[float, float]] = [
+        (round(x * scale_x, 1), round(y * scale_y, 1)) for x, y in polygon.exterior.coords[:-1]
+    ]
+
+    return {
+        "points": points,
+        "confidence": _score(region, polygon, gradient),
+        "roof_type": _roof_type(polygon)
+    }
+
+
+class LocalRoofDetector:
+    """Runs detect_roof_outline in a process pool off the event loop."""
+
+    def __init__(self):
+        """Initialize without starting worker processes."""
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Create the process pool on first use; None means run in a thread."""
+        if self._executor is None and settings.local_detector_workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=settings.local_detector_workers)
+        return self._executor
+
+    @timed
+    async def detect(self, image_bytes: bytes, target_width: int, target_height: int) -> Dict:
+        """
+        Detect a roof outline without blocking the event loop.
+
+        Args:
+            image_bytes: Raw image bytes
+            target_width: Width of the client's coordinate space
+            target_height: Height of the client's coordinate space
+
+        Returns:
+            Dict with points, confidence and roof_type
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(detect_roof_outline, image_bytes, target_width, target_height)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, detect_roof_outline, image_bytes, target_width, target_height)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+local_roof_detector = LocalRoofDetector()
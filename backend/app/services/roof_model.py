@@ -0,0 +1,257 @@
+"""Multi-facet roof model: per-facet pitch, overlaps and shared edges."""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import math
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point, Polygon
+from shapely.geometry.polygon import orient
+from shapely.strtree import STRtree
+from app.core.config import settings
+from app.core.metrics import timed
+from app.services.roof_service import roof_service
+
+
+Coords = Sequence[Tuple[float, float]]
+
+
+class Facet(NamedTuple):
+    """One planar roof surface in pixel coordinates."""
+    exterior: Coords
+    holes: Sequence[Coords] = ()
+    pitch_degrees: Optional[float] = None
+
+
+class SharedEdge(NamedTuple):
+    """A line shared by two facets."""
+    facets: Tuple[int, int]
+    edge_type: str  # "ridge", "hip" or "valley"
+    plan_length_ft: float
+    length_ft: float
+
+
+def _shared_lines(a: Polygon, b: Polygon, tolerance: float) -> List[LineString]:
+    """
+    Find the parts of a's outline that run along b's outline.
+
+    Each segment of a is matched on its own, so the short stubs where a turns
+    away at a corner (or where facets only touch at a point) can be dropped.
+
+    Args:
+        a: First facet
+        b: Second facet
+        tolerance: Maximum gap between the two outlines
+
+    Returns:
+        Connected shared lines
+    """
+    coords = np.asarray(a.exterior.coords)
+    segments = shapely.linestrings(np.stack([coords[:-1], coords[1:]], axis=1))
+    pieces = shapely.intersection(segments, b.exterior.buffer(tolerance, join_style="mitre"))
+    pieces = pieces[shapely.length(pieces) > 2 * tolerance]
+    if len(pieces) == 0:
+        return []
+    merged = shapely.line_merge(shapely.union_all(pieces))
+    return [part for part in shapely.get_parts(merged) if isinstance(part, LineString)]
+
+
+def _outline_corners(outline, tolerance: float) -> Tuple[Optional[STRtree], np.ndarray]:
+    """
+    Index the corners of the roof outline by convexity.
+
+    Args:
+        outline: Union of all facets (Polygon or MultiPolygon)
+        tolerance: Turns sharper than this many pixels of deviation count as corners
+
+    Returns:
+        STRtree of corner points and a matching array of True for convex,
+        False for reflex corners
+    """
+    corners = []
+    convex = []
+    for polygon in shapely.get_parts(outline):
+        ring = orient(polygon.simplify(tolerance), sign=1.0).exterior
+        coords = np.asarray(ring.coords)[:-1]
+        if len(coords) < 3:
+            continue
+        before = coords - np.roll(coords, 1, axis=0)
+        after = np.roll(coords, -1, axis=0) - coords
+        cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+        corners.extend(Point(x, y) for x, y in coords)
+        # Counter-clockwise ring: left turns are convex corners
+        convex.extend((cross > 0).tolist())
+    if not corners:
+        return None, np.zeros(0, dtype=bool)
+    return STRtree(corners), np.array(convex, dtype=bool)
+
+
+def _classify_edge(
+    line: LineString,
+    corner_tree: Optional[STRtree],
+    convex: np.ndarray,
+    tolerance: float
+) -> str:
+    """
+    Classify a shared edge from where its endpoints meet the outline.
+
+    A valley runs into a reflex (inside) corner of the outline, a hip into a
+    convex corner, and a ridge runs between interior points or gable ends.
+    """
+    if corner_tree is None:
+        return "ridge"
+    kinds = set()
+    for x, y in (line.coords[0], line.coords[-1]):
+        nearest = corner_tree.query_nearest(Point(x, y), max_distance=tolerance * 2)
+        if len(nearest):
+            kinds.add("hip" if convex[nearest[0]] else "valley")
+    if "valley" in kinds:
+        return "valley"
+    if "hip" in kinds:
+        return "hip"
+    return "ridge"
+
+
+def _sloped_length(edge_type: str, plan_length: float, pitch_degrees: float) -> float:
+    """
+    Convert a plan-view edge length to its true length.
+
+    Ridges are level. Hips and valleys use the common roofing rule for two
+    equal-pitch planes meeting at 45 degrees in plan.
+    """
+    if edge_type == "ridge":
+        return plan_length
+    rise = plan_length / math.sqrt(2) * math.tan(math.radians(pitch_degrees))
+    return math.hypot(plan_length, rise)
+
+
+class RoofModelService:
+    """Measures roofs made of several facets with individual pitches."""
+
+    @staticmethod
+    def build_polygons(facets: Sequence[Facet]) -> List[Polygon]:
+        """
+        Build valid polygons for facets, repairing self-intersections.
+
+        Args:
+            facets: Facet outlines and holes in pixel coordinates
+
+        Returns:
+            One polygon per facet (empty when the facet is degenerate)
+        """
+        polygons = []
+        for facet in facets:
+            if len(facet.exterior) < 3:
+                polygons.append(Polygon())
+                continue
+            polygon = Polygon(facet.exterior, [hole for hole in facet.holes if len(hole) >= 3])
+            if not polygon.is_valid:
+                repaired = shapely.make_valid(polygon)
+                parts = [part for part in shapely.get_parts(repaired) if isinstance(part, Polygon)]
+                polygon = max(parts, key=lambda part: part.area) if parts else Polygon()
+            polygons.append(polygon)
+        return polygons
+
+    @timed
+    def analyze(
+        self,
+        facets: Sequence[Facet],
+        scale_factor: float = 1.0,
+        building_type: str = "residential",
+        snap_tolerance: Optional[float] = None
+    ) -> Dict:
+        """
+        Measure a multi-facet roof.
+
+        Facets are indexed in an STRtree so only nearby pairs are compared;
+        hand-drawn edges within the snap tolerance of each other count as shared.
+
+        Args:
+            facets: Facet outlines, holes and optional pitches in pixel coordinates
+            scale_factor: Feet per pixel
+            building_type: Building type for facets without an explicit pitch
+            snap_tolerance: Maximum gap in pixels between shared edges
+
+        Returns:
+            Dict with per-facet measurements, shared edges, overlaps and totals
+        """
+        tolerance = settings.roof_model_snap_tolerance if snap_tolerance is None else snap_tolerance
+        polygons = self.build_polygons(facets)
+        geometries = np.array(polygons, dtype=object)
+        shapely.prepare(geometries)
+
+        plan_areas = shapely.area(geometries) * scale_factor ** 2
+        default_pitch = roof_service.estimate_roof_pitch(round(float(plan_areas.sum()), 2), building_type)
+        pitches = np.array([
+            default_pitch if facet.pitch_degrees is None else facet.pitch_degrees for facet in facets
+        ], dtype=np.float64)
+        sloped_areas = plan_areas / np.cos(np.radians(pitches))
+
+        facet_results = [
+            {
+                "index": i,
+                "plan_area_sq_ft": round(float(plan_areas[i]), 2),
+                "area_sq_ft": round(float(sloped_areas[i]), 2),
+                "pitch_degrees": round(float(pitches[i]), 1),
+                "pitch_multiplier": roof_service.calculate_pitch_multiplier(float(pitches[i]))
+            }
+            for i in range(len(polygons))
+        ]
+
+        outline = shapely.union_all([
+            polygon.buffer(tolerance, join_style="mitre") for polygon in polygons if not polygon.is_empty
+        ]).buffer(-tolerance, join_style="mitre")
+        corner_tree, convex = _outline_corners(outline, tolerance)
+
+        # Candidate pairs within the snap tolerance, each unordered pair once
+        tree = STRtree(geometries)
+        left, right = tree.query(geometries, predicate="dwithin", distance=tolerance)
+        pairs = (left < right)
+
+        edges: List[SharedEdge] = []
+        overlaps = []
+        for i, j in zip(left[pairs].tolist(), right[pairs].tolist()):
+            a, b = polygons[i], polygons[j]
+            overlap = a.intersection(b).area
+            if overlap > 0.01 * min(a.area, b.area):
+                overlaps.append({"facets": [i, j], "area_sq_ft": round(overlap * scale_factor ** 2, 2)})
+                continue
+
+            pitch = float(pitches[i] + pitches[j]) / 2
+            for line in _shared_lines(a, b, tolerance):
+                edge_type = _classify_edge(line, corner_tree, convex, tolerance)
+                plan_length = line.length * scale_factor
+                edges.append(SharedEdge((i, j), edge_type, plan_length, _sloped_length(edge_type, plan_length, pitch)))
+
+        lengths = {edge_type: 0.0 for edge_type in ("ridge", "hip", "valley")}
+        for edge in edges:
+            lengths[edge.edge_type] += edge.length_ft
+
+        total_plan = float(plan_areas.sum())
+        total_sloped = float(sloped_areas.sum())
+        # Pitch giving the same total area, usable with the single-pitch cost estimate
+        average_pitch = math.degrees(math.acos(min(total_plan / total_sloped, 1.0))) if total_sloped > 0 else 0.0
+        perimeter = sum(
+            part.exterior.length for part in shapely.get_parts(outline) if isinstance(part, Polygon)
+        )
+        return {
+            "facets": facet_results,
+            "edges": [
+                {
+                    "facets": list(edge.facets),
+                    "type": edge.edge_type,
+                    "plan_length_ft": round(edge.plan_length_ft, 2),
+                    "length_ft": round(edge.length_ft, 2)
+                }
+                for edge in edges
+            ],
+            "overlaps": overlaps,
+            "total_plan_area_sq_ft": round(total_plan, 2),
+            "total_area_sq_ft": round(total_sloped, 2),
+            "average_pitch_degrees": round(average_pitch, 1),
+            "ridge_length_ft": round(lengths["ridge"], 2),
+            "hip_length_ft": round(lengths["hip"], 2),
+            "valley_length_ft": round(lengths["valley"], 2),
+            "perimeter_ft": round(perimeter * scale_factor, 2)
+        }
+
+
+roof_model_service = RoofModelService()
@@ -1,14 +1,46 @@
 """Roof measurement and calculation service."""
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import math
+import numpy as np
 from shapely.geometry import Polygon
 from app.core.config import settings
+from app.core.metrics import timed
+
+
+# Extra material ordered for waste and overlap (10%)
+MATERIAL_WASTE_FACTOR = 1.1
+
+
+def round_array(values: np.ndarray, ndigits: int = 2) -> np.ndarray:
+    """
+    Round like Python's built-in round(), element-wise.
+
+    np.round scales, rounds and unscales, which can land on the other side
+    of a tie than Python's correctly rounded round(). Away from ties both
+    agree, so only near-tie elements are re-rounded in Python.
+
+    Args:
+        values: Array of floats
+        ndigits: Decimal places
+
+    Returns:
+        Rounded array
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+    near_tie = distance_to_tie <= 1e-9 + 8 * np.spacing(np.abs(scaled))
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
 
 
 class RoofService:
     """Service for roof measurements and cost calculations."""
 
     @staticmethod
+    @timed
     def calculate_polygon_area(points: List[Dict[str, float]], scale_factor: float = 1.0) -> float:
         """
         Calculate area of polygon from points.
@@ -81,7 +113,7 @@ class RoofService:
     def calculate_material_cost(
         area_sq_ft: float,
         material_cost_per_sqft: float = None,
-        waste_factor: float = 1.1
+        waste_factor: float = MATERIAL_WASTE_FACTOR
     ) -> float:
         """
         Calculate material cost.
@@ -122,6 +154,7 @@ class RoofService:
         return round(area_sq_ft * labor_cost_per_sqft * pitch_multiplier, 2)
 
     @staticmethod
+    @timed
     def calculate_total_estimate(
         area_sq_ft: float,
         pitch_degrees: float,
@@ -168,5 +201,153 @@ class RoofService:
             "cost_per_sqft": round(total / area_sq_ft, 2)
         }
 
+    @staticmethod
+    @timed
+    def calculate_polygon_metrics_batch(
+        polygons: Sequence[np.ndarray],
+        scale_factors: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate area and perimeter of many polygons in one vectorized pass.
+
+        All vertices are concatenated into a single array and per-polygon
+        shoelace sums and edge lengths are reduced by polygon offsets.
+
+        Args:
+            polygons: Sequence of (n, 2) vertex arrays in pixels
+            scale_factors: Feet per pixel for each polygon
+
+        Returns:
+            Areas in square feet and perimeters in feet, each rounded to 2 decimals
+        """
+        counts = np.fromiter((len(p) for p in polygons), dtype=np.int64, count=len(polygons))
+        areas = np.zeros(len(polygons))
+        perimeters = np.zeros(len(polygons))
+        non_empty = counts > 0
+        if not non_empty.any():
+            return areas, perimeters
+
+        coords = np.concatenate([np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons])
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # Index of the next vertex, wrapping around within each polygon
+        next_index = np.arange(len(coords)) + 1
+        ends = starts + counts - 1
+        next_index[ends[non_empty]] = starts[non_empty]
+
+        x, y = coords[:, 0], coords[:, 1]
+        x_next, y_next = x[next_index], y[next_index]
+        cross = x * y_next - x_next * y
+        edges = np.hypot(x_next - x, y_next - y)
+
+        segment_starts = starts[non_empty]
+        scales = np.asarray(scale_factors, dtype=np.float64)
+        area_pixels = np.abs(np.add.reduceat(cross, segment_starts)) / 2.0
+        areas[non_empty] = area_pixels * scales[non_empty] ** 2
+        perimeters[non_empty] = np.add.reduceat(edges, segment_starts) * scales[non_empty]
+
+        # Fewer than 3 points is not a polygon
+        areas[counts < 3] = 0.0
+        return round_array(areas, 2), round_array(perimeters, 2)
+
+    @staticmethod
+    def estimate_roof_pitch_batch(areas_sq_ft: np.ndarray, is_commercial: np.ndarray) -> np.ndarray:
+        """
+        Vectorized estimate_roof_pitch.
+
+        Args:
+            areas_sq_ft: Roof areas in square feet
+            is_commercial: Whether each building is commercial
+
+        Returns:
+            Estimated pitches in degrees
+        """
+        base_pitch = np.where(is_commercial, 15.0, 22.5)
+        base_pitch = base_pitch - np.where(areas_sq_ft > 3000, 5.0, 0.0)
+        base_pitch = base_pitch + np.where(areas_sq_ft < 1000, 5.0, 0.0)
+        return round_array(np.clip(base_pitch, 10.0, 45.0), 1)
+
+    @staticmethod
+    def calculate_pitch_multiplier_batch(pitch_degrees: np.ndarray) -> np.ndarray:
+        """
+        Vectorized calculate_pitch_multiplier.
+
+        Args:
+            pitch_degrees: Roof pitches in degrees
+
+        Returns:
+            Multipliers for cost adjustment
+        """
+        return np.select(
+            [pitch_degrees <= 25, pitch_degrees <= 35, pitch_degrees <= 45],
+            [1.0, 1.15, settings.steep_roof_multiplier],
+            default=1.5
+        )
+
+    @staticmethod
+    @timed
+    def calculate_total_estimate_batch(
+        area_sq_ft: np.ndarray,
+        pitch_degrees: np.ndarray,
+        has_damage: Optional[np.ndarray] = None,
+        material_cost_per_sqft: Optional[np.ndarray] = None,
+        labor_cost_per_sqft: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_total_estimate over columns of inputs.
+
+        Operations are applied in the same order and with the same rounding
+        as the scalar version, so every row matches it exactly.
+
+        Args:
+            area_sq_ft: Roof areas in square feet
+            pitch_degrees: Roof pitches in degrees
+            has_damage: Damage flags (default all False)
+            material_cost_per_sqft: Per-row material cost; NaN uses the default
+            labor_cost_per_sqft: Per-row labor cost; NaN uses the default
+
+        Returns:
+            Dictionary of cost breakdown columns
+        """
+        area_sq_ft = np.asarray(area_sq_ft, dtype=np.float64)
+        pitch_degrees = np.asarray(pitch_degrees, dtype=np.float64)
+        rows = len(area_sq_ft)
+        has_damage = np.zeros(rows, dtype=bool) if has_damage is None else np.asarray(has_damage, dtype=bool)
+
+        if material_cost_per_sqft is None:
+            material_cost_per_sqft = np.full(rows, settings.default_material_cost)
+        else:
+            material_cost_per_sqft = np.asarray(material_cost_per_sqft, dtype=np.float64)
+            material_cost_per_sqft = np.where(
+                np.isnan(material_cost_per_sqft), settings.default_material_cost, material_cost_per_sqft
+            )
+        if labor_cost_per_sqft is None:
+            labor_cost_per_sqft = np.full(rows, settings.default_labor_cost)
+        else:
+            labor_cost_per_sqft = np.asarray(labor_cost_per_sqft, dtype=np.float64)
+            labor_cost_per_sqft = np.where(
+                np.isnan(labor_cost_per_sqft), settings.default_labor_cost, labor_cost_per_sqft
+            )
+
+        pitch_multiplier = RoofService.calculate_pitch_multiplier_batch(pitch_degrees)
+        material_cost = round_array(area_sq_ft * material_cost_per_sqft * MATERIAL_WASTE_FACTOR, 2)
+        labor_cost = round_array(area_sq_ft * labor_cost_per_sqft * pitch_multiplier, 2)
+
+        subtotal = material_cost + labor_cost
+        repair_cost = np.where(has_damage, subtotal * (settings.damage_repair_multiplier - 1), 0.0)
+        total = subtotal + repair_cost
+
+        return {
+            "area_sq_ft": round_array(area_sq_ft, 2),
+            "pitch_degrees": pitch_degrees,
+            "pitch_multiplier": pitch_multiplier,
+            "material_cost": material_cost,
+            "labor_cost": labor_cost,
+            "repair_cost": round_array(repair_cost, 2),
+            "subtotal": round_array(subtotal, 2),
+            "total": round_array(total, 2),
+            "cost_per_sqft": round_array(total / area_sq_ft, 2)
+        }
+
 
 roof_service = RoofService()
@@ -0,0 +1,296 @@
+"""Content-addressed on-disk cache for satellite images."""
+from typing import Dict, NamedTuple, Optional, Union
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+_KEY = re.compile(r"^(-?[0-9.]+),(-?[0-9.]+),z(\d+),(\d+)x(\d+)$")
+
+
+class CachedImage(NamedTuple):
+    """Metadata of an image stored in the cache."""
+    digest: str
+    content_type: str
+    size: int
+
+
+class ImageParams(NamedTuple):
+    """Map parameters an image was fetched with."""
+    latitude: float
+    longitude: float
+    zoom: int
+    width: int
+    height: int
+
+
+def parse_key(key: str) -> Optional[ImageParams]:
+    """
+    Recover the map parameters from a cache key.
+
+    Args:
+        key: Key from SatelliteCache.make_key
+
+    Returns:
+        Map parameters, or None if the key is malformed
+    """
+    match = _KEY.match(key)
+    if match is None:
+        return None
+    latitude, longitude, zoom, width, height = match.groups()
+    return ImageParams(float(latitude), float(longitude), int(zoom), int(width), int(height))
+
+
+class SatelliteCache:
+    """
+    Disk cache mapping (rounded lat/lon, zoom, width, height) to image bytes.
+
+    Image bytes are stored once per SHA-256 digest under ``blobs/`` and
+    indexed in SQLite. When the total blob size exceeds the configured
+    bound, least-recently-used blobs and the keys pointing at them are
+    evicted. Reads are served through read-only memory maps.
+    """
+
+    def __init__(self, root: str, max_bytes: int, precision: int):
+        """
+        Initialize the cache; directories and the index are created on first use.
+
+        Args:
+            root: Cache directory
+            max_bytes: Upper bound on the total size of stored blobs
+            precision: Decimal places latitude/longitude are rounded to in keys
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def make_key(self, latitude: float, longitude: float, zoom: int, width: int, height: int) -> str:
+        """
+        Build the lookup key for an image request.
+
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            zoom: Map zoom level
+            width: Image width in pixels
+            height: Image height in pixels
+
+        Returns:
+            Cache key string
+        """
+        return (
+            f"{round(latitude, self.precision):.{self.precision}f},"
+            f"{round(longitude, self.precision):.{self.precision}f},"
+            f"z{zoom},{width}x{height}"
+        )
+
+    def blob_path(self, digest: str) -> str:
+        """Path of the file holding the bytes for a digest."""
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index and create the schema if needed."""
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "digest TEXT PRIMARY KEY, content_type TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, digest TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)")
+            conn.execute("CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access)")
+            self._conn = conn
+        return self._conn
+
+    def _lookup(self, key: str) -> Optional[CachedImage]:
+        """Find the blob for a key and mark it as recently used."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT b.digest, b.content_type, b.size FROM entries e "
+                "JOIN blobs b ON b.digest = e.digest WHERE e.key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), row[0]))
+            conn.commit()
+        return CachedImage(*row)
+
+    def _lookup_digest(self, digest: str) -> Optional[CachedImage]:
+        """Find a blob by digest and mark it as recently used."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT digest, content_type, size FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            conn.commit()
+        return CachedImage(*row)
+
+    def _lookup_key(self, digest: str) -> Optional[str]:
+        """Find the most recent request key that produced a digest."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT key FROM entries WHERE digest = ? ORDER BY created_at DESC LIMIT 1", (digest,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, data: bytes, content_type: str) -> CachedImage:
+        """Write a blob (if new), index the key and evict down to the size bound."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)",
+                (digest, content_type, len(data), now)
+            )
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, digest, now))
+            conn.commit()
+            self._evict(conn)
+        return CachedImage(digest, content_type, len(data))
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete least-recently-used blobs until the total size fits."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for digest, size in conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            try:
+                os.remove(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.commit()
+
+    async def get(self, key: str) -> Optional[CachedImage]:
+        """
+        Look up a cached image by request key.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Image metadata, or None on a miss
+        """
+        image = await asyncio.to_thread(self._lookup, key)
+        if image is None or not os.path.exists(self.blob_path(image.digest)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return image
+
+    async def get_by_digest(self, digest: str) -> Optional[CachedImage]:
+        """
+        Look up a cached image by content digest.
+
+        Args:
+            digest: SHA-256 hex digest of the image bytes
+
+        Returns:
+            Image metadata, or None if not cached
+        """
+        if not _DIGEST.match(digest):
+            return None
+        image = await asyncio.to_thread(self._lookup_digest, digest)
+        if image is None or not os.path.exists(self.blob_path(image.digest)):
+            return None
+        return image
+
+    async def get_params(self, digest: str) -> Optional[ImageParams]:
+        """
+        Look up the map parameters a cached image was fetched with.
+
+        Args:
+            digest: SHA-256 hex digest of the image bytes
+
+        Returns:
+            Map parameters, or None if the image is not cached
+        """
+        if not _DIGEST.match(digest):
+            return None
+        key = await asyncio.to_thread(self._lookup_key, digest)
+        return parse_key(key) if key else None
+
+    async def put(self, key: str, data: bytes, content_type: str) -> CachedImage:
+        """
+        Store image bytes for a request key.
+
+        Args:
+            key: Key from make_key
+            data: Raw image bytes
+            content_type: MIME type reported by the provider
+
+        Returns:
+            Metadata of the stored image
+
+        Raises:
+            ValueError: If data is empty
+        """
+        if not data:
+            raise ValueError("Refusing to cache an empty image")
+        return await asyncio.to_thread(self._store, key, data, content_type)
+
+    def open(self, image: CachedImage) -> Union[mmap.mmap, memoryview]:
+        """
+        Memory-map a cached image for reading; the caller must close it.
+
+        Args:
+            image: Metadata from get, get_by_digest or put
+
+        Returns:
+            Read-only memory map of the image bytes (an empty view for a
+            0-byte blob, which cannot be mapped)
+        """
+        if image.size == 0:
+            return memoryview(b"")
+        with open(self.blob_path(image.digest), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+satellite_cache = SatelliteCache(
+    root=os.path.join(settings.cache_dir, "satellite"),
+    max_bytes=settings.satellite_cache_max_bytes,
+    precision=settings.satellite_cache_precision
+)
+metrics.register_cache("satellite", lambda: satellite_cache.stats)
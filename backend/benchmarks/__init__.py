@@ -0,0 +1 @@
+"""Load and microbenchmarks run against stand-in provider servers."""
@@ -0,0 +1,125 @@
+"""
+Compare two benchmark reports, e.g. from two commits.
+
+Usage:
+    python -m benchmarks.compare base.json head.json --fail-over 10
+
+Matches load results by endpoint and concurrency and micro results by name,
+and prints the relative change of each metric. With ``--fail-over`` the exit
+status is 1 when any metric regressed by more than that many percent.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import sys
+
+
+# Metrics compared per report kind: (label, path into a result, True if higher is better)
+METRICS = {
+    "load": [
+        ("throughput_rps", ("throughput_rps",), True),
+        ("p50_ms", ("latency_ms", "p50"), False),
+        ("p95_ms", ("latency_ms", "p95"), False),
+        ("p99_ms", ("latency_ms", "p99"), False)
+    ],
+    "micro": [
+        ("best_us", ("best_us",), False),
+        ("median_us", ("median_us",), False)
+    ]
+}
+
+
+def _key(kind: str, result: Dict[str, Any]) -> str:
+    """Identify a result across reports."""
+    if kind == "load":
+        return f"{result['endpoint']} c={result['concurrency']}"
+    return result["name"]
+
+
+def _value(result: Dict[str, Any], path: Tuple[str, ...]) -> float:
+    """Read a metric from a result."""
+    for part in path:
+        result = result[part]
+    return float(result)
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare matching results of two reports of the same kind.
+
+    Args:
+        base: Baseline report
+        head: Report to compare against the baseline
+
+    Returns:
+        One row per result and metric with both values, the change in
+        percent and the regression in percent (positive is worse)
+
+    Raises:
+        ValueError: If the reports are of different kinds
+    """
+    kind = base.get("kind")
+    if kind != head.get("kind") or kind not in METRICS:
+        raise ValueError(f"Cannot compare a {base.get('kind')!r} report with a {head.get('kind')!r} report")
+
+    base_results = {_key(kind, result): result for result in base["results"]}
+    rows = []
+    for result in head["results"]:
+        key = _key(kind, result)
+        if key not in base_results:
+            continue
+        for label, path, higher_is_better in METRICS[kind]:
+            before = _value(base_results[key], path)
+            after = _value(result, path)
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append({
+                "key": key,
+                "metric": label,
+                "base": before,
+                "head": after,
+                "change_pct": round(change, 2),
+                "regression_pct": round(-change if higher_is_better else change, 2)
+            })
+    return rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports.")
+    parser.add_argument("base", help="Baseline report")
+    parser.add_argument("head", help="Report to compare")
+    parser.add_argument("--fail-over", type=float, help="Exit 1 if any metric regressed by more than this percent")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    args = parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+    try:
+        rows = compare(base, head)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps({"base_commit": base.get("commit"), "head_commit": head.get("commit"), "rows": rows}, indent=2))
+    else:
+        print(f"base {(base.get('commit') or '?')[:12]}  head {(head.get('commit') or '?')[:12]}")
+        for row in rows:
+            print(f"{row['key']:<55} {row['metric']:<15} {row['base']:>12.2f} -> {row['head']:>12.2f}  {row['change_pct']:>+8.1f}%")
+
+    if args.fail_over is not None:
+        regressions = [row for row in rows if row["regression_pct"] > args.fail_over]
+        for row in regressions:
+            print(f"REGRESSION {row['key']} {row['metric']} {row['regression_pct']:+.1f}%", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
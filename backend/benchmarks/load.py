@@ -0,0 +1,300 @@
+"""
+Load-test the API at fixed concurrency levels against stand-in providers.
+
+Usage:
+    python -m benchmarks.load --concurrency 1 8 32 --requests 200 -o bench.json
+
+Starts the Google and OpenAI stand-ins (see benchmarks.stubs), launches the
+app with uvicorn pointed at them, and drives each endpoint scenario with a
+closed loop of ``concurrency`` clients. Reports throughput and p50/p95/p99
+latency per endpoint and concurrency level as JSON, tagged with the git
+commit, so runs on two commits can be compared with benchmarks.compare.
+
+Provider rate limits are disabled in the launched app so the stand-ins'
+latency, not the configured quotas, bounds throughput; pass
+``--env GOOGLE_RATE_PER_SECOND=50`` and the like to measure with them.
+Every request uses a fresh address, coordinate or bypasses the cache, so
+scenarios measure the uncached path unless their name ends in ``_cached``.
+"""
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import argparse
+import asyncio
+import base64
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.report import latency_summary, run_metadata, write_report
+from benchmarks.stubs import add_behavior_args, behaviors_from_args, render_satellite_png, start_stubs, stub_env
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sequence numbers making each request's address or coordinates unique
+_sequence = itertools.count()
+
+
+class Scenario(NamedTuple):
+    """One endpoint under load and how to build its requests."""
+    method: str
+    path: str
+    build: Callable[[int], Dict[str, Any]]  # sequence number -> httpx request kwargs
+
+
+_SQUARE = [{"x": 100.0, "y": 100.0}, {"x": 400.0, "y": 100.0}, {"x": 400.0, "y": 300.0}, {"x": 100.0, "y": 300.0}]
+_IMAGE = "data:image/png;base64," + base64.b64encode(render_satellite_png(800, 600)).decode("ascii")
+
+SCENARIOS: Dict[str, Scenario] = {
+    "measurement_calculate": Scenario("POST", "/api/v1/measurement/calculate", lambda n: {
+        "json": {"points": _SQUARE, "scale_factor": 0.5, "building_type": "residential"}
+    }),
+    "estimate_cost": Scenario("POST", "/api/v1/measurement/estimate-cost", lambda n: {
+        "json": {"area_sq_ft": 1500.0 + n % 1000, "pitch_degrees": 22.5}
+    }),
+    "geocode": Scenario("POST", "/api/v1/address/geocode", lambda n: {
+        "json": {"address": f"{n} Benchmark Ave"}
+    }),
+    "geocode_cached": Scenario("POST", "/api/v1/address/geocode", lambda n: {
+        "json": {"address": "1 Benchmark Ave"}
+    }),
+    "autocomplete": Scenario("GET", "/api/v1/autocomplete/suggestions", lambda n: {
+        "params": {"input": f"{n} Bench"}
+    }),
+    "satellite_image": Scenario("POST", "/api/v1/satellite/image", lambda n: {
+        "json": {"latitude": 30.0 + n * 1e-4, "longitude": -97.0, "include_base64": True}
+    }),
+    "roof_detect": Scenario("POST", "/api/v1/roof/detect", lambda n: {
+        "json": {"image_base64": _IMAGE, "latitude": 30.0, "longitude": -97.0, "detector": "vision", "bypass_cache": True}
+    }),
+    "ai_analyze": Scenario("POST", "/api/v1/ai/analyze", lambda n: {
+        "json": {"address": f"{n} Benchmark Ave", "area_sq_ft": 1800.0, "pitch_degrees": 22.5, "bypass_cache": True}
+    }),
+    "pipeline": Scenario("POST", "/api/v1/pipeline/estimate", lambda n: {
+        "params": {"stream": "false"},
+        "json": {"address": f"{n} Pipeline Rd", "detector": "local"}
+    })
+}
+
+
+def _failed(response: httpx.Response) -> bool:
+    """Whether a response is an error, including 200s reporting ``"success": false``."""
+    if not response.is_success:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return isinstance(body, dict) and body.get("success") is False
+    return False
+
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario) -> tuple:
+    """
+    Send one request.
+
+    Returns:
+        (latency in seconds, outcome) where outcome is the status code as a
+        string, "failed" for a 2xx reporting failure, or the exception name
+    """
+    started = time.perf_counter()
+    try:
+        response = await client.request(scenario.method, scenario.path, **scenario.build(next(_sequence)))
+    except httpx.HTTPError as e:
+        return time.perf_counter() - started, type(e).__name__
+    elapsed = time.perf_counter() - started
+    if response.is_success and _failed(response):
+        return elapsed, "failed"
+    return elapsed, str(response.status_code)
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    requests: int,
+    warmup: int
+) -> Dict[str, Any]:
+    """
+    Drive one scenario with a fixed number of concurrent clients.
+
+    Each client sends its next request as soon as the previous one completes,
+    until ``requests`` have been sent. Warmup requests are sent first and not
+    measured.
+
+    Args:
+        client: HTTP client for the app
+        scenario: Endpoint scenario
+        concurrency: Concurrent clients
+        requests: Measured requests
+        warmup: Unmeasured requests sent first
+
+    Returns:
+        Request count, errors, status counts, duration, throughput and
+        latency percentiles of the successful requests
+    """
+    async def drive(count: int) -> List[tuple]:
+        remaining = iter(range(count))
+        results: List[tuple] = []
+
+        async def worker() -> None:
+            for _ in remaining:
+                results.append(await _send(client, scenario))
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+        return results
+
+    if warmup:
+        await drive(warmup)
+    started = time.perf_counter()
+    results = await drive(requests)
+    duration = time.perf_counter() - started
+
+    outcomes = Counter(outcome for _, outcome in results)
+    succeeded = [latency for latency, outcome in results if outcome.startswith("2")]
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(succeeded),
+        "outcomes": dict(sorted(outcomes.items())),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(succeeded) / duration, 2) if duration > 0 else 0.0,
+        "latency_ms": latency_summary(succeeded)
+    }
+
+
+def _free_port() -> int:
+    """Pick a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(env: Dict[str, str], workers: int) -> tuple:
+    """
+    Launch the app with uvicorn in a child process and wait until it is healthy.
+
+    Args:
+        env: Environment overrides for the app
+        workers: uvicorn worker processes
+
+    Returns:
+        (process, base URL)
+
+    Raises:
+        RuntimeError: If the app exits or is not healthy within 60 seconds
+    """
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log"
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).is_success:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("App did not become healthy within 60s")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Load-test the API against stand-in providers.")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS), help="Scenarios to run")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the launched app")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app setting (repeatable)")
+    parser.add_argument("--base-url", help="Benchmark an already running app instead (no stand-ins are started)")
+    parser.add_argument("-o", "--output", help="JSON report file (default: stdout)")
+    add_behavior_args(parser)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace, base_url: str) -> List[Dict[str, Any]]:
+    """
+    Run every selected scenario at every concurrency level.
+
+    Args:
+        args: Parsed arguments
+        base_url: App base URL
+
+    Returns:
+        One result per scenario and concurrency level
+    """
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        for name in args.endpoints:
+            scenario = SCENARIOS[name]
+            for concurrency in args.concurrency:
+                result = await run_level(client, scenario, concurrency, args.requests, args.warmup)
+                results.append({"endpoint": name, "method": scenario.method, "path": scenario.path, "concurrency": concurrency, **result})
+                latency = result["latency_ms"]
+                print(
+                    f"{name:<24} c={concurrency:<4} {result['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {latency['p50']:>8.1f}ms  p95 {latency['p95']:>8.1f}ms  p99 {latency['p99']:>8.1f}ms  "
+                    f"errors {result['errors']}",
+                    file=sys.stderr
+                )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    args = parse_args(argv)
+    config: Dict[str, Any] = {
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "endpoints": args.endpoints
+    }
+
+    if args.base_url:
+        config["target"] = args.base_url
+        results = asyncio.run(run(args, args.base_url))
+    else:
+        behaviors = behaviors_from_args(args)
+        overrides = dict(item.split("=", 1) for item in args.env)
+        servers = start_stubs(behaviors)
+        with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+            env = {
+                **stub_env(servers),
+                "CACHE_DIR": cache_dir,
+                "DEBUG": "false",
+                "GOOGLE_RATE_PER_SECOND": "0",
+                "OPENAI_RATE_PER_SECOND": "0",
+                **overrides
+            }
+            process, base_url = start_app(env, args.workers)
+            try:
+                results = asyncio.run(run(args, base_url))
+            finally:
+                process.terminate()
+                process.wait()
+                for server in servers.values():
+                    server.stop()
+        config.update({
+            "workers": args.workers,
+            "stubs": {provider: behavior._asdict() for provider, behavior in behaviors.items()},
+            "env": overrides
+        })
+
+    write_report({**run_metadata(), "kind": "load", "config": config, "results": results}, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Microbenchmarks for the measurement and estimation hot paths.
+
+Usage:
+    python -m benchmarks.micro -o micro.json
+
+Times RoofService functions, including the vectorized batch versions at
+portfolio scale, plus facet analysis, local roof detection and vision image
+preprocessing. Each benchmark is auto-ranged to run for about
+``--min-time`` seconds per repeat; the best and median time per call over
+the repeats are reported in microseconds.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import statistics
+import sys
+import timeit
+import numpy as np
+from app.services.image_preprocessing import preprocess_for_vision
+from app.services.roof_detector import detect_roof_outline
+from app.services.roof_model import Facet, roof_model_service
+from app.services.roof_service import roof_service
+from benchmarks.report import run_metadata, write_report
+from benchmarks.stubs import render_satellite_png
+
+
+BATCH_SIZE = 10000
+
+_POINTS = [{"x": 100.0, "y": 100.0}, {"x": 400.0, "y": 100.0}, {"x": 400.0, "y": 300.0}, {"x": 250.0, "y": 380.0}, {"x": 100.0, "y": 300.0}]
+
+
+def _batch_inputs() -> Dict[str, Any]:
+    """Deterministic portfolio-sized inputs for the batch functions."""
+    rng = np.random.default_rng(42)
+    base = np.array([[p["x"], p["y"]] for p in _POINTS])
+    return {
+        "polygons": [base + rng.uniform(-20.0, 20.0, base.shape) for _ in range(BATCH_SIZE)],
+        "scale_factors": rng.uniform(0.3, 0.6, BATCH_SIZE),
+        "areas": rng.uniform(800.0, 6000.0, BATCH_SIZE),
+        "pitches": rng.uniform(0.0, 45.0, BATCH_SIZE),
+        "damage": rng.random(BATCH_SIZE) < 0.2
+    }
+
+
+def _facets() -> List[Facet]:
+    """A hip roof: four facets meeting at a ridge."""
+    return [
+        Facet([(100, 100), (500, 100), (400, 200), (200, 200)], pitch_degrees=25.0),
+        Facet([(500, 100), (500, 400), (400, 300), (400, 200)], pitch_degrees=25.0),
+        Facet([(500, 400), (100, 400), (200, 300), (400, 300)], pitch_degrees=25.0),
+        Facet([(100, 400), (100, 100), (200, 200), (200, 300)], pitch_degrees=25.0)
+    ]
+
+
+def benchmarks() -> Dict[str, Callable[[], Any]]:
+    """
+    Build the benchmark callables.
+
+    Returns:
+        Zero-argument callables by benchmark name
+    """
+    batch = _batch_inputs()
+    facets = _facets()
+    image = render_satellite_png(800, 600)
+    return {
+        "roof_service.calculate_polygon_area": lambda: roof_service.calculate_polygon_area(_POINTS, 0.5),
+        "roof_service.estimate_roof_pitch": lambda: roof_service.estimate_roof_pitch(1800.0, "residential"),
+        "roof_service.calculate_pitch_multiplier": lambda: roof_service.calculate_pitch_multiplier(22.5),
+        "roof_service.calculate_total_estimate": lambda: roof_service.calculate_total_estimate(1800.0, 22.5, True),
+        f"roof_service.calculate_polygon_metrics_batch[{BATCH_SIZE}]": lambda: roof_service.calculate_polygon_metrics_batch(
+            batch["polygons"], batch["scale_factors"]
+        ),
+        f"roof_service.calculate_total_estimate_batch[{BATCH_SIZE}]": lambda: roof_service.calculate_total_estimate_batch(
+            batch["areas"], batch["pitches"], batch["damage"]
+        ),
+        "roof_model_service.analyze[4 facets]": lambda: roof_model_service.analyze(facets, 0.5),
+        "detect_roof_outline[800x600]": lambda: detect_roof_outline(image, 800, 600),
+        "preprocess_for_vision[800x600]": lambda: preprocess_for_vision(image, 800, 600)
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """
+    Time a callable.
+
+    Args:
+        fn: Zero-argument callable
+        repeat: Number of timed repeats
+        min_time: Minimum seconds per repeat; sets the calls per repeat
+
+    Returns:
+        Calls per repeat, and best and median microseconds per call
+    """
+    timer = timeit.Timer(fn)
+    calls, elapsed = timer.autorange()
+    if elapsed < min_time:
+        calls = max(calls, int(calls * min_time / max(elapsed, 1e-9)))
+    per_call = [total / calls * 1e6 for total in timer.repeat(repeat=repeat, number=calls)]
+    return {
+        "calls": calls,
+        "repeat": repeat,
+        "best_us": round(min(per_call), 3),
+        "median_us": round(statistics.median(per_call), 3)
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Run service microbenchmarks.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    parser.add_argument("-o", "--output", help="JSON report file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    args = parse_args(argv)
+    results = []
+    for name, fn in benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        result = {"name": name, **measure(fn, args.repeat, args.min_time)}
+        results.append(result)
+        print(f"{name:<55} best {result['best_us']:>12.2f}us  median {result['median_us']:>12.2f}us", file=sys.stderr)
+
+    config = {"repeat": args.repeat, "min_time": args.min_time, "batch_size": BATCH_SIZE}
+    write_report({**run_metadata(), "kind": "micro", "config": config, "results": results}, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
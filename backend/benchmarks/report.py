@@ -0,0 +1,94 @@
+"""Machine-readable benchmark reports."""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction (0.95 for p95)
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """
+    Summarize request latencies.
+
+    Args:
+        seconds: Latency of each request in seconds
+
+    Returns:
+        p50, p95, p99, mean and max in milliseconds
+    """
+    values = sorted(value * 1000 for value in seconds)
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "max": round(values[-1], 3) if values else 0.0
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    """Run a git command in the repository, or return None if that fails."""
+    try:
+        return subprocess.run(
+            ["git", *args],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> Dict[str, Any]:
+    """
+    Describe the code and machine a benchmark ran on.
+
+    Returns:
+        Commit, uncommitted-changes flag, UTC timestamp, Python version and platform
+    """
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    """
+    Write a report as JSON.
+
+    Args:
+        report: Report to write
+        path: Output file, or None for stdout
+    """
+    text = json.dumps(report, indent=2) + "\n"
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
@@ -0,0 +1,380 @@
+"""
+Stand-in servers for the Google Maps and OpenAI APIs.
+
+Usage:
+    python -m benchmarks.stubs --latency-ms 80 --error-rate 0.01
+
+Serves the Geocoding, Places Autocomplete and Static Maps endpoints and
+OpenAI chat completions (plain and streamed) with canned responses after a
+configurable delay, failing a configurable share of calls. Point the app at
+them with GOOGLE_MAPS_BASE_URL and OPENAI_BASE_URL.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import argparse
+import asyncio
+import io
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+import zlib
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from PIL import Image, ImageDraw
+import uvicorn
+
+
+class StubBehavior(NamedTuple):
+    """How a stand-in server delays and fails calls."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0  # uniform extra delay on top of latency_ms
+    error_rate: float = 0.0  # share of calls answered with error_status
+    error_status: int = 500
+
+
+async def _emulate(behavior: StubBehavior) -> bool:
+    """
+    Wait like the real provider would, then decide whether to fail the call.
+
+    Args:
+        behavior: Delay and failure settings
+
+    Returns:
+        True if the call should be answered with an error
+    """
+    delay = behavior.latency_ms + random.uniform(0.0, behavior.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    return random.random() < behavior.error_rate
+
+
+@lru_cache(maxsize=16)
+def render_satellite_png(width: int, height: int) -> bytes:
+    """
+    Draw a synthetic satellite tile: an L-shaped grey roof on grass.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        PNG bytes
+    """
+    image = Image.new("RGB", (width, height), (40, 90, 40))
+    draw = ImageDraw.Draw(image)
+    outline = [(0.31, 0.30), (0.70, 0.30), (0.70, 0.50), (0.59, 0.50), (0.59, 0.72), (0.31, 0.72)]
+    draw.polygon([(x * width, y * height) for x, y in outline], fill=(150, 150, 160))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _parse_size(size: str) -> Tuple[int, int]:
+    """Parse a Static Maps ``WIDTHxHEIGHT`` size (served as requested, without Google's 640px cap)."""
+    try:
+        width, height = (int(value) for value in size.lower().split("x"))
+    except ValueError:
+        width, height = 640, 640
+    return max(1, min(width, 2048)), max(1, min(height, 2048))
+
+
+def google_app(behavior: StubBehavior) -> FastAPI:
+    """
+    Build the Google Maps stand-in.
+
+    Args:
+        behavior: Delay and failure settings
+
+    Returns:
+        ASGI app serving the /maps/api endpoints the backend calls
+    """
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    def error() -> JSONResponse:
+        return JSONResponse({"status": "UNKNOWN_ERROR", "error_message": "Stub failure"}, status_code=behavior.error_status)
+
+    @app.get("/maps/api/geocode/json")
+    async def geocode(address: str = ""):
+        if await _emulate(behavior):
+            return error()
+        # Stable, address-dependent coordinates so distinct addresses get distinct tiles
+        seed = zlib.crc32(address.encode("utf-8")) % 100000
+        return {
+            "status": "OK",
+            "results": [{
+                "formatted_address": f"{address}, Austin, TX 78701, USA",
+                "geometry": {"location": {"lat": 30.2 + seed * 1e-5, "lng": -97.7 - seed * 1e-5}},
+                "place_id": f"stub-{seed}"
+            }]
+        }
+
+    @app.get("/maps/api/place/autocomplete/json")
+    async def autocomplete(input: str = ""):
+        if await _emulate(behavior):
+            return error()
+        return {
+            "status": "OK",
+            "predictions": [
+                {"description": f"{input} Street {index}, Austin, TX, USA", "place_id": f"stub-{index}"}
+                for index in range(5)
+            ]
+        }
+
+    @app.get("/maps/api/staticmap")
+    async def staticmap(size: str = "640x640", scale: int = 1):
+        if await _emulate(behavior):
+            return Response(b"Stub failure", status_code=behavior.error_status, media_type="text/plain")
+        width, height = _parse_size(size)
+        return Response(render_satellite_png(width * scale, height * scale), media_type="image/png")
+
+    return app
+
+
+# Canned model answers, by the kind of prompt
+_VISION_ANSWER = {
+    "points": [{"x": 250, "y": 180}, {"x": 560, "y": 180}, {"x": 560, "y": 430}, {"x": 250, "y": 430}],
+    "confidence": 0.9,
+    "roof_type": "gable"
+}
+_DAMAGE_ANSWER = {"has_damage": False, "damage_types": [], "severity": "none", "confidence": 0.8}
+_ANALYSIS_ANSWER = {
+    "complexity_rating": 5,
+    "recommendations": ["Inspect flashing", "Replace worn shingles", "Check attic ventilation"],
+    "material_suggestions": ["Architectural asphalt shingles", "Standing seam metal"],
+    "timeline_estimate": 3,
+    "considerations": ["Weather delays"],
+    "confidence": 0.75
+}
+
+
+def _answer(messages: List[Dict[str, Any]]) -> str:
+    """Pick the canned answer matching the last message of a chat request."""
+    content = messages[-1].get("content", "") if messages else ""
+    if isinstance(content, list):
+        return json.dumps(_VISION_ANSWER)
+    if "damage" in content.lower():
+        return json.dumps(_DAMAGE_ANSWER)
+    return json.dumps(_ANALYSIS_ANSWER)
+
+
+def _usage(messages: List[Dict[str, Any]], answer: str) -> Dict[str, int]:
+    """Rough token counts (4 characters per token) so usage metrics have data."""
+    prompt_tokens = max(1, len(json.dumps(messages)) // 4)
+    completion_tokens = max(1, len(answer) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def openai_app(behavior: StubBehavior) -> FastAPI:
+    """
+    Build the OpenAI stand-in.
+
+    Args:
+        behavior: Delay and failure settings; the delay applies before the
+            first byte, streamed or not
+
+    Returns:
+        ASGI app serving /v1/chat/completions
+    """
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if await _emulate(behavior):
+            return JSONResponse(
+                {"error": {"message": "Stub failure", "type": "server_error", "code": None}},
+                status_code=behavior.error_status
+            )
+
+        messages = body.get("messages", [])
+        model = body.get("model", "stub")
+        answer = _answer(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = _usage(messages, answer)
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            def chunk(choices: List[Dict[str, Any]], chunk_usage: Optional[Dict[str, int]] = None) -> str:
+                return "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": choices,
+                    "usage": chunk_usage
+                }) + "\n\n"
+
+            for start in range(0, len(answer), 16):
+                yield chunk([{"index": 0, "delta": {"content": answer[start:start + 16]}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if include_usage:
+                yield chunk([], usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class StubServer:
+    """Run an ASGI app with uvicorn on a free local port in a background thread."""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server.
+
+        Args:
+            app: ASGI application to serve
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.host, self.port = self.socket.getsockname()[:2]
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "StubServer":
+        """
+        Start serving and wait until the server accepts connections.
+
+        Args:
+            timeout: Seconds to wait for startup
+
+        Returns:
+            The server itself
+
+        Raises:
+            RuntimeError: If the server does not start in time
+        """
+        self._thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.socket]}, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Stub server on {self.url} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.server.should_exit = True
+        if self._thread is not None:
+            self._thread.join()
+        self.socket.close()
+
+
+def add_behavior_args(parser: argparse.ArgumentParser) -> None:
+    """Add the stand-in delay and failure options to a command-line parser."""
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Google response delay")
+    parser.add_argument("--openai-latency-ms", type=float, default=800.0, help="OpenAI response delay")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform extra delay on every call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of Google calls that fail")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0, help="Share of OpenAI calls that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of failed calls (e.g. 500, 429)")
+
+
+def behaviors_from_args(args: argparse.Namespace) -> Dict[str, StubBehavior]:
+    """
+    Build per-provider behaviors from parsed command-line options.
+
+    Args:
+        args: Options added by add_behavior_args
+
+    Returns:
+        Behavior for "google" and "openai"
+    """
+    return {
+        "google": StubBehavior(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status),
+        "openai": StubBehavior(args.openai_latency_ms, args.jitter_ms, args.openai_error_rate, args.error_status)
+    }
+
+
+def start_stubs(behaviors: Dict[str, StubBehavior], google_port: int = 0, openai_port: int = 0) -> Dict[str, StubServer]:
+    """
+    Start both stand-in servers.
+
+    Args:
+        behaviors: Behavior for "google" and "openai"
+        google_port: Port for the Google stand-in (0 picks a free port)
+        openai_port: Port for the OpenAI stand-in (0 picks a free port)
+
+    Returns:
+        Running servers by provider
+    """
+    return {
+        "google": StubServer(google_app(behaviors["google"]), port=google_port).start(),
+        "openai": StubServer(openai_app(behaviors["openai"]), port=openai_port).start()
+    }
+
+
+def stub_env(servers: Dict[str, StubServer]) -> Dict[str, str]:
+    """
+    Environment pointing the backend at running stand-in servers.
+
+    Args:
+        servers: Servers returned by start_stubs
+
+    Returns:
+        Base URL and placeholder API key variables
+    """
+    return {
+        "GOOGLE_MAPS_API_KEY": "stub-google-key",
+        "GOOGLE_MAPS_BASE_URL": servers["google"].url,
+        "OPENAI_API_KEY": "stub-openai-key",
+        "OPENAI_BASE_URL": f"{servers['openai'].url}/v1"
+    }
+
+
+def main() -> None:
+    """Serve the stand-ins until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve stand-ins for the Google Maps and OpenAI APIs.")
+    add_behavior_args(parser)
+    parser.add_argument("--google-port", type=int, default=8101, help="Google stand-in port")
+    parser.add_argument("--openai-port", type=int, default=8102, help="OpenAI stand-in port")
+    args = parser.parse_args()
+
+    servers = start_stubs(behaviors_from_args(args), args.google_port, args.openai_port)
+    for name, value in stub_env(servers).items():
+        print(f"{name}={value}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Test settings: keep caches and reports out of the working tree."""
+import os
+import tempfile
+
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="roofs-test-cache-"))
+os.environ.setdefault("HTTP_PREWARM", "false")
@@ -0,0 +1,27 @@
+"""Tests for the address geocoding endpoint."""
+import sqlite3
+import httpx
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import address
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_geocode_succeeds_when_the_cache_cannot_be_written(monkeypatch):
+    async def get(url, **kwargs):
+        return httpx.Response(200, json={"status": "OK", "results": [{
+            "formatted_address": "1 Write Fail Way",
+            "geometry": {"location": {"lat": 30.5, "lng": -97.5}}
+        }]}, request=httpx.Request("GET", url))
+
+    async def set(address, value):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(address.settings, "google_maps_api_key", "test-key")
+    monkeypatch.setattr(address.http_client, "get", get)
+    monkeypatch.setattr(address.geocode_cache, "set", set)
+
+    response = client.post("/api/v1/address/geocode", json={"address": "1 Write Fail Way"})
+    assert response.status_code == 200
+    assert response.json()["latitude"] == 30.5
@@ -0,0 +1,71 @@
+"""Tests for AI roof analysis coalescing and cancellation."""
+import asyncio
+import json
+import types
+import pytest
+from fastapi import HTTPException
+from app.core.disconnect import cancel_on_disconnect
+from app.services.ai_service import ai_service
+
+ANALYSIS = {"complexity_rating": 4, "recommendations": ["a"], "confidence": 0.7}
+
+
+class FakeCompletions:
+    """Chat completions that take ``delay`` seconds and record their outcome."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.outcomes = []
+
+    async def create(self, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.outcomes.append("cancelled")
+            raise
+        self.outcomes.append("completed")
+        message = types.SimpleNamespace(content=json.dumps(ANALYSIS))
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=None)
+
+
+class DisconnectingRequest:
+    """Request stand-in that reports a disconnect from the first poll on."""
+
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    fake = FakeCompletions(delay=0.2)
+    monkeypatch.setattr(ai_service, "client", types.SimpleNamespace(chat=types.SimpleNamespace(completions=fake)))
+    return fake
+
+
+def analyze(address: str):
+    return ai_service.analyze_roof_description(address, 1800.0, 22.5, bypass_cache=True)
+
+
+def test_disconnect_of_sole_waiter_cancels_model_call(completions):
+    async def scenario():
+        with pytest.raises(HTTPException) as error:
+            await cancel_on_disconnect(DisconnectingRequest(), analyze("1 Cancel St"), poll_interval=0.01)
+        await asyncio.sleep(0.05)
+        return error.value.status_code
+
+    assert asyncio.run(scenario()) == 499
+    assert completions.outcomes == ["cancelled"]
+
+
+def test_disconnect_of_one_waiter_keeps_call_for_the_other(completions):
+    async def scenario():
+        staying = asyncio.create_task(analyze("2 Shared St"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException):
+            await cancel_on_disconnect(DisconnectingRequest(), analyze("2 Shared St"), poll_interval=0.01)
+        return await staying
+
+    result = asyncio.run(scenario())
+    assert result["success"] is True
+    assert result["complexity_rating"] == 4
+    assert completions.outcomes == ["completed"]
@@ -0,0 +1,62 @@
+"""Tests for bulk portfolio estimation."""
+import asyncio
+import io
+import httpx
+from PIL import Image, ImageDraw
+from app.api.v1.endpoints import bulk
+from app.core.http_client import http_client
+from app.core.rate_limit import TokenBucket
+
+
+def _png() -> bytes:
+    image = Image.new("RGB", (800, 600), (40, 90, 40))
+    ImageDraw.Draw(image).rectangle((250, 180, 559, 419), fill=(150, 150, 160))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_rows_answered_from_cache_do_not_use_the_bulk_quota(monkeypatch):
+    image = _png()
+
+    def google(request):
+        if request.url.path.endswith("/geocode/json"):
+            return httpx.Response(200, json={"status": "OK", "results": [{
+                "formatted_address": "1 Cache Ln",
+                "geometry": {"location": {"lat": 30.25, "lng": -97.75}}
+            }]})
+        return httpx.Response(200, content=image, headers={"content-type": "image/png"})
+
+    monkeypatch.setattr(bulk.settings, "google_maps_api_key", "test-key")
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(google)))
+    quota = TokenBucket(1000, 1000)
+    monkeypatch.setitem(bulk.provider_limits, "google", quota)
+
+    async def scenario():
+        first = await bulk.estimate_row(1, {"address": "1 Cache Ln"}, "local", "residential")
+        after_first = quota.acquired
+        second = await bulk.estimate_row(2, {"address": "1 Cache Ln"}, "local", "residential")
+        return first, after_first, second
+
+    first, after_first, second = asyncio.run(scenario())
+    assert first["status"] == second["status"] == "ok"
+    # Geocode and satellite went upstream once; the repeat was served from cache
+    assert after_first == 2
+    assert quota.acquired == 2
+
+
+def test_rows_are_yielded_when_the_checkpoint_cannot_be_written(monkeypatch):
+    async def estimate_row(row_number, row, detector, building_type):
+        return {"row": row_number, "status": "ok"}
+
+    def append(self, result):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(bulk, "estimate_row", estimate_row)
+    monkeypatch.setattr(bulk.BulkCheckpoint, "append", append)
+
+    async def scenario():
+        return [result async for result in bulk.run_bulk([{"address": "a"}, {"address": "b"}], "unwritable", 2)]
+
+    results = asyncio.run(scenario())
+    assert sorted(result["row"] for result in results) == [1, 2]
@@ -0,0 +1,48 @@
+"""Tests for the roof detection cache."""
+import io
+from PIL import Image, ImageDraw
+from app.api.v1.endpoints.roof_detection import RoofDetectionRequest, detection_scope
+from app.services.detection_cache import DetectionCache, image_fingerprint
+
+
+def roof_image(width: int, height: int, fmt: str = "PNG") -> bytes:
+    """800x600 grass tile with a centred grey roof of the given size."""
+    image = Image.new("RGB", (800, 600), (40, 90, 40))
+    left, top = (800 - width) // 2, (600 - height) // 2
+    ImageDraw.Draw(image).rectangle([left, top, left + width, top + height], fill=(150, 150, 160))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=80)
+    return buffer.getvalue()
+
+
+def request(latitude: float, longitude: float) -> RoofDetectionRequest:
+    return RoofDetectionRequest(image_id="id", latitude=latitude, longitude=longitude)
+
+
+def bits_apart(a: bytes, b: bytes) -> int:
+    return bin(image_fingerprint(a).dhash ^ image_fingerprint(b).dhash).count("1")
+
+
+def test_different_roofs_at_different_locations_do_not_collide():
+    cache = DetectionCache(max_entries=10, ttl_seconds=60, max_distance=4)
+    first, second = roof_image(300, 200), roof_image(340, 220)
+    assert bits_apart(first, second) <= 4  # perceptually "the same" on their own
+
+    cache.set(image_fingerprint(first), detection_scope(request(30.26712, -97.74301)), {"roof": "first"})
+
+    assert cache.get(image_fingerprint(second), detection_scope(request(30.26790, -97.74422))) is None
+
+
+def test_reencoded_view_of_same_location_matches():
+    cache = DetectionCache(max_entries=10, ttl_seconds=60, max_distance=4)
+    original, reencoded = roof_image(300, 200), roof_image(300, 200, fmt="JPEG")
+    scope = detection_scope(request(30.26712, -97.74301))
+
+    cache.set(image_fingerprint(original), scope, {"roof": "first"})
+
+    assert cache.get(image_fingerprint(reencoded), scope) == {"roof": "first"}
+    assert cache.stats["perceptual_hits"] == 1
+
+
+def test_scope_rounds_coordinates_like_the_satellite_cache():
+    assert detection_scope(request(30.267121, -97.743011)) == detection_scope(request(30.267119, -97.743009))
@@ -0,0 +1,41 @@
+"""Tests for the two-level geocode cache."""
+import asyncio
+import pytest
+from app.services import geocode_cache as module
+from app.services.geocode_cache import GeocodeCache
+
+VALUE = {"formatted_address": "1 Main St", "latitude": 30.0, "longitude": -97.0}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, "PRUNE_INTERVAL", 5)
+    return GeocodeCache(
+        str(tmp_path / "geocode.sqlite3"),
+        memory_entries=100,
+        memory_ttl_seconds=60,
+        disk_ttl_seconds=3600,
+        disk_entries=3
+    )
+
+
+def _disk_keys(cache):
+    return {row[0] for row in cache._connect().execute("SELECT key FROM geocode")}
+
+
+def test_disk_store_keeps_the_newest_entries(cache, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(module.time, "time", lambda: next(clock))
+    for n in range(5):
+        asyncio.run(cache.set(f"{n} Main St", VALUE))
+    assert _disk_keys(cache) == {"2 main st", "3 main st", "4 main st"}
+
+
+def test_disk_store_drops_expired_entries(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+    asyncio.run(cache.set("Old Rd", VALUE))
+    now[0] += 7200
+    for n in range(4):
+        asyncio.run(cache.set(f"{n} Main St", VALUE))
+    assert "old rd" not in _disk_keys(cache)
@@ -0,0 +1,221 @@
+"""Tests for the outbound governor's circuit breaker, rate limiter and call classification."""
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import address, satellite
+from app.core import governor, rate_limit
+from app.core.governor import CircuitBreaker, OutboundGovernor, ProviderUnavailableError
+from app.core.rate_limit import TokenBucket
+from app.main import app
+
+
+class FakeClock:
+    """Stands in for the time module; advances only when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(governor, "time", fake)
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def gov(monkeypatch, clock):
+    monkeypatch.setattr(governor.settings, "outbound_governor_enabled", True)
+    monkeypatch.setattr(governor.settings, "circuit_failure_threshold", 2)
+    monkeypatch.setattr(governor.settings, "circuit_reset_seconds", 10.0)
+    monkeypatch.setattr(governor.settings, "google_rate_per_second", 0.0)
+    return OutboundGovernor()
+
+
+def call(gov: OutboundGovernor, outcome, provider: str = "google"):
+    """Make one governed call returning a response or raising an exception."""
+    async def fn():
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+    return asyncio.run(gov.call(provider, "/maps/api/geocode/json", fn))
+
+
+class StatusError(Exception):
+    """Exception carrying an HTTP status, like the OpenAI client's errors."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_breaker_opens_at_threshold_and_probes_once_after_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10.0)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats["rejected"] == 1
+    assert breaker.retry_after == 10.0
+
+    clock.advance(10.0)
+    assert breaker.allow()  # the single probe
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5.0)
+    breaker.record_failure()
+    clock.advance(5.0)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+    assert breaker.retry_after == 5.0
+
+
+def test_released_probe_lets_the_next_call_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5.0)
+    breaker.record_failure()
+    clock.advance(5.0)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_server_errors_open_the_circuit_and_calls_fail_fast(gov, clock):
+    for _ in range(2):
+        assert call(gov, httpx.Response(500)).status_code == 500
+    with pytest.raises(ProviderUnavailableError) as error:
+        call(gov, httpx.Response(200, json={"status": "OK"}))
+    assert error.value.retry_after == 10.0
+    assert error.value.headers == {"Retry-After": "10"}
+
+    clock.advance(10.0)
+    assert call(gov, httpx.Response(200, json={"status": "OK"})).status_code == 200
+    assert gov.breaker("google").state == "closed"
+
+
+def test_exceptions_without_status_count_as_failures(gov):
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            call(gov, httpx.ConnectError("refused"))
+    assert gov.breaker("google").state == "open"
+
+
+def test_client_errors_do_not_open_the_circuit(gov):
+    for _ in range(3):
+        call(gov, httpx.Response(400))
+        with pytest.raises(StatusError):
+            call(gov, StatusError(404))
+    assert gov.breaker("google").state == "closed"
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(429, headers={"Retry-After": "3"}),
+    httpx.Response(403, headers={"Retry-After": "3"}),
+    httpx.Response(200, json={"status": "OVER_QUERY_LIMIT"}, headers={"Retry-After": "3"})
+])
+def test_throttling_backs_off_the_rate_and_honours_retry_after(monkeypatch, gov, response):
+    monkeypatch.setattr(governor.settings, "google_rate_per_second", 10.0)
+    call(gov, response)
+
+    bucket = gov.bucket("google", "/maps/api/geocode/json")
+    assert bucket.rate == 5.0
+    assert bucket.stats["tokens"] == pytest.approx(-15.0)  # 3s at the reduced rate before the next token
+    assert gov.breaker("google").failures == 1
+
+
+def test_cancelled_probe_is_released(gov, clock):
+    for _ in range(2):
+        call(gov, httpx.Response(500))
+    clock.advance(10.0)
+
+    async def probe_then_cancel():
+        task = asyncio.ensure_future(gov.call("google", "/maps/api/geocode/json", lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(probe_then_cancel())
+    assert gov.breaker("google").state == "half_open"
+    assert gov.breaker("google").allow()
+
+
+def test_disabled_governor_never_rejects(monkeypatch, gov):
+    monkeypatch.setattr(governor.settings, "outbound_governor_enabled", False)
+    for _ in range(5):
+        call(gov, httpx.Response(500))
+    assert call(gov, httpx.Response(200)).status_code == 200
+
+
+def test_bucket_backoff_is_floored_and_recovers_additively(clock):
+    bucket = TokenBucket(rate=10.0, burst=10.0)
+    for _ in range(10):
+        bucket.backoff()
+    assert bucket.rate == pytest.approx(10.0 * rate_limit.MIN_RATE_FRACTION)
+
+    bucket.recover()
+    assert bucket.rate == pytest.approx(10.0 * (rate_limit.MIN_RATE_FRACTION + rate_limit.RECOVERY_FRACTION))
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == 10.0
+
+
+def test_unlimited_bucket_ignores_backoff(clock):
+    bucket = TokenBucket(rate=0.0, burst=0.0)
+    bucket.backoff(5.0)
+    assert bucket.rate == 0.0
+    asyncio.run(bucket.acquire())
+    assert bucket.acquired == 1
+
+
+def test_retry_after_header_rounds_up_to_whole_seconds():
+    assert ProviderUnavailableError("google", 0.2).headers == {"Retry-After": "1"}
+    assert ProviderUnavailableError("google", 12.3).headers == {"Retry-After": "13"}
+
+
+@pytest.fixture
+def unavailable_google(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ProviderUnavailableError("google", 12.3)
+
+    monkeypatch.setattr(address.settings, "google_maps_api_key", "test-key")
+    monkeypatch.setattr(address.settings, "geocode_cache_enabled", False)
+    monkeypatch.setattr(address.http_client, "get", unavailable)
+    monkeypatch.setattr(satellite.settings, "satellite_cache_enabled", False)
+
+
+def test_geocode_maps_open_circuit_to_503(unavailable_google):
+    response = TestClient(app).post("/api/v1/address/geocode", json={"address": "1 Main St"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "13"
+
+
+def test_raw_satellite_maps_open_circuit_to_503(unavailable_google):
+    response = TestClient(app).get("/api/v1/satellite/raw", params={"latitude": 30.0, "longitude": -97.0})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "13"
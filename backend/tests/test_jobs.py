@@ -0,0 +1,71 @@
+"""Tests for the job queue and job state event streams."""
+import asyncio
+from app.api.v1.endpoints.jobs import _job_events
+from app.core.jobs import Job, JobQueue
+
+
+class ConnectedRequest:
+    """Request stand-in whose client never disconnects."""
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def test_event_stream_ends_with_final_state_after_job_is_pruned():
+    async def scenario():
+        job = Job("job-1", "analyze", {}, status="running")
+        events = _job_events(job, ConnectedRequest())
+        first = await events.__anext__()
+
+        # The queue forgets the job; the stream still holds it
+        job.status = "succeeded"
+        job.notify()
+        rest = [event async for event in events]
+        return first, rest
+
+    first, rest = asyncio.run(scenario())
+    assert first.startswith("event: running")
+    assert len(rest) == 1
+    assert rest[0].startswith("event: succeeded")
+
+
+def test_worker_survives_a_result_that_cannot_be_persisted(tmp_path):
+    async def handler(payload):
+        return {"value": object() if payload["bad"] else 1}
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_pending=10, ttl_seconds=60, db_path=str(tmp_path / "jobs.db"))
+        queue.register("echo", handler)
+        await queue.start()
+        try:
+            bad = await queue.submit("echo", {"bad": True})
+            good = await queue.submit("echo", {"bad": False})
+            while not (bad.is_finished and good.is_finished):
+                await asyncio.sleep(0.01)
+            return bad, good
+        finally:
+            await queue.stop()
+
+    bad, good = asyncio.run(scenario())
+    assert bad.status == "failed"
+    assert "not JSON serializable" in bad.error
+    assert good.status == "succeeded"
+    assert good.result == {"value": 1}
+
+
+def test_restored_job_of_unknown_kind_fails(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        before = JobQueue(workers=1, max_pending=10, ttl_seconds=60, db_path=db_path)
+        await before._persist(Job("job-1", "retired", {}, status="running"))
+        await before.stop()
+
+        after = JobQueue(workers=1, max_pending=10, ttl_seconds=60, db_path=db_path)
+        await after.start()
+        await after.stop()
+        return after.get("job-1")
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert job.error == "Unknown job kind: retired"
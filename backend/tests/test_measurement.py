@@ -0,0 +1,48 @@
+"""Tests for measurement scale validation."""
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import measurement
+from app.main import app
+from app.services.geo_scale import feet_per_pixel
+from app.services.satellite_cache import ImageParams
+
+client = TestClient(app)
+
+SQUARE = [{"x": 0, "y": 0}, {"x": 100, "y": 0}, {"x": 100, "y": 100}, {"x": 0, "y": 100}]
+
+
+@pytest.mark.parametrize("scale", [
+    {"latitude": 95},
+    {"latitude": -90.5},
+    {"latitude": 30, "zoom": -2000},
+    {"latitude": 30, "zoom": 23},
+    {"latitude": 30, "map_scale": 0},
+    {"latitude": 30, "map_scale": 3}
+])
+def test_invalid_scale_inputs_are_rejected(scale):
+    assert client.post("/api/v1/measurement/calculate", json={"points": SQUARE, **scale}).status_code == 422
+    batch = {"polygons": [{"points": SQUARE, **scale}]}
+    assert client.post("/api/v1/measurement/calculate-batch", json=batch).status_code == 422
+
+
+def test_valid_scale_inputs_are_measured():
+    response = client.post("/api/v1/measurement/calculate", json={"points": SQUARE, "latitude": 30, "zoom": 20, "map_scale": 2})
+    assert response.status_code == 200
+    assert response.json()["scale_factor"] == pytest.approx(feet_per_pixel(30, 20, 2))
+
+
+def test_map_scale_is_ignored_with_image_id(monkeypatch):
+    async def get_params(digest):
+        return ImageParams(latitude=30.0, longitude=-97.0, zoom=20, width=800, height=600)
+
+    monkeypatch.setattr(measurement.satellite_cache, "get_params", get_params)
+    expected = pytest.approx(feet_per_pixel(30.0, 20, 1))
+
+    single = client.post("/api/v1/measurement/calculate", json={"points": SQUARE, "image_id": "a" * 64, "map_scale": 2})
+    assert single.json()["scale_factor"] == expected
+
+    batch = client.post(
+        "/api/v1/measurement/calculate-batch",
+        json={"polygons": [{"points": SQUARE, "image_id": "a" * 64, "map_scale": 4}]}
+    )
+    assert batch.json()["results"][0]["scale_factor"] == expected
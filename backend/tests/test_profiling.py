@@ -0,0 +1,42 @@
+"""Tests for the profile report store and access token."""
+import os
+from app.core import profiling
+from app.core.profiling import ProfileStore, token_matches
+
+
+def write(text: str):
+    def writer(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return writer
+
+
+def test_pruning_keeps_files_that_are_not_reports(tmp_path):
+    (tmp_path / "geocode.sqlite3").write_bytes(b"cache")
+    store = ProfileStore(str(tmp_path), max_files=1)
+
+    store.save("20260101-000000-get-a-00000001.collapsed", write("a 1\n"))
+    store.save("20260101-000001-get-b-00000002.collapsed", write("b 1\n"))
+
+    assert sorted(os.listdir(tmp_path)) == ["20260101-000001-get-b-00000002.collapsed", "geocode.sqlite3"]
+
+
+def test_only_reports_are_served(tmp_path):
+    (tmp_path / "geocode.sqlite3").write_bytes(b"cache")
+    (tmp_path / "report.pstats").write_bytes(b"stats")
+    store = ProfileStore(str(tmp_path), max_files=5)
+
+    assert store.path("geocode.sqlite3") is None
+    assert store.path("report.pstats") == str(tmp_path / "report.pstats")
+    assert [report["name"] for report in store.list()] == ["report.pstats"]
+
+
+def test_profiling_requires_a_configured_token(monkeypatch):
+    monkeypatch.setattr(profiling.settings, "profiling_token", None)
+    assert not token_matches(None)
+    assert not token_matches("anything")
+
+    monkeypatch.setattr(profiling.settings, "profiling_token", "secret")
+    assert token_matches("secret")
+    assert not token_matches("wrong")
+    assert not token_matches(None)
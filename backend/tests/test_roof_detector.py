@@ -0,0 +1,22 @@
+"""Tests for the local roof outline detector."""
+import io
+import pytest
+from PIL import Image, ImageDraw
+from shapely.geometry import Polygon
+from app.services.roof_detector import detect_roof_outline
+
+
+def _png(box):
+    image = Image.new("RGB", (800, 600), (40, 90, 40))
+    ImageDraw.Draw(image).rectangle(box, fill=(150, 150, 160))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("box", [(250, 180, 559, 419), (300, 200, 499, 399), (100, 100, 699, 499)])
+def test_rectangular_roof_area_is_not_shrunk(box):
+    result = detect_roof_outline(_png(box), 800, 600)
+    true_area = (box[2] - box[0] + 1) * (box[3] - box[1] + 1)
+    assert result["roof_type"] == "rectangular"
+    assert Polygon(result["points"]).area == pytest.approx(true_area, rel=0.04)
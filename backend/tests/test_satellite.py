@@ -0,0 +1,57 @@
+"""Tests for the satellite image endpoints."""
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import satellite
+from app.main import app
+
+client = TestClient(app)
+
+PNG = b"\x89PNG\r\n\x1a\nimage"
+
+
+@pytest.fixture
+def google(monkeypatch):
+    async def get(url, **kwargs):
+        return httpx.Response(200, content=PNG, headers={"content-type": "image/png"}, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(satellite.settings, "google_maps_api_key", "test-key")
+    monkeypatch.setattr(satellite.http_client, "get", get)
+
+
+def test_image_id_is_omitted_when_the_cache_is_disabled(monkeypatch, google):
+    monkeypatch.setattr(satellite.settings, "satellite_cache_enabled", False)
+    body = client.post("/api/v1/satellite/image", json={"latitude": 30.1, "longitude": -97.1}).json()
+    assert body["success"] is True
+    assert body["image_id"] is None
+    assert body["image_base64"]
+
+
+def test_image_id_resolves_when_the_cache_is_enabled(monkeypatch, google):
+    monkeypatch.setattr(satellite.settings, "satellite_cache_enabled", True)
+    body = client.post("/api/v1/satellite/image", json={"latitude": 30.2, "longitude": -97.2}).json()
+    assert body["image_id"]
+    image = client.get(f"/api/v1/satellite/image/{body['image_id']}")
+    assert image.status_code == 200
+    assert image.content == PNG
+
+
+def test_empty_upstream_image_is_an_error(monkeypatch):
+    async def get(url, **kwargs):
+        return httpx.Response(200, content=b"", headers={"content-type": "image/png"}, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(satellite.settings, "google_maps_api_key", "test-key")
+    monkeypatch.setattr(satellite.settings, "satellite_cache_enabled", True)
+    monkeypatch.setattr(satellite.http_client, "get", get)
+
+    body = client.post("/api/v1/satellite/image", json={"latitude": 30.3, "longitude": -97.3}).json()
+    assert body["success"] is False
+    assert "empty image" in body["error"]
+    assert client.get("/api/v1/satellite/raw", params={"latitude": 30.3, "longitude": -97.3}).status_code == 502
+
+
+def test_raw_image_takes_no_base64_option():
+    parameters = app.openapi()["paths"]["/api/v1/satellite/raw"]["get"]["parameters"]
+    names = {parameter["name"] for parameter in parameters}
+    assert {"latitude", "longitude", "zoom", "width", "height"} <= names
+    assert "include_base64" not in names
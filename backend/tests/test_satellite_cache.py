@@ -0,0 +1,29 @@
+"""Tests for the on-disk satellite image cache."""
+import asyncio
+import pytest
+from app.services.satellite_cache import CachedImage, SatelliteCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SatelliteCache(str(tmp_path), max_bytes=1024 * 1024, precision=5)
+
+
+def test_empty_images_are_not_cached(cache):
+    key = cache.make_key(30.0, -97.0, 20, 800, 600)
+    with pytest.raises(ValueError):
+        asyncio.run(cache.put(key, b"", "image/png"))
+    assert asyncio.run(cache.get(key)) is None
+
+
+def test_empty_blob_opens_as_empty_bytes(cache):
+    image = CachedImage("e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855", "image/png", 0)
+    with cache.open(image) as image_bytes:
+        assert bytes(image_bytes) == b""
+
+
+def test_stored_image_round_trips(cache):
+    key = cache.make_key(30.0, -97.0, 20, 800, 600)
+    image = asyncio.run(cache.put(key, b"png-bytes", "image/png"))
+    with cache.open(image) as image_bytes:
+        assert bytes(image_bytes) == b"png-bytes"
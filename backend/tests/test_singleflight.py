@@ -0,0 +1,92 @@
+"""Tests for coalescing of identical concurrent calls."""
+import asyncio
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+        return results, calls, flight.stats
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == ["result"] * 3
+    assert len(calls) == 1
+    assert stats["coalesced"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_call_for_others():
+    async def scenario():
+        flight = SingleFlight()
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return "result"
+
+        leaver = asyncio.create_task(flight.do("key", work))
+        stayer = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        return await stayer, leaver.cancelled(), finished
+
+    result, leaver_cancelled, finished = asyncio.run(scenario())
+    assert result == "result"
+    assert leaver_cancelled
+    assert finished == [1]
+
+
+def test_last_waiter_leaving_cancels_call():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        outcome = []
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(1)
+                outcome.append("completed")
+            except asyncio.CancelledError:
+                outcome.append("cancelled")
+                raise
+
+        waiter = asyncio.create_task(flight.do("key", work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+        return outcome, flight.stats
+
+    outcome, stats = asyncio.run(scenario())
+    assert outcome == ["cancelled"]
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+def test_call_after_abandoned_one_starts_fresh():
+    async def scenario():
+        flight = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.02)
+            return len(runs)
+
+        waiter = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return await flight.do("key", work)
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,52 @@
+"""Tests for per-request span tracing."""
+import json
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import tracing
+from app.core.tracing import TracingMiddleware, span
+
+traces = []
+
+
+def traced_app(monkeypatch, trace_file=None) -> TestClient:
+    """App whose streamed response opens spans after the headers are sent."""
+    monkeypatch.setattr(tracing.settings, "trace_file", trace_file)
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream(spans: int = 3):
+        traces.append(tracing._current_trace.get())
+        with span("before_headers"):
+            pass
+
+        async def body():
+            for _ in range(spans):
+                with span("row"):
+                    yield b"."
+
+        return StreamingResponse(body())
+
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app)
+
+
+def test_spans_after_headers_are_not_recorded_without_trace_file(monkeypatch):
+    response = traced_app(monkeypatch).get("/stream", params={"spans": 50})
+
+    assert response.content == b"." * 50
+    assert "before_headers;dur=" in response.headers["server-timing"]
+    trace = traces[-1]
+    assert [s.name for s in trace.spans] == ["before_headers"]
+    assert trace.dropped == 50
+
+
+def test_exported_trace_keeps_streamed_spans_up_to_the_cap(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "MAX_SPANS_PER_TRACE", 10)
+    trace_file = tmp_path / "traces.jsonl"
+    traced_app(monkeypatch, str(trace_file)).get("/stream", params={"spans": 20})
+
+    record = json.loads(trace_file.read_text().splitlines()[-1])
+    assert [s["name"] for s in record["spans"]] == ["before_headers"] + ["row"] * 9
+    assert record["dropped_spans"] == 11
+    assert all(s["duration_ms"] is not None for s in record["spans"])